@@ -0,0 +1,32 @@
+# bench_early_evals.py
+# Compares looping early_evals() against early_evals_many() on a synthetic backlog.
+# Usage: python bench_early_evals.py [n_stories]
+
+import sys
+import time
+
+from early_evals import early_evals, early_evals_many
+from story_fixtures import make_corpus
+
+
+def bench(n: int = 5000) -> float:
+    backlog = make_corpus(n)
+
+    t0 = time.perf_counter()
+    looped = [early_evals(s) for s in backlog]
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batched = early_evals_many(backlog)
+    t_many = time.perf_counter() - t0
+
+    assert batched == looped, "early_evals_many must match early_evals"
+    print(f"{n} stories")
+    print(f"  early_evals loop : {t_loop:.3f}s ({n / t_loop:,.0f} stories/s)")
+    print(f"  early_evals_many : {t_many:.3f}s ({n / t_many:,.0f} stories/s)")
+    print(f"  speedup          : {t_loop / t_many:.1f}x")
+    return t_loop / t_many
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
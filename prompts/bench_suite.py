@@ -0,0 +1,210 @@
+# bench_suite.py
+# Benchmark suite for the story pipeline: early_evals, apply_quick_fixes,
+# _diff_dict / build_suggestion, apply_suggestion and estimate_points_v1, each
+# timed on a seeded synthetic corpus at several story sizes.
+#
+# Usage:
+#   python bench_suite.py [-n 500] [--sizes small,medium,large] [-o results.json] [--compare old.json]
+#
+# Results are JSON (ops/sec and peak traced memory per benchmark and size) so
+# runs can be diffed: --compare prints the ops/sec ratio against a saved run.
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import early_evals as _early_evals
+import story_codec
+from early_evals import Story, apply_quick_fixes, early_evals
+from story_point_estimator import Story as EstimatorStory, estimate_points_v1
+from story_fixtures import SIZES, make_corpus, revise_story
+from story_suggestion import _diff_dict, apply_suggestion, build_suggestion
+
+RESULTS_VERSION = 1
+
+# --- Benchmarks ---
+# Each entry: name -> setup(corpus) returning a zero-argument callable per story.
+
+def _bench_early_evals(corpus: List[Story]) -> List[Callable[[], Any]]:
+    return [lambda s=s: early_evals(s) for s in corpus]
+
+
+def _bench_apply_quick_fixes(corpus: List[Story]) -> List[Callable[[], Any]]:
+    return [lambda s=s, r=early_evals(s): apply_quick_fixes(s, r) for s in corpus]
+
+
+def _pairs(corpus: List[Story]) -> List[Tuple[Story, Story]]:
+    rng = random.Random(len(corpus))
+    return [(s, revise_story(rng, s)) for s in corpus]
+
+
+def _bench_diff_dict(corpus: List[Story]) -> List[Callable[[], Any]]:
+    return [lambda b=b, a=a: _diff_dict(b, a) for b, a in _pairs(corpus)]
+
+
+def _bench_build_suggestion(corpus: List[Story]) -> List[Callable[[], Any]]:
+    return [lambda b=b, a=a: build_suggestion(b, a, scope="full") for b, a in _pairs(corpus)]
+
+
+def _bench_apply_suggestion(corpus: List[Story]) -> List[Callable[[], Any]]:
+    return [lambda b=b, sg=build_suggestion(b, a, scope="full"): apply_suggestion(b, sg)
+            for b, a in _pairs(corpus)]
+
+
+def _bench_estimate_points(corpus: List[Story]) -> List[Callable[[], Any]]:
+    stories = [EstimatorStory(title=s["title"], description=s["description"],
+                              acceptance_criteria=s["acceptance_criteria"], tags=s["tags"], id=s["id"])
+               for s in corpus]
+    return [lambda s=s: estimate_points_v1(s) for s in stories]
+
+
+def _suggestions(corpus: List[Story]) -> List[Dict[str, Any]]:
+    return [build_suggestion(b, a, scope="full") for b, a in _pairs(corpus)]
+
+
+def _bench_json_dumps(corpus: List[Story]) -> List[Callable[[], Any]]:
+    # Baseline: the audit trail's current format
+    return [lambda s=s: json.dumps(s, indent=2) for s in _suggestions(corpus)]
+
+
+def _bench_json_loads(corpus: List[Story]) -> List[Callable[[], Any]]:
+    return [lambda d=json.dumps(s, indent=2): json.loads(d) for s in _suggestions(corpus)]
+
+
+def _bench_codec_dumps(corpus: List[Story]) -> List[Callable[[], Any]]:
+    return [lambda s=s: story_codec.dumps(s) for s in _suggestions(corpus)]
+
+
+def _bench_codec_loads(corpus: List[Story]) -> List[Callable[[], Any]]:
+    return [lambda d=story_codec.dumps(s): story_codec.loads(d) for s in _suggestions(corpus)]
+
+
+BENCHMARKS: Dict[str, Callable[[List[Story]], List[Callable[[], Any]]]] = {
+    "early_evals": _bench_early_evals,
+    "apply_quick_fixes": _bench_apply_quick_fixes,
+    "_diff_dict": _bench_diff_dict,
+    "build_suggestion": _bench_build_suggestion,
+    "apply_suggestion": _bench_apply_suggestion,
+    "estimate_points_v1": _bench_estimate_points,
+    "json.dumps": _bench_json_dumps,
+    "json.loads": _bench_json_loads,
+    "story_codec.dumps": _bench_codec_dumps,
+    "story_codec.loads": _bench_codec_loads,
+}
+
+
+def _time_calls(calls: List[Callable[[], Any]], repeat: int) -> float:
+    """Best-of-`repeat` wall time for one pass over `calls`."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for call in calls:
+            call()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _peak_memory(calls: List[Callable[[], Any]]) -> int:
+    """Peak bytes allocated by a single call, max over the pass (traced separately from timing)."""
+    peak = 0
+    tracemalloc.start()
+    try:
+        for call in calls:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            call()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_suite(n: int = 500, *, sizes: Optional[List[str]] = None, benchmarks: Optional[List[str]] = None,
+              seed: int = 7, repeat: int = 3) -> Dict[str, Any]:
+    """Run the selected benchmarks at each size; returns the JSON-ready results document."""
+    rows: List[Dict[str, Any]] = []
+    for size in sizes or list(SIZES):
+        corpus = make_corpus(n, SIZES[size], seed=seed)
+        for name in benchmarks or list(BENCHMARKS):
+            calls = BENCHMARKS[name](corpus)
+            best = _time_calls(calls, repeat)
+            rows.append({
+                "benchmark": name,
+                "size": size,
+                "n": n,
+                "best_s": round(best, 6),
+                "ops_per_sec": round(n / best, 1) if best else None,
+                "peak_kib": round(_peak_memory(calls) / 1024, 1),
+            })
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "rules_fingerprint": _early_evals.rules_fingerprint(),
+            "sizes": {s: asdict(SIZES[s]) for s in sizes or list(SIZES)},
+        },
+        "results": rows,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """ops/sec ratio (current / baseline) for every (benchmark, size) present in both runs."""
+    old = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+    out = []
+    for r in current["results"]:
+        b = old.get((r["benchmark"], r["size"]))
+        if b and b["ops_per_sec"] and r["ops_per_sec"]:
+            out.append({"benchmark": r["benchmark"], "size": r["size"],
+                        "ratio": round(r["ops_per_sec"] / b["ops_per_sec"], 3)})
+    return out
+
+
+def _print_table(doc: Dict[str, Any], ratios: Optional[List[Dict[str, Any]]] = None) -> None:
+    ratio_of = {(r["benchmark"], r["size"]): r["ratio"] for r in ratios or []}
+    print(f"{'benchmark':<20}{'size':<8}{'ops/sec':>12}{'peak KiB':>10}{'vs base':>9}")
+    for r in doc["results"]:
+        ratio = ratio_of.get((r["benchmark"], r["size"]))
+        print(f"{r['benchmark']:<20}{r['size']:<8}{r['ops_per_sec']:>12,.0f}{r['peak_kib']:>10.1f}"
+              f"{f'{ratio:.2f}x' if ratio is not None else '':>9}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the story pipeline on a synthetic corpus.")
+    parser.add_argument("-n", type=int, default=500, help="stories per size (default: 500)")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"comma-separated subset of {list(SIZES)}")
+    parser.add_argument("--bench", default=",".join(BENCHMARKS), help="comma-separated benchmarks to run")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes; the best one is reported")
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    parser.add_argument("--compare", help="results JSON from an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    sizes, benches = args.sizes.split(","), args.bench.split(",")
+    unknown = [s for s in sizes if s not in SIZES] + [b for b in benches if b not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown size/benchmark: {', '.join(unknown)}")
+
+    doc = run_suite(args.n, sizes=sizes, benchmarks=benches, seed=args.seed, repeat=args.repeat)
+    ratios = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            ratios = compare(doc, json.load(fh))
+    _print_table(doc, ratios)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(doc, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,57 +3,328 @@
 # invoke right after LLM response, whether from refine_story or refine_field
 
 import time
-import hashlib
-import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypedDict
 from copy import deepcopy
 
+from json_patch import JsonPatchError, apply_patch, clone_json, escape_token, json_equal, parse_pointer
+from struct_hash import DigestMemo, digest, story_hash
+
 Story = Dict[str, Any]
 
 def _now_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
-def _sha(obj: Any) -> str:
-    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest()
+def _sha(obj: Any, memo: Optional[DigestMemo] = None) -> str:
+    # Merkle digest: combines cached digests of unchanged long strings instead of re-serializing
+    return story_hash(obj, memo)
+
+def _diff_dict(before: Any, after: Any, path: str = "", memo: Optional[DigestMemo] = None) -> List[Dict[str, Any]]:
+    """
+    JSON diff without external deps, as an RFC 6902 patch (json_patch.apply_patch
+    turns `before` into `after`). Emits ops: replace / add / remove for
+    scalars, arrays and dicts, plus move for list elements that changed
+    position (see _diff_list). remove/replace also carry the old value as
+    "before" for UI previews and undo; patch engines ignore it. With a digest
+    memo (see struct_hash), subtrees with equal digests are skipped without
+    walking them.
+    """
+    return list(_iter_diff(before, after, path, None, None, memo))
+
 
-def _diff_dict(before: Any, after: Any, path: str = "") -> List[Dict[str, Any]]:
+def iter_diff(before: Any, after: Any, path: str = "", *,
+              max_depth: Optional[int] = None) -> Iterator[Dict[str, Any]]:
     """
-    Minimal JSON 'patch-like' diff without external deps.
-    Emits ops: replace / add / remove for scalars, arrays and dicts.
-    Good enough for UI previews; not a full RFC 6902.
+    Lazy _diff_dict: yields the same ops one at a time, so a caller can stop
+    early (ops apply sequentially, so any prefix is a valid patch). Below
+    max_depth levels of nesting, containers that differ are replaced whole
+    instead of diffed.
+    """
+    return _iter_diff(before, after, path, max_depth, None, None)
+
+
+class BudgetedDiff(TypedDict):
+    diff: List[Dict[str, Any]]
+    truncated: bool          # the diff is coarser than _diff_dict's (still complete and valid)
+    reason: Optional[str]    # "max_ops" | "time" | "max_depth"
+
+
+def diff_with_budget(before: Any, after: Any, *, max_ops: Optional[int] = None,
+                     max_depth: Optional[int] = None,
+                     time_budget: Optional[float] = None) -> BudgetedDiff:
     """
-    diffs: List[Dict[str, Any]] = []
+    _diff_dict with limits, for LLM output that may be huge or deeply nested.
+    Top-level fields are diffed one at a time; once max_ops or time_budget
+    (seconds) is used up, the field in progress and all remaining changed
+    fields are replaced whole. If even that exceeds max_ops, the diff is a
+    single replace of the whole document. The result always turns `before`
+    into `after`; 'truncated' says it is coarser than the full diff. Budgets
+    are checked between ops (a single list alignment is bounded by
+    MAX_LIST_EDITS). max_ops must be at least 1: a change always takes an op.
+    """
+    if max_ops is not None and max_ops < 1:
+        raise ValueError("max_ops must be >= 1.")
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    cuts: List[str] = []
+    ops: List[Dict[str, Any]] = []
+    reason: Optional[str] = None
+
+    if isinstance(before, dict) and isinstance(after, dict) and max_depth != 0:
+        child_depth = None if max_depth is None else max_depth - 1
+        bkeys, akeys = set(before.keys()), set(after.keys())
+        for k in sorted(bkeys - akeys):
+            ops.append({"op": "remove", "path": f"/{escape_token(k)}", "before": before[k]})
+        for k in sorted(akeys - bkeys):
+            ops.append({"op": "add", "path": f"/{escape_token(k)}", "value": after[k]})
+        units = [(f"/{escape_token(k)}", before[k], after[k])
+                 for k in sorted(akeys & bkeys) if before[k] is not after[k]]
+    else:
+        child_depth = max_depth
+        units = [("", before, after)]
+
+    for path, b, a in units:
+        if reason is None:
+            unit_ops: List[Dict[str, Any]] = []
+            for op in _iter_diff(b, a, path, child_depth, cuts, None):
+                unit_ops.append(op)
+                if max_ops is not None and len(ops) + len(unit_ops) > max_ops:
+                    reason = "max_ops"
+                elif deadline is not None and time.perf_counter() > deadline:
+                    reason = "time"
+                if reason is not None:
+                    break
+            else:
+                ops.extend(unit_ops)
+                continue
+        # Budget spent: this field as one replace
+        if b != a:
+            ops.append({"op": "replace", "path": path, "before": b, "value": a})
+
+    if max_ops is not None and len(ops) > max_ops:
+        ops = [{"op": "replace", "path": "", "before": before, "value": after}] if before != after else []
+        reason = reason or "max_ops"
+    if reason is None and cuts:
+        reason = "max_depth"
+    return {"diff": ops, "truncated": reason is not None, "reason": reason}
+
+
+def _unchanged(before: Any, after: Any, memo: Optional[DigestMemo]) -> bool:
+    # Shared subtree (copy-on-write results share unchanged fields): equal in O(1);
+    # with a memo, equal containers are recognised by their digests
+    if before is after:
+        return True
+    return (memo is not None and isinstance(before, (dict, list)) and type(before) is type(after)
+            and digest(before, memo) == digest(after, memo))
+
+
+def _iter_diff(before: Any, after: Any, path: str, depth_left: Optional[int],
+               cuts: Optional[List[str]], memo: Optional[DigestMemo]) -> Iterator[Dict[str, Any]]:
+    if _unchanged(before, after, memo):
+        return
+
+    both_dicts = isinstance(before, dict) and isinstance(after, dict)
+    both_lists = isinstance(before, list) and isinstance(after, list)
+    if (both_dicts or both_lists) and depth_left == 0:
+        # Depth budget spent: one replace for the whole subtree
+        if before != after:
+            if cuts is not None:
+                cuts.append(path)
+            yield {"op": "replace", "path": path, "before": before, "value": after}
+        return
+    child_depth = None if depth_left is None else depth_left - 1
 
     # Both dicts
-    if isinstance(before, dict) and isinstance(after, dict):
+    if both_dicts:
         bkeys, akeys = set(before.keys()), set(after.keys())
         for k in sorted(bkeys - akeys):
-            diffs.append({"op": "remove", "path": f"{path}/{k}" if path else f"/{k}", "before": before[k]})
+            yield {"op": "remove", "path": f"{path}/{escape_token(k)}", "before": before[k]}
         for k in sorted(akeys - bkeys):
-            diffs.append({"op": "add", "path": f"{path}/{k}" if path else f"/{k}", "after": after[k]})
+            yield {"op": "add", "path": f"{path}/{escape_token(k)}", "value": after[k]}
         for k in sorted(akeys & bkeys):
-            diffs.extend(_diff_dict(before[k], after[k], f"{path}/{k}" if path else f"/{k}"))
-        return diffs
-
-    # Both lists (naive index-by-index)
-    if isinstance(before, list) and isinstance(after, list):
-        maxlen = max(len(before), len(after))
-        for i in range(maxlen):
-            p = f"{path}/{i}" if path else f"/{i}"
-            if i >= len(before):
-                diffs.append({"op": "add", "path": p, "after": after[i]})
-            elif i >= len(after):
-                diffs.append({"op": "remove", "path": p, "before": before[i]})
-            else:
-                diffs.extend(_diff_dict(before[i], after[i], p))
-        return diffs
+            if not _unchanged(before[k], after[k], memo):
+                yield from _iter_diff(before[k], after[k], f"{path}/{escape_token(k)}", child_depth, cuts, memo)
+        return
+
+    # Both lists: aligned, so an insert at the top is one add, not N replaces
+    if both_lists:
+        yield from _diff_list(before, after, path, child_depth, cuts, memo)
+        return
 
     # Scalars or mismatched types → replace if different
     if before != after:
-        diffs.append({"op": "replace", "path": path or "/", "before": before, "after": after})
-    return diffs
+        yield {"op": "replace", "path": path, "before": before, "value": after}
+
+
+# --- List alignment ---
+# List ops are emitted in an order that applies sequentially (RFC 6902 style):
+# each index refers to the list as left by the previous ops. Moves carry
+# "from" (source index) and "path" (destination index).
+
+MAX_LIST_EDITS = 256  # Myers edit-distance cap; beyond it lists are diffed index by index
+
+
+def _list_key(x: Any, memo: Optional[DigestMemo] = None) -> Any:
+    """Hashable identity of a list element, for move matching."""
+    return x if isinstance(x, str) else digest(x, memo)
+
+
+def _myers_matches(a: List[Any], b: List[Any], max_edits: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    (i, j) index pairs of a longest common subsequence of a and b, found with
+    Myers' O((N+M)D) algorithm. None when the edit distance exceeds max_edits.
+    """
+    n, m = len(a), len(b)
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    trace: List[List[int]] = []
+    for d in range(min(n + m, max_edits) + 1):
+        # Backtracking at step d only reads diagonals -d-1..d+1: keep that
+        # window (O(D^2) memory in total instead of O((N+M)D))
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]          # step down: insertion from b
+            else:
+                x = v[offset + k - 1] + 1      # step right: deletion from a
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, n, m)
+    return None
+
+
+def _myers_backtrack(trace: List[List[int]], n: int, m: int) -> List[Tuple[int, int]]:
+    matches: List[Tuple[int, int]] = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        off = d + 1  # trace[d] starts at diagonal -d-1
+        k = x - y
+        if d == 0:
+            prev_x = prev_y = 0
+        else:
+            if k == -d or (k != d and v[off + k - 1] < v[off + k + 1]):
+                prev_k = k + 1
+            else:
+                prev_k = k - 1
+            prev_x = v[off + prev_k]
+            prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:  # diagonal snake
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+        x, y = prev_x, prev_y
+    matches.reverse()
+    return matches
 
 
+def _diff_list_by_index(before: List[Any], after: List[Any], path: str, depth_left: Optional[int],
+                        cuts: Optional[List[str]], memo: Optional[DigestMemo]) -> Iterator[Dict[str, Any]]:
+    for i in range(min(len(before), len(after))):
+        yield from _iter_diff(before[i], after[i], f"{path}/{i}", depth_left, cuts, memo)
+    for i in range(len(before) - 1, len(after) - 1, -1):  # from the end, so indices stay valid
+        yield {"op": "remove", "path": f"{path}/{i}", "before": before[i]}
+    for i in range(len(before), len(after)):
+        yield {"op": "add", "path": f"{path}/{i}", "value": after[i]}
+
+
+def _diff_list(before: List[Any], after: List[Any], path: str, depth_left: Optional[int] = None,
+               cuts: Optional[List[str]] = None, memo: Optional[DigestMemo] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Minimal list diff: add / remove / move ops plus nested diffs (up to
+    depth_left more levels) for elements edited in place. Unchanged elements
+    produce no ops.
+    """
+    # Common prefix/suffix are unchanged; only the middle window is aligned
+    start = 0
+    end_b, end_a = len(before), len(after)
+    while start < end_b and start < end_a and before[start] == after[start]:
+        start += 1
+    while end_b > start and end_a > start and before[end_b - 1] == after[end_a - 1]:
+        end_b -= 1
+        end_a -= 1
+    old, new = before[start:end_b], after[start:end_a]
+    if not old:
+        for j, x in enumerate(new):
+            yield {"op": "add", "path": f"{path}/{start + j}", "value": x}
+        return
+    if not new:
+        for i in range(len(old) - 1, -1, -1):
+            yield {"op": "remove", "path": f"{path}/{start + i}", "before": old[i]}
+        return
+    if len(old) == len(new) == 1:  # single element edited in place
+        yield from _iter_diff(old[0], new[0], f"{path}/{start}", depth_left, cuts, memo)
+        return
+
+    if len(old) * len(new) <= 64 and not any(x in new for x in old):
+        matches: Optional[List[Tuple[int, int]]] = []  # nothing in common: one gap, skip alignment
+    else:
+        matches = _myers_matches(old, new, MAX_LIST_EDITS)
+    if matches is None:
+        yield from _diff_list_by_index(before, after, path, depth_left, cuts, memo)
+        return
+
+    # source[j]: index in `old` that becomes new[j] (None: new element)
+    source: List[Optional[int]] = [None] * len(new)
+    for i, j in matches:
+        source[j] = i
+    used = {i for i, _ in matches}
+
+    # Equal elements that changed position become moves
+    by_key: Dict[Any, List[int]] = {}
+    for i in range(len(old)):
+        if i not in used:
+            by_key.setdefault(_list_key(old[i], memo), []).append(i)
+    moved = set()
+    if by_key:
+        for j in range(len(new)):
+            candidates = by_key.get(_list_key(new[j], memo)) if source[j] is None else None
+            if candidates:
+                source[j] = candidates.pop(0)
+                used.add(source[j])
+                moved.add(j)
+
+    # Leftover deletions and insertions in the same gap are in-place edits
+    edited: Dict[int, int] = {}
+    gap_b = gap_a = 0
+    for i, j in matches + [(len(old), len(new))]:
+        if i > gap_b and j > gap_a:
+            dels = [x for x in range(gap_b, i) if x not in used]
+            ins = [y for y in range(gap_a, j) if source[y] is None]
+            for x, y in zip(dels, ins):
+                source[y] = edited[y] = x
+                used.add(x)
+        gap_b, gap_a = i + 1, j + 1
+
+    # 1) removals, from the end so earlier indices stay valid
+    removed = sorted(set(range(len(old))) - used, reverse=True)
+    for i in removed:
+        yield {"op": "remove", "path": f"{path}/{start + i}", "before": old[i]}
+    # 2) moves: place each moved element right after its predecessor in the target order
+    if moved:
+        cur = sorted(used)
+        pred: Optional[int] = None
+        for j in range(len(new)):
+            src = source[j]
+            if src is None:
+                continue
+            if j in moved:
+                frm = cur.index(src)
+                cur.pop(frm)
+                to = cur.index(pred) + 1 if pred is not None else 0
+                cur.insert(to, src)
+                if frm != to:
+                    yield {"op": "move", "from": f"{path}/{start + frm}", "path": f"{path}/{start + to}"}
+            pred = src
+    # 3) insertions and in-place edits, in target order
+    for j in sorted(edited.keys() | {j for j, src in enumerate(source) if src is None}):
+        if j in edited:
+            yield from _iter_diff(old[edited[j]], new[j], f"{path}/{start + j}", depth_left, cuts, memo)
+        else:
+            yield {"op": "add", "path": f"{path}/{start + j}", "value": new[j]}
+
 def build_suggestion(
     before_story: Story,
     after_story: Story,
@@ -63,11 +334,17 @@ def build_suggestion(
     model: str = "gpt-5",
     temperature: float = 0.0,
     retrieval_used: bool = False,
-    meta: Optional[Dict[str, Any]] = None
+    meta: Optional[Dict[str, Any]] = None,
+    compact: bool = False,               # store base hash + patch instead of before/after copies
+    text_diff: bool = False              # word-level diffs on string replace ops (see text_diff.py)
 ) -> Dict[str, Any]:
     """
     Create a UI-ready suggestion object with diff.
     Use this immediately after a refine call succeeds.
+    compact=True keeps only "base_hash" and the patch, so a pending
+    suggestion costs memory in proportion to the change, not the story.
+    text_diff=True stores word-level diffs on string replace ops instead of
+    the old text, so the UI doesn't have to diff long descriptions itself.
     """
     if scope == "field" and not field_name:
         raise ValueError("field_name is required when scope='field'.")
@@ -76,12 +353,45 @@ def build_suggestion(
     # if scope == "field" and set(after_story.keys()) <= {field_name}:
     #     raise ValueError("after_story should be a full story JSON; merge field updates before calling.")
 
+    metadata = {
+        "created_at": _now_iso(),
+        "model": model,
+        "temperature": temperature,
+        "retrieval_used": retrieval_used,
+        **(meta or {})
+    }
+
+    if text_diff:
+        from text_diff import attach_text_diffs  # imports this module
+
+    # Hash first: the diff then skips every subtree whose digests match
+    memo: DigestMemo = {}
+
+    if compact:
+        sid = f"sugg_{_sha({'b': before_story, 'a': after_story}, memo)[:12]}"
+        # Freeze only the values the patch carries
+        diff = [{k: clone_json(v) for k, v in op.items()}
+                for op in _diff_dict(before_story, after_story, memo=memo)]
+        _record_anchors(before_story, diff)
+        if text_diff:
+            diff = attach_text_diffs(diff)
+        return {
+            "id": sid,
+            "scope": scope,
+            "field_name": field_name,
+            "base_hash": _sha(before_story, memo),
+            "diff": diff,
+            "metadata": metadata
+        }
+
     # Deepcopy to freeze snapshot at creation time
     before_copy = deepcopy(before_story)
     after_copy = deepcopy(after_story)
 
-    diff = _diff_dict(before_copy, after_copy)
-    sid = f"sugg_{_sha({'b': before_copy, 'a': after_copy})[:12]}"
+    sid = f"sugg_{_sha({'b': before_copy, 'a': after_copy}, memo)[:12]}"
+    diff = _diff_dict(before_copy, after_copy, memo=memo)
+    if text_diff:
+        diff = attach_text_diffs(diff)
 
     return {
         "id": sid,
@@ -90,31 +400,151 @@ def build_suggestion(
         "before": before_copy,
         "after": after_copy,
         "diff": diff,
-        "metadata": {
-            "created_at": _now_iso(),
-            "model": model,
-            "temperature": temperature,
-            "retrieval_used": retrieval_used,
-            **(meta or {})
-        }
+        "metadata": metadata
     }
 
-# Applies the suggestion
-def apply_suggestion(current_story: Story, suggestion: Dict[str, Any]) -> Story:
-    """Safely apply a suggestion produced by build_suggestion()."""
-    # Optional drift check: user may have edited since suggestion was created
-    before = suggestion.get("before")
-    if before is not None and before != current_story:
-        # log/warn or block; for now we just proceed
-        # print("⚠️ Warning: current story differs from suggestion.before")
-        pass
+_MISSING = object()
 
+def _lookup(doc: Any, pointer: str) -> Any:
+    """Value at a JSON pointer, or _MISSING."""
+    for token in parse_pointer(pointer):
+        if isinstance(doc, dict):
+            doc = doc.get(token, _MISSING)
+        elif isinstance(doc, list) and token.isdigit() and int(token) < len(doc):
+            doc = doc[int(token)]
+        else:
+            return _MISSING
+        if doc is _MISSING:
+            break
+    return doc
+
+def _list_neighbours(doc: Any, pointer: str) -> Optional[Dict[str, Any]]:
+    """
+    Items around a list insertion point as {"prev": ..., "next": ...} (a key
+    is omitted at that end of the list); None if the pointer doesn't name a
+    position in a list.
+    """
+    if "/" not in pointer:
+        return None
+    parent_ptr, _, token = pointer.rpartition("/")
+    parent = _lookup(doc, parent_ptr)
+    if not isinstance(parent, list) or not (token == "-" or token.isdigit()):
+        return None
+    i = len(parent) if token == "-" else int(token)
+    if i > len(parent):
+        return None
+    neighbours = {}
+    if i > 0:
+        neighbours["prev"] = parent[i - 1]
+    if i < len(parent):
+        neighbours["next"] = parent[i]
+    return neighbours
+
+def _record_anchors(doc: Any, patch: List[Dict[str, Any]]) -> None:
+    """
+    Give each move op the value it moves as "before", so it can be checked
+    like remove/replace, and each list add the items it goes between as
+    "anchor", so an insertion can't land at a shifted index.
+    """
+    if not any(op["op"] in ("move", "add") for op in patch):
+        return
+    for op in patch:
+        if op["op"] == "move":
+            op["before"] = clone_json(_lookup(doc, op["from"]))
+        elif op["op"] == "add":
+            anchor = _list_neighbours(doc, op["path"])
+            if anchor is not None:
+                op["anchor"] = clone_json(anchor)
+        doc = apply_patch(doc, [op])
+
+def _old_value(op: Dict[str, Any]) -> Any:
+    if "before" in op:
+        return op["before"]
+    if "text_diff" in op:
+        from text_diff import split_text_diff  # imports this module
+        return split_text_diff(op["value"], op["text_diff"])[0]
+    return _MISSING
+
+def _apply_checked(story: Story, patch: List[Dict[str, Any]]) -> Story:
+    """
+    Apply a compact suggestion's patch to a story that changed since the
+    suggestion was built. Positions may have shifted, so every op first tests
+    the old value it recorded, a list add checks the items it goes between
+    and a dict add may not overwrite an existing key: the patch applies only
+    where the story still holds what it was built against. Raises
+    JsonPatchError otherwise.
+    """
+    for op in patch:
+        kind = op.get("op")
+        old = _old_value(op)
+        if old is not _MISSING and kind in ("remove", "replace", "move"):
+            where = op["from"] if kind == "move" else op["path"]
+            story = apply_patch(story, [{"op": "test", "path": where, "value": old}, op])
+            continue
+        if kind == "add":
+            parent = _lookup(story, op["path"].rpartition("/")[0])
+            if isinstance(parent, dict) and _lookup(story, op["path"]) is not _MISSING:
+                raise JsonPatchError(f"{op['path']!r} was added since the suggestion was built.")
+            anchor = op.get("anchor")
+            if anchor is not None and not json_equal(_list_neighbours(story, op["path"]), anchor):
+                raise JsonPatchError(f"The items around {op['path']!r} changed since the suggestion was built.")
+        story = apply_patch(story, [op])
+    return story
+
+# Applies the suggestion
+def apply_suggestion(current_story: Story, suggestion: Dict[str, Any], *, in_place: bool = False,
+                     warn: Optional[Callable[[str], None]] = None) -> Story:
+    """
+    Safely apply a suggestion produced by build_suggestion() by applying its
+    patch to current_story. If current_story has drifted from the
+    suggestion's base, a full suggestion is three-way merged (conflicting
+    fields keep the user's value; merge_suggestion() lists them) and a
+    compact one is applied op by op, each op checking the old value it
+    recorded. A patch that no longer fits raises ValueError instead of
+    overwriting the user's edits. Copy-on-write by default: the result
+    shares unchanged fields with current_story (treat both as read-only or
+    copy). in_place=True patches current_story itself. `warn` receives
+    drift and conflict messages.
+    """
     after = suggestion.get("after")
-    if not isinstance(after, dict):
+    compact = "base_hash" in suggestion
+    if compact and not isinstance(suggestion.get("diff"), list):
+        raise ValueError("Invalid suggestion: compact suggestion without a 'diff'.")
+    if not compact and not isinstance(after, dict):
         raise ValueError("Invalid suggestion: missing or non-dict 'after' field.")
 
-    # Return a copy to avoid accidental in-place mutation by callers
-    return deepcopy(after)
+    # Drift check: user may have edited since suggestion was created
+    before = suggestion.get("before")
+    if compact:
+        drifted = _sha(current_story) != suggestion["base_hash"]
+    else:
+        drifted = before is not None and before != current_story
+    if drifted and warn:
+        warn("⚠️ Warning: The current story differs from the suggestion's 'before' state.")
+
+    if drifted and isinstance(before, dict):
+        from three_way_merge import merge3  # imports this module
+        result = merge3(before, current_story, after)
+        if result["conflicts"] and warn:
+            paths = ", ".join(c["path"] or "/" for c in result["conflicts"])
+            warn(f"⚠️ Kept your edits where they conflict with the suggestion: {paths}")
+        story = result["merged"]
+    elif "diff" not in suggestion:
+        return deepcopy(after)
+    else:
+        try:
+            if drifted:
+                story = _apply_checked(current_story, suggestion["diff"])
+            else:
+                return apply_patch(current_story, suggestion["diff"], in_place=in_place)
+        except JsonPatchError as e:
+            raise ValueError(f"Suggestion does not apply to the current story: {e}") from e
+
+    if in_place and story is not current_story:
+        current_story.clear()
+        current_story.update(story)
+        return current_story
+    return story
 
 # sanity check
 if __name__ == "__main__":
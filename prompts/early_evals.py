@@ -1,8 +1,14 @@
 # early_evals.py (non-Gherkin, testable bullets)
 
-from typing import Any, Dict, List, Tuple, TypedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypedDict
 from copy import deepcopy
+from dataclasses import dataclass, field
+import hashlib
 import re
+import time
+
+from lexicon_matcher import LexiconMatcher, lead_word_entry
+from near_duplicates import near_duplicate_pairs
 
 Story = Dict[str, Any]
 
@@ -13,23 +19,31 @@ MIN_DESC_LEN = 20
 SP_MIN, SP_MAX = 1, 13
 VERB_RATIO_TARGET = 0.5        # at least 50% of AC start with a verb
 MEASURABLE_RATIO_TARGET = 1 / 3  # at least ~1/3 are measurable
+NEAR_DUP_THRESHOLD = 0.6       # shingle Jaccard at which two AC count as restating each other
 REQUIRED_TAGS = {"chatgpt", "ai-story-gen"}  # lint-only; auto-added to proposed_fix
+REQUIRED_FIELDS = ["title", "description", "acceptance_criteria", "story_points", "tags"]
+
+# Lexicons for the AC bullet heuristics, matched in one pass per bullet by a
+# shared LexiconMatcher. Entries are regexes written in lowercase; change them
+# with configure_lexicons() so the compiled matcher is rebuilt.
 
 # Heuristics for “vague” language that harms testability
-_VAGUE_REGEXES = [
-    re.compile(r"\b(maybe|should|could|might|ideally|nice to have)\b", re.I),
-    re.compile(r"\b(etc\.?|and so on)\b", re.I),
-    re.compile(r"\b(user-friendly|intuitive|fast|optimi[sz]e|robust|scalable)\b", re.I),
+_VAGUE_PATTERNS = [
+    r"\b(maybe|should|could|might|ideally|nice to have)\b",
+    r"\b(etc\.?|and so on)\b",
+    r"\b(user-friendly|intuitive|fast|optimi[sz]e|robust|scalable)\b",
 ]
 
 # Weak signals that a bullet is measurable/specific (not required, just boosts confidence)
-_MEASURABLE_REGEXES = [
-    re.compile(r"\bwithin\s+\d+\s*(ms|s|sec|seconds|minutes|min|hours|days)\b", re.I),
-    re.compile(r"\b(at\s+least|no\s+more\s+than|up\s+to|fewer\s+than|less\s+than)\s+\d+", re.I),
-    re.compile(r"\b\d+\s*(errors|items|retries|attempts|characters|fields|records|results)\b", re.I),
-    re.compile(r"\b(returns|displays|sends|logs|stores|validates|rejects|applies)\b", re.I),  # concrete verb
+_MEASURABLE_PATTERNS = [
+    r"\bwithin\s+\d+\s*(ms|s|sec|seconds|minutes|min|hours|days)\b",
+    r"\b(at\s+least|no\s+more\s+than|up\s+to|fewer\s+than|less\s+than)\s+\d+",
+    r"\b\d+\s*(errors|items|retries|attempts|characters|fields|records|results)\b",
+    r"\b(returns|displays|sends|logs|stores|validates|rejects|applies)\b",  # concrete verb
 ]
 
+_WS_RX = re.compile(r"\s+")
+
 # Acceptable starting verbs (customize for your org)
 _START_VERBS = [
     "allow", "prevent", "display", "show", "hide", "return", "send", "log", "store",
@@ -38,6 +52,63 @@ _START_VERBS = [
 ]
 
 
+def _build_bullet_matcher() -> LexiconMatcher:
+    return LexiconMatcher({
+        # crude “verb-ish” check on the first word
+        "start_verb": [lead_word_entry(_START_VERBS)],
+        "vague": _VAGUE_PATTERNS,
+        "measurable": _MEASURABLE_PATTERNS,
+    })
+
+
+_BULLET_MATCHER = _build_bullet_matcher()
+
+
+def configure_lexicons(
+    vague: Optional[List[str]] = None,
+    measurable: Optional[List[str]] = None,
+    start_verbs: Optional[List[str]] = None,
+) -> None:
+    """Replace any of the bullet lexicons (lowercase regex entries / verbs) and rebuild the matcher."""
+    global _VAGUE_PATTERNS, _MEASURABLE_PATTERNS, _START_VERBS, _BULLET_MATCHER
+    if vague is not None:
+        _VAGUE_PATTERNS = list(vague)
+    if measurable is not None:
+        _MEASURABLE_PATTERNS = list(measurable)
+    if start_verbs is not None:
+        _START_VERBS = list(start_verbs)
+    _BULLET_MATCHER = _build_bullet_matcher()
+    _bump_config_version()
+
+
+# Bumped by configure_lexicons/register_rule/unregister_rule so rules_fingerprint
+# only rehashes after a change (the scalar tunables are compared by value)
+_config_version = 0
+_fingerprint_memo: Tuple[Any, str] = (None, "")
+
+
+def _bump_config_version() -> None:
+    global _config_version
+    _config_version += 1
+
+
+def rules_fingerprint() -> str:
+    """Short hash of the current tunables, lexicons and rule registry; changes whenever results could."""
+    global _fingerprint_memo
+    token = (_config_version, MIN_TITLE_LEN, MAX_TITLE_LEN, MIN_DESC_LEN, SP_MIN, SP_MAX, VERB_RATIO_TARGET,
+             MEASURABLE_RATIO_TARGET, NEAR_DUP_THRESHOLD, frozenset(REQUIRED_TAGS), tuple(REQUIRED_FIELDS))
+    if _fingerprint_memo[0] == token:
+        return _fingerprint_memo[1]
+    rules = [(r.prefix, r.func.__module__, r.func.__qualname__, r.fields, sorted(r.weights.items()),
+              r.weight, r.severity) for r in _RULES.values()]
+    config = (MIN_TITLE_LEN, MAX_TITLE_LEN, MIN_DESC_LEN, SP_MIN, SP_MAX, VERB_RATIO_TARGET,
+              MEASURABLE_RATIO_TARGET, NEAR_DUP_THRESHOLD, sorted(REQUIRED_TAGS), REQUIRED_FIELDS,
+              _VAGUE_PATTERNS, _MEASURABLE_PATTERNS, _START_VERBS, rules)
+    fingerprint = hashlib.sha256(repr(config).encode("utf-8")).hexdigest()[:12]
+    _fingerprint_memo = (token, fingerprint)
+    return fingerprint
+
+
 def _is_str(x) -> bool:
     return isinstance(x, str) and bool(x.strip())
 
@@ -46,7 +117,7 @@ def _dedupe_preserve_order(items: List[str]) -> List[str]:
     seen = set()
     out = []
     for it in items:
-        key = re.sub(r"\s+", " ", it.strip().lower())
+        key = _WS_RX.sub(" ", it.strip().lower())
         if key not in seen:
             seen.add(key)
             out.append(it)
@@ -54,26 +125,19 @@ def _dedupe_preserve_order(items: List[str]) -> List[str]:
 
 
 def _score_weight(points: List[Tuple[bool, int]]) -> int:
-    if not points:
-        return 0
     total = sum(w for _, w in points)
+    if not total:
+        return 0  # nothing scored (or every weight overridden to 0)
     got = sum(w for ok, w in points if ok)
     return int(round((got / total) * 100))
 
 
-def _starts_with_verb(text: str) -> bool:
-    first = text.strip().split()[:1]
-    if not first:
-        return False
-    return first[0].lower().rstrip("s") in _START_VERBS  # crude “verb-ish” check
+BulletFlags = Tuple[bool, bool, bool]  # (starts_with_verb, vague, measurable)
 
 
-def _has_vague_language(text: str) -> bool:
-    return any(rx.search(text) for rx in _VAGUE_REGEXES)
-
-
-def _is_measurable(text: str) -> bool:
-    return any(rx.search(text) for rx in _MEASURABLE_REGEXES)
+def _bullet_flags(text: str) -> BulletFlags:
+    hits = _BULLET_MATCHER.scan(text)
+    return bool(hits["start_verb"]), bool(hits["vague"]), bool(hits["measurable"])
 
 
 class EvalFinding(TypedDict):
@@ -89,59 +153,182 @@ class EvalResult(TypedDict):
     proposed_fix: Story
 
 
-def early_evals(story: Story) -> EvalResult:
+# --- Rule registry ---
+# Each rule is an independent unit emitting findings whose ids start with its
+# prefix ("title" -> "title.type", "title.length", ...); a finding belongs to
+# the longest registered prefix, so "ac.near_duplicates" can be its own rule
+# next to "ac". Built-in rules are the sections below; org rules are added
+# with @register_rule without forking early_evals. Per-project enable/disable
+# and overrides go through RuleConfig.
+
+RuleFunc = Callable[[Story, Story, List[EvalFinding], Callable[[str], BulletFlags]], None]
+
+
+@dataclass
+class Rule:
+    prefix: str                 # finding-id prefix, e.g. "ac" for "ac.*"
+    func: RuleFunc              # (story, fixed, findings, bullet_flags) -> None
+    fields: Tuple[str, ...]     # top-level story fields the rule reads (for incremental re-runs)
+    weights: Dict[str, int] = field(default_factory=dict)  # finding id -> score weight; unlisted = lint-only
+    weight: float = 1.0         # multiplier applied to all of the rule's weights
+    severity: Optional[str] = None  # if set, severity of the rule's failing findings
+
+
+@dataclass
+class RuleConfig:
+    """
+    Per-project rule selection: disable prefixes, override weight/severity.
+    Keys are namespaces: "ac" also covers "ac.near_duplicates", unless that
+    rule has an entry of its own (the most specific key wins).
+    """
+    disabled: Set[str] = field(default_factory=set)
+    weights: Dict[str, float] = field(default_factory=dict)  # prefix -> weight multiplier
+    severities: Dict[str, str] = field(default_factory=dict)  # prefix -> failing severity
+
+
+class RuleProfiler:
+    """Profiling hook: pass to early_evals(profiler=...) to collect per-rule call counts and wall time."""
+
+    def __init__(self) -> None:
+        self.calls: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+
+    def record(self, prefix: str, elapsed: float) -> None:
+        self.calls[prefix] = self.calls.get(prefix, 0) + 1
+        self.seconds[prefix] = self.seconds.get(prefix, 0.0) + elapsed
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Rules sorted by total wall time, slowest first."""
+        rows = [{"rule": p, "calls": self.calls[p], "total_ms": round(self.seconds[p] * 1000, 3),
+                 "mean_us": round(self.seconds[p] / self.calls[p] * 1e6, 2)} for p in self.calls]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+
+_RULES: Dict[str, Rule] = {}  # prefix -> rule, in report order
+
+
+def register_rule(prefix: str, *, fields: Tuple[str, ...], weights: Optional[Dict[str, int]] = None,
+                  weight: float = 1.0, severity: Optional[str] = None) -> Callable[[RuleFunc], RuleFunc]:
+    """Decorator adding (or replacing) the rule for `prefix`; new rules run after the built-ins."""
+    def deco(func: RuleFunc) -> RuleFunc:
+        _RULES[prefix] = Rule(prefix, func, tuple(fields), dict(weights or {}), weight, severity)
+        _bump_config_version()
+        return func
+    return deco
+
+
+def unregister_rule(prefix: str) -> None:
+    _RULES.pop(prefix, None)
+    _bump_config_version()
+
+
+def list_rules() -> List[Rule]:
+    return list(_RULES.values())
+
+
+def _active_rules(config: Optional[RuleConfig]) -> List[Tuple[Rule, float, Optional[str]]]:
+    """(rule, weight multiplier, failing severity) for every enabled rule."""
+    if config is None:
+        return [(r, r.weight, r.severity) for r in _RULES.values()]
+    return [(r, _namespace_get(config.weights, r.prefix, r.weight),
+             _namespace_get(config.severities, r.prefix, r.severity))
+            for r in _RULES.values() if not _in_namespace(r.prefix, config.disabled)]
+
+
+def _namespaces(prefix: str) -> Iterator[str]:
+    """'ac.near_duplicates' -> 'ac.near_duplicates', 'ac' (most specific first)."""
+    while True:
+        yield prefix
+        if "." not in prefix:
+            return
+        prefix = prefix.rsplit(".", 1)[0]
+
+
+def _in_namespace(prefix: str, keys: Set[str]) -> bool:
+    return any(ns in keys for ns in _namespaces(prefix))
+
+
+def _namespace_get(mapping: Dict[str, Any], prefix: str, default: Any) -> Any:
+    for ns in _namespaces(prefix):
+        if ns in mapping:
+            return mapping[ns]
+    return default
+
+
+def early_evals(story: Story, *, config: Optional[RuleConfig] = None,
+                profiler: Optional[RuleProfiler] = None) -> EvalResult:
     """
     Fast, dependency-free lint/validation for a generated/refined story
     using plain, testable bullet acceptance criteria (non-Gherkin).
-    """
-    findings: List[EvalFinding] = []
-    weights: List[Tuple[bool, int]] = []
-    fixed: Story = deepcopy(story)
 
-    # ---- 1) Structure & types ----
-    required_fields = ["title", "description", "acceptance_criteria", "story_points", "tags"]
-    for k in required_fields:
+    proposed_fix is copy-on-write: a shallow dict in which only the fields
+    that quick fixes change are new objects; every other value is the
+    original story's (see quick_fix_changes / apply_quick_fixes(copy=True)).
+
+    config selects/overrides rules per project; profiler collects per-rule timing.
+    """
+    active = _active_rules(config)
+    return _evaluate(story, dict(story), _bullet_flags, active, _weight_of(active), profiler)
+
+
+# ---- 1) Structure & types ----
+@register_rule("struct", fields=tuple(REQUIRED_FIELDS), weights={
+    "struct.has_title": 10, "struct.has_description": 6, "struct.has_acceptance_criteria": 10,
+    "struct.has_story_points": 6, "struct.has_tags": 6,
+})
+def _eval_struct(story: Story, fixed: Story, findings: List[EvalFinding],
+                 bullet_flags: Callable[[str], BulletFlags]) -> None:
+    for k in REQUIRED_FIELDS:
         ok = k in story
         findings.append({"id": f"struct.has_{k}", "ok": ok, "severity": "error" if not ok else "info",
                          "msg": f"{'Missing' if not ok else 'Present'}: {k}"})
-        weights.append((ok, 10 if k in ("title", "acceptance_criteria") else 6))
 
-    # ---- 2) Title ----
+
+# ---- 2) Title ----
+@register_rule("title", fields=("title",), weights={"title.type": 6, "title.length": 5})
+def _eval_title(story: Story, fixed: Story, findings: List[EvalFinding],
+                bullet_flags: Callable[[str], BulletFlags]) -> None:
     title = story.get("title")
     ok_title_type = isinstance(title, str)
     findings.append({"id": "title.type", "ok": ok_title_type, "severity": "error", "msg": "Title must be a string."})
-    weights.append((ok_title_type, 6))
     if ok_title_type:
         t = title.strip()
         ok_len = MIN_TITLE_LEN <= len(t) <= MAX_TITLE_LEN
         findings.append({"id": "title.length", "ok": ok_len, "severity": "warn" if not ok_len else "info",
                          "msg": f"Title length {len(t)} (expected {MIN_TITLE_LEN}..{MAX_TITLE_LEN})."})
-        weights.append((ok_len, 5))
         if t != title:
             fixed["title"] = t
 
-    # ---- 3) Description ----
+
+# ---- 3) Description ----
+@register_rule("desc", fields=("description",), weights={"desc.type": 6, "desc.length": 5})
+def _eval_desc(story: Story, fixed: Story, findings: List[EvalFinding],
+               bullet_flags: Callable[[str], BulletFlags]) -> None:
     desc = story.get("description")
     ok_desc_type = isinstance(desc, str)
     findings.append({"id": "desc.type", "ok": ok_desc_type, "severity": "error", "msg": "Description must be a string."})
-    weights.append((ok_desc_type, 6))
     if ok_desc_type:
         d = desc.strip()
         ok_len = len(d) >= MIN_DESC_LEN
         findings.append({"id": "desc.length", "ok": ok_len, "severity": "warn" if not ok_len else "info",
                          "msg": f"Description length {len(d)} (expected >= {MIN_DESC_LEN})."})
-        weights.append((ok_len, 5))
         if d != desc:
             fixed["description"] = d
 
-    # ---- 4) Acceptance Criteria (plain bullets) ----
+
+# ---- 4) Acceptance Criteria (plain bullets) ----
+@register_rule("ac", fields=("acceptance_criteria",), weights={
+    "ac.type": 10, "ac.non_empty": 8, "ac.duplicates": 3,
+    "ac.starts_with_verb_ratio": 6, "ac.vague_ratio": 5, "ac.measurable_ratio": 4,
+})
+def _eval_ac(story: Story, fixed: Story, findings: List[EvalFinding],
+             bullet_flags: Callable[[str], BulletFlags]) -> None:
     ac = story.get("acceptance_criteria")
 
     if isinstance(ac, list):
         ok_ac_type = all(isinstance(x, str) for x in ac)
         findings.append({"id": "ac.type", "ok": ok_ac_type, "severity": "error",
                         "msg": "Acceptance criteria must be a list of strings."})
-        weights.append((ok_ac_type, 10))
 
         if ok_ac_type:
             ac_list: List[str] = [x for x in ac if isinstance(x, str)]
@@ -150,7 +337,6 @@ def early_evals(story: Story) -> EvalResult:
             findings.append({"id": "ac.non_empty", "ok": ok_non_empty,
                             "severity": "error" if not ok_non_empty else "info",
                             "msg": "At least one acceptance criterion required."})
-            weights.append((ok_non_empty, 8))
 
             # Dedupe
             uniq = _dedupe_preserve_order(trimmed)
@@ -158,40 +344,60 @@ def early_evals(story: Story) -> EvalResult:
             findings.append({"id": "ac.duplicates", "ok": removed == 0,
                             "severity": "warn" if removed else "info",
                             "msg": f"{'Removed ' + str(removed) if removed else 'No'} duplicate AC."})
-            weights.append((removed == 0, 3))
 
             # Bullet quality heuristics
-            starts_ok_count = sum(_starts_with_verb(x) for x in uniq)
-            vague_count = sum(_has_vague_language(x) for x in uniq)
-            measurable_count = sum(_is_measurable(x) for x in uniq)
+            starts_ok_count = vague_count = measurable_count = 0
+            for x in uniq:
+                starts, vague, measurable = bullet_flags(x)
+                starts_ok_count += starts
+                vague_count += vague
+                measurable_count += measurable
 
             ok_starts = starts_ok_count >= max(1, int(len(uniq) * VERB_RATIO_TARGET))
             findings.append({"id": "ac.starts_with_verb_ratio", "ok": ok_starts,
                             "severity": "warn" if not ok_starts else "info",
                             "msg": f"{starts_ok_count}/{len(uniq)} AC start with an actionable verb."})
-            weights.append((ok_starts, 6))
 
             ok_vague = (vague_count == 0) or (vague_count <= len(uniq) // 4)
             findings.append({"id": "ac.vague_ratio", "ok": ok_vague,
                             "severity": "warn" if not ok_vague else "info",
                             "msg": f"{vague_count}/{len(uniq)} AC contain vague terms (aim for 0)."})
-            weights.append((ok_vague, 5))
 
             ok_measurable = measurable_count >= max(1, int(len(uniq) * MEASURABLE_RATIO_TARGET))
             findings.append({"id": "ac.measurable_ratio", "ok": ok_measurable,
                             "severity": "warn" if not ok_measurable else "info",
                             "msg": f"{measurable_count}/{len(uniq)} AC show measurable specifics."})
-            weights.append((ok_measurable, 4))
 
-            fixed["acceptance_criteria"] = uniq
+            if uniq != ac:
+                fixed["acceptance_criteria"] = uniq
     else:
         # Not a list at all (or missing)
         findings.append({"id": "ac.type", "ok": False, "severity": "error",
                         "msg": "Acceptance criteria must be a list of strings."})
-        weights.append((False, 10))
 
 
-    # ---- 5) Definition of Done (optional) ----
+# ---- 4b) Near-duplicate AC (lint-only) ----
+@register_rule("ac.near_duplicates", fields=("acceptance_criteria",))
+def _eval_ac_near_duplicates(story: Story, fixed: Story, findings: List[EvalFinding],
+                             bullet_flags: Callable[[str], BulletFlags]) -> None:
+    ac = story.get("acceptance_criteria")
+    if not isinstance(ac, list) or not all(isinstance(x, str) for x in ac):
+        return  # ac.type already reports it
+
+    # Same bullets as proposed_fix after exact dedupe; numbers refer to that list
+    uniq = _dedupe_preserve_order([a.strip().rstrip(".") for a in ac])
+    pairs = near_duplicate_pairs(uniq, NEAR_DUP_THRESHOLD)
+    listed = ", ".join(f"#{i + 1}/#{j + 1} ({sim:.0%})" for i, j, sim in pairs[:5])
+    findings.append({"id": "ac.near_duplicates", "ok": not pairs,
+                    "severity": "warn" if pairs else "info",
+                    "msg": f"Near-duplicate AC (reword or merge): {listed}." if pairs
+                    else "No near-duplicate AC."})
+
+
+# ---- 5) Definition of Done (optional) ----
+@register_rule("dod", fields=("definition_of_done",), weights={"dod.type": 3, "dod.present": 3})
+def _eval_dod(story: Story, fixed: Story, findings: List[EvalFinding],
+              bullet_flags: Callable[[str], BulletFlags]) -> None:
     dod = story.get("definition_of_done")
     if isinstance(dod, list):
         ok_dod_type = all(isinstance(x, str) and x.strip() for x in dod)
@@ -201,9 +407,10 @@ def early_evals(story: Story) -> EvalResult:
             "severity": "warn" if not ok_dod_type else "info",
             "msg": "Definition of Done should be a non-empty list of strings."
         })
-        weights.append((ok_dod_type, 3))
         if ok_dod_type:
-            fixed["definition_of_done"] = [x.strip().rstrip(".") for x in dod]
+            cleaned = [x.strip().rstrip(".") for x in dod]
+            if cleaned != dod:
+                fixed["definition_of_done"] = cleaned
     elif dod is None:
         findings.append({
             "id": "dod.present",
@@ -211,7 +418,6 @@ def early_evals(story: Story) -> EvalResult:
             "severity": "warn",
             "msg": "Definition of Done missing (recommended)."
         })
-        weights.append((False, 3))
     else:
         findings.append({
             "id": "dod.type",
@@ -219,20 +425,26 @@ def early_evals(story: Story) -> EvalResult:
             "severity": "warn",
             "msg": "Definition of Done should be a list of strings."
         })
-        weights.append((False, 3))
 
-    # ---- 6) Story points ----
+
+# ---- 6) Story points ----
+@register_rule("sp", fields=("story_points",), weights={"sp.type": 6, "sp.range": 4})
+def _eval_sp(story: Story, fixed: Story, findings: List[EvalFinding],
+             bullet_flags: Callable[[str], BulletFlags]) -> None:
     sp = story.get("story_points")
     ok_sp_type = isinstance(sp, int)
     findings.append({"id": "sp.type", "ok": ok_sp_type, "severity": "error", "msg": "Story points must be an integer."})
-    weights.append((ok_sp_type, 6))
     if ok_sp_type:
         ok_sp_range = SP_MIN <= sp <= SP_MAX
         findings.append({"id": "sp.range", "ok": ok_sp_range, "severity": "warn" if not ok_sp_range else "info",
                          "msg": f"Story points should be between {SP_MIN} and {SP_MAX}."})
-        weights.append((ok_sp_range, 4))
 
-    # ---- 7) Tags ----
+
+# ---- 7) Tags ----
+# tags.required / tags.normalized are lint-only (unweighted)
+@register_rule("tags", fields=("tags",), weights={"tags.type": 5})
+def _eval_tags(story: Story, fixed: Story, findings: List[EvalFinding],
+               bullet_flags: Callable[[str], BulletFlags]) -> None:
     tags = story.get("tags")
     if isinstance(tags, list):
         ok_tags_type = all(isinstance(t, str) for t in tags)
@@ -242,11 +454,10 @@ def early_evals(story: Story) -> EvalResult:
             "severity": "error",
             "msg": "Tags must be a list of strings."
         })
-        weights.append((ok_tags_type, 5))
 
         if ok_tags_type:
             tags_list: List[str] = [t for t in tags if isinstance(t, str)]
-            norm = [re.sub(r"\s+", "-", t.strip().lower()) for t in tags_list if t.strip()]
+            norm = [_WS_RX.sub("-", t.strip().lower()) for t in tags_list if t.strip()]
             # simple dedupe
             seen, norm_dedup = set(), []
             for t in norm:
@@ -281,6 +492,7 @@ def early_evals(story: Story) -> EvalResult:
                     "severity": "info",
                     "msg": f"Normalized/deduped tags: {norm_dedup}"
                 })
+                fixed["tags"] = norm_dedup
             else:
                 findings.append({
                     "id": "tags.normalized",
@@ -288,7 +500,6 @@ def early_evals(story: Story) -> EvalResult:
                     "severity": "info",
                     "msg": "Tags look good."
                 })
-            fixed["tags"] = norm_dedup
     else:
         findings.append({
             "id": "tags.type",
@@ -296,10 +507,30 @@ def early_evals(story: Story) -> EvalResult:
             "severity": "error",
             "msg": "Tags must be a list of strings."
         })
-        weights.append((False, 5))
 
-    # ---- Final score & ok ----
-    score = _score_weight(weights)
+def _run_rule(rule: Rule, severity: Optional[str], story: Story, fixed: Story,
+              findings: List[EvalFinding], bullet_flags: Callable[[str], BulletFlags],
+              profiler: Optional[RuleProfiler]) -> None:
+    start = len(findings)
+    if profiler is None:
+        rule.func(story, fixed, findings, bullet_flags)
+    else:
+        t0 = time.perf_counter()
+        rule.func(story, fixed, findings, bullet_flags)
+        profiler.record(rule.prefix, time.perf_counter() - t0)
+    if severity is not None:
+        for f in findings[start:]:
+            if not f["ok"]:
+                f["severity"] = severity
+
+
+def _weight_of(active: List[Tuple[Rule, float, Optional[str]]]) -> Dict[str, float]:
+    """Scored finding id -> effective weight (rule weight times its config multiplier)."""
+    return {fid: w * mult for rule, mult, _ in active for fid, w in rule.weights.items()}
+
+
+def _finalize(findings: List[EvalFinding], fixed: Story, weight_of: Dict[str, float]) -> EvalResult:
+    score = _score_weight([(f["ok"], weight_of[f["id"]]) for f in findings if f["id"] in weight_of])
     ok = all(f["ok"] for f in findings if f["severity"] == "error")
 
     return {
@@ -310,17 +541,129 @@ def early_evals(story: Story) -> EvalResult:
     }
 
 
-def apply_quick_fixes(story: Story, result: EvalResult) -> Story:
+def _evaluate(story: Story, fixed: Story, bullet_flags: Callable[[str], BulletFlags],
+              active: List[Tuple[Rule, float, Optional[str]]], weight_of: Dict[str, float],
+              profiler: Optional[RuleProfiler] = None) -> EvalResult:
+    """
+    Shared body of early_evals/early_evals_many. `fixed` is the caller's
+    copy of `story` (becomes proposed_fix); `bullet_flags` classifies one
+    trimmed AC bullet as (starts_with_verb, vague, measurable); `active` and
+    `weight_of` come from _active_rules/_weight_of for the run's config.
+    """
+    findings: List[EvalFinding] = []
+    for rule, _, severity in active:
+        _run_rule(rule, severity, story, fixed, findings, bullet_flags, profiler)
+    return _finalize(findings, fixed, weight_of)
+
+
+def _rule_prefix(finding_id: str) -> str:
+    """Prefix of the registered rule owning a finding: the longest dotted prefix that is registered."""
+    prefix = finding_id
+    while prefix not in _RULES and "." in prefix:
+        prefix = prefix.rsplit(".", 1)[0]
+    return prefix
+
+
+def _top_level_field(path: str) -> Optional[str]:
+    """'/acceptance_criteria/2' -> 'acceptance_criteria'; root paths -> None."""
+    head = path.lstrip("/").split("/", 1)[0]
+    return head.replace("~1", "/").replace("~0", "~") or None
+
+
+def early_evals_incremental(story: Story, prior: EvalResult, diff: List[Dict[str, Any]], *,
+                            config: Optional[RuleConfig] = None,
+                            profiler: Optional[RuleProfiler] = None) -> EvalResult:
+    """
+    Re-evaluate `story` after an edit described by `diff` (the op list from
+    build_suggestion's _diff_dict, prior story -> `story`), reusing `prior`.
+
+    Only the rules reading a touched top-level field are re-run; the rest of
+    the findings are carried over and the score is recombined with
+    _score_weight. Equal to early_evals(story) as long as `prior` was computed
+    for the diff's 'before' story with the same config.
+    """
+    touched = set()
+    for op in diff:
+        paths = [op.get("path", "")] + ([op["from"]] if "from" in op else [])  # moves touch both ends
+        for path in paths:
+            field = _top_level_field(path)
+            if field is None:  # whole-story replace
+                return early_evals(story, config=config, profiler=profiler)
+            touched.add(field)
+    if not touched:
+        return prior
+
+    fixed: Story = dict(prior["proposed_fix"])
+    for field in touched:
+        if field in story:
+            fixed[field] = story[field]
+        else:
+            fixed.pop(field, None)
+
+    carried: Dict[str, List[EvalFinding]] = {}
+    for f in prior["findings"]:
+        carried.setdefault(_rule_prefix(f["id"]), []).append(f)
+
+    findings: List[EvalFinding] = []
+    active = _active_rules(config)
+    for rule, _, severity in active:
+        if touched.intersection(rule.fields):
+            _run_rule(rule, severity, story, fixed, findings, _bullet_flags, profiler)
+        else:
+            findings.extend(dict(f) for f in carried.get(rule.prefix, []))
+    return _finalize(findings, fixed, _weight_of(active))
+
+
+QUICK_FIX_FIELDS = ("title", "description", "acceptance_criteria", "definition_of_done", "tags")
+
+
+def quick_fix_changes(story: Story, result: EvalResult) -> Story:
+    """Only the fields proposed_fix actually changes (new objects), keyed by field."""
+    fixed = result.get("proposed_fix", {})
+    # Identity first: sections only assign fields they change, so this is O(1) per field
+    return {k: fixed[k] for k in QUICK_FIX_FIELDS
+            if k in fixed and fixed[k] is not story.get(k) and fixed[k] != story.get(k)}
+
+
+def apply_quick_fixes(story: Story, result: EvalResult, *, copy: bool = False) -> Story:
     """
     Merge normalized fields from proposed_fix back to the story.
     Safe for a UI 'Apply quick fixes' button.
+
+    Returns a new top-level dict; unchanged values are shared with `story`
+    unless copy=True, which returns a fully independent deep copy.
     """
-    fixed = result.get("proposed_fix", {})
-    out = deepcopy(story)
-    for key in ("title", "description", "acceptance_criteria", "definition_of_done", "tags"):
-        if key in fixed:
-            out[key] = fixed[key]
-    return out
+    out = {**story, **quick_fix_changes(story, result)}
+    return deepcopy(out) if copy else out
+
+
+# --- Batch mode (nightly backlog lint) ---
+
+def early_evals_many(stories: Iterable[Story], *, config: Optional[RuleConfig] = None,
+                     profiler: Optional[RuleProfiler] = None) -> List[EvalResult]:
+    """
+    Batch variant of early_evals for whole-backlog runs. Returns one EvalResult
+    per story, in input order, identical to calling early_evals on each.
+
+    The rule list and weights are resolved once for the batch, and each
+    distinct bullet is scanned once by the shared lexicon matcher, however
+    many stories repeat it.
+    """
+    stories = list(stories)
+    bullets: List[str] = []
+    for story in stories:
+        ac = story.get("acceptance_criteria")
+        if isinstance(ac, list):
+            bullets.extend(a.strip().rstrip(".") for a in ac if _is_str(a))
+    flags = {b: _bullet_flags(b) for b in dict.fromkeys(bullets)}
+
+    def lookup(text: str) -> BulletFlags:
+        hit = flags.get(text)
+        return hit if hit is not None else _bullet_flags(text)
+
+    active = _active_rules(config)
+    weight_of = _weight_of(active)
+    return [_evaluate(story, dict(story), lookup, active, weight_of, profiler) for story in stories]
 
 
 # --- sanity test ---
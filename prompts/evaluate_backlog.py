@@ -0,0 +1,130 @@
+# evaluate_backlog.py
+# Command-line audit of a JSONL backlog: early_evals + apply_quick_fixes +
+# estimate_points_v1 for every story, fanned out over all cores.
+#
+# Usage:
+#   python evaluate_backlog.py backlog.jsonl -o results.jsonl [--workers N] [--chunk-size N]
+#
+# Output is JSONL in input order, one record per input line:
+#   {"line": 1, "id": ..., "eval": EvalResult, "fixed": Story, "estimate": EstimationResult | null}
+# Lines that are not a JSON object produce {"line": n, "error": "..."}.
+
+import argparse
+import json
+import os
+import sys
+from multiprocessing import Pool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from early_evals import Story, apply_quick_fixes, early_evals_many
+from story_point_estimator import EstimationResult, Story as EstimatorStory, estimate_points_v1
+
+DEFAULT_CHUNK_SIZE = 256  # stories per task; large enough that IPC is noise next to evaluation
+
+Chunk = List[Tuple[int, str]]  # (1-based line number, raw JSON line)
+
+
+def _estimate(story: Story) -> Optional[EstimationResult]:
+    """estimate_points_v1 on a story dict; None when the fields the estimator needs are malformed."""
+    title, desc, ac = story.get("title"), story.get("description"), story.get("acceptance_criteria")
+    if not (isinstance(title, str) and isinstance(desc, str) and isinstance(ac, list)
+            and all(isinstance(a, str) for a in ac)):
+        return None
+    return estimate_points_v1(EstimatorStory(
+        title=title, description=desc, acceptance_criteria=ac,
+        tags=story.get("tags") if isinstance(story.get("tags"), list) else None,
+        id=story.get("id"),
+    ))
+
+
+def evaluate_chunk(chunk: Chunk) -> List[str]:
+    """
+    Worker task: parse, evaluate and serialize one chunk. Raw lines go in and
+    JSON lines come out, so only strings cross the process boundary.
+    """
+    records: List[Tuple[Dict[str, Any], Optional[Story]]] = []
+    for line_no, raw in chunk:
+        try:
+            story = json.loads(raw)
+        except json.JSONDecodeError as e:
+            records.append(({"line": line_no, "error": f"invalid JSON: {e}"}, None))
+            continue
+        if not isinstance(story, dict):
+            records.append(({"line": line_no, "error": "expected a JSON object"}, None))
+            continue
+        records.append(({"line": line_no, "id": story.get("id")}, story))
+
+    results = iter(early_evals_many(story for _, story in records if story is not None))
+    for record, story in records:
+        if story is not None:
+            res = next(results)
+            fixed = apply_quick_fixes(story, res)
+            record.update({"eval": res, "fixed": fixed, "estimate": _estimate(fixed)})
+    return [json.dumps(record, ensure_ascii=False) for record, _ in records]
+
+
+def iter_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[Chunk]:
+    """Group non-blank lines into numbered chunks without reading the whole file."""
+    chunk: Chunk = []
+    for line_no, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        chunk.append((line_no, raw))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def evaluate_backlog(lines: Iterable[str], out: TextIO, *, workers: Optional[int] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Evaluate JSONL `lines` into `out` in input order; returns the number of records written."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    elif workers < 1:
+        raise ValueError("workers must be >= 1 (None for all cores).")
+    chunks = iter_chunks(lines, chunk_size)
+    if workers == 1:
+        return _write_rows(map(evaluate_chunk, chunks), out)
+    with Pool(processes=workers) as pool:
+        # imap keeps input order and pulls chunks lazily, so memory stays bounded
+        return _write_rows(pool.imap(evaluate_chunk, chunks), out)
+
+
+def _write_rows(results: Iterable[List[str]], out: TextIO) -> int:
+    written = 0
+    for rows in results:
+        out.writelines(row + "\n" for row in rows)
+        written += len(rows)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate a JSONL story backlog on all cores.")
+    parser.add_argument("input", help="JSONL file with one story object per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"stories per task (default: {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be >= 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be >= 1")
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        n = evaluate_backlog(src, dst, workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    print(f"Evaluated {n} records.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
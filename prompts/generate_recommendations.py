@@ -1,20 +1,27 @@
 import json
 from openai import OpenAI
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from copy import deepcopy
 
+from json_patch import JsonPatchError, apply_patch, clone_json, parse_pointer
+from llm_gateway import LLMGateway, get_gateway
+
 Recommendation = Dict[str, Any]
+RecommendationOutcome = Dict[str, Any]
 
-def generate_recommendations(
-    story: dict,
-    client: OpenAI,
-    model: str = "gpt-4o"
-) -> List[Recommendation]:
-    """
-    Generates a list of recommendations for improving the user story.
-    Returns a list of dictionaries, where each dict is a recommendation.
-    """
-    prompt = f"""You are an AI Product Partner helping a Product Owner improve a user story based on Agile best practices.
+# Fields a recommendation may set even if the story doesn't have them yet,
+# with the types refine_field asks the model for
+FIELD_TYPES = {
+    "title": "string",
+    "description": "string",
+    "acceptance_criteria": "string_list",
+    "tags": "string_list",
+    "dev_notes": "string",
+    "story_points": "points",
+}
+
+def _build_prompt(story: dict) -> str:
+    return f"""You are an AI Product Partner helping a Product Owner improve a user story based on Agile best practices.
     
     Analyze the following user story and provide concrete, actionable recommendations for improvement. Focus on making the story more "INVEST"-compliant and addressing potential gaps in clarity, scope, or testability.
     
@@ -42,6 +49,25 @@ def generate_recommendations(
       ]
     }}
     """
+
+def _parse_recommendations(output: str) -> List[Recommendation]:
+    try:
+        parsed = json.loads(output)
+        return parsed.get("recommendations", [])
+    except json.JSONDecodeError:
+        print("⚠️ Model did not return valid JSON for recommendations.")
+        return []
+
+def generate_recommendations(
+    story: dict,
+    client: OpenAI,
+    model: str = "gpt-4o"
+) -> List[Recommendation]:
+    """
+    Generates a list of recommendations for improving the user story.
+    Returns a list of dictionaries, where each dict is a recommendation.
+    """
+    prompt = _build_prompt(story)
     
     # Use chat.completions.create for a structured response.
     response = client.chat.completions.create(
@@ -51,12 +77,18 @@ def generate_recommendations(
     )
     
     output = response.choices[0].message.content
-    try:
-        parsed = json.loads(output)
-        return parsed.get("recommendations", [])
-    except json.JSONDecodeError:
-        print("⚠️ Model did not return valid JSON for recommendations.")
-        return []
+    return _parse_recommendations(output)
+
+async def generate_recommendations_async(
+    story: dict,
+    model: str = "gpt-4o",
+    gateway: Optional[LLMGateway] = None
+) -> List[Recommendation]:
+    """
+    Async generate_recommendations through the shared LLM gateway.
+    """
+    output = await (gateway or get_gateway()).complete(_build_prompt(story), model=model, temperature=0.7)
+    return _parse_recommendations(output)
 
 def apply_recommendation(story: dict, recommendation: Recommendation) -> dict:
     """
@@ -70,3 +102,93 @@ def apply_recommendation(story: dict, recommendation: Recommendation) -> dict:
             updated_story[key] = value
             
     return updated_story
+
+
+def _type_error(field: str, value: Any) -> Optional[str]:
+    kind = FIELD_TYPES.get(field)
+    if kind == "string" and not isinstance(value, str):
+        return f"'{field}' must be a string."
+    if kind == "string_list" and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+        return f"'{field}' must be a list of strings."
+    if kind == "points" and not (isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= 13):
+        return f"'{field}' must be an integer 1-13."
+    return None
+
+
+def _validate(story: dict, changes: Any) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    New value per field for one recommendation's 'changes' (a field map or a
+    JSON Patch op list), plus any validation errors.
+    """
+    if isinstance(changes, dict):
+        updates = dict(changes)
+    elif isinstance(changes, list):
+        try:
+            fields = {parse_pointer(op["path"])[0] for op in changes}
+            patched = apply_patch(story, changes)  # copy-on-write: cheap, leaves story as is
+        except (JsonPatchError, KeyError, IndexError, TypeError) as e:
+            return {}, [f"Patch does not apply: {e}"]
+        if not isinstance(patched, dict):
+            return {}, ["Patch must keep the story an object."]
+        updates = {f: patched[f] for f in fields if f in patched}
+        errors = [f"Removing '{f}' is not supported." for f in sorted(fields - patched.keys())]
+        if errors:
+            return {}, errors
+    else:
+        return {}, ["'changes' must be an object or a JSON Patch list."]
+
+    errors = []
+    for field, value in updates.items():
+        if field not in story and field not in FIELD_TYPES:
+            errors.append(f"Unknown field '{field}'.")
+            continue
+        err = _type_error(field, value)
+        if err:
+            errors.append(err)
+    return updates, errors
+
+
+def apply_recommendations(story: dict, recommendations: List[Recommendation]) -> Tuple[dict, List[RecommendationOutcome]]:
+    """
+    Applies several recommendations at once.
+
+    Every recommendation's 'changes' is validated first (known field, right
+    type; patches must apply). Valid recommendations that set the same field
+    to different values conflict, and none of them is applied. The rest are
+    applied together to one copy of the story, which shares unchanged fields
+    with `story`.
+
+    Returns (updated_story, report): one outcome per recommendation, in
+    order, with 'status' "applied" | "noop" | "conflict" | "invalid", the
+    'fields' it touches, 'errors' and 'conflicts_with' (indexes).
+    """
+    report: List[RecommendationOutcome] = []
+    updates: List[Dict[str, Any]] = []
+    for i, rec in enumerate(recommendations):
+        changes = rec.get("changes", {}) if isinstance(rec, dict) else None
+        fields, errors = _validate(story, changes) if changes is not None else ({}, ["Not a recommendation object."])
+        report.append({"index": i, "title": rec.get("title") if isinstance(rec, dict) else None,
+                       "status": "invalid" if errors else "applied", "fields": sorted(fields),
+                       "errors": errors, "conflicts_with": []})
+        updates.append({} if errors else fields)
+
+    # Field -> recommendations setting it; different values for one field conflict
+    by_field: Dict[str, List[int]] = {}
+    for i, fields in enumerate(updates):
+        for field in fields:
+            by_field.setdefault(field, []).append(i)
+    for field, idxs in by_field.items():
+        if len(idxs) > 1 and any(updates[j][field] != updates[idxs[0]][field] for j in idxs[1:]):
+            for i in idxs:
+                report[i]["status"] = "conflict"
+                report[i]["conflicts_with"] = sorted(set(report[i]["conflicts_with"]) | (set(idxs) - {i}))
+
+    updated = dict(story)
+    for outcome, fields in zip(report, updates):
+        if outcome["status"] != "applied":
+            continue
+        if all(f in story and story[f] == v for f, v in fields.items()):
+            outcome["status"] = "noop"
+        for field, value in fields.items():
+            updated[field] = clone_json(value)
+    return updated, report
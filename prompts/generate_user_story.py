@@ -1,10 +1,15 @@
 
-from openai import OpenAI
 import json
+from contextlib import aclosing, closing
+from typing import AsyncIterator, Iterable, Iterator, Optional, Tuple
 
-# IMPORTANT: Do not hardcode your API key in production code.
-# Use environment variables instead.
-client = OpenAI(api_key="...")  # or env var
+from llm_gateway import LLMGateway, chat_sync, get_gateway, stream_sync
+from prompt_budget import DEFAULT_SECTION_BUDGET, PromptBudget, Section, fit_sections
+from response_cache import DEFAULT_NAMESPACE
+from story_stream import StoryStreamParser, StreamEvent
+
+# The API key comes from the environment (OPENAI_API_KEY); clients are shared
+# through llm_gateway instead of being created here at import time.
 
 def pretty_print(output: str):
     """
@@ -17,25 +22,28 @@ def pretty_print(output: str):
     except Exception:
         return output.strip()
 
-def generate_user_story(
-    raw_input: str,
-    context: dict,
-    custom_prompt: str = "",
-    file_content: str = "",
-    kb_files_text: str = "",
-    model: str = "gpt-5"
-):
-    """
-    Turns raw input into a structured user story using project context.
-    The function handles both valid JSON and plain-text output from the model.
-    """
+# Budgeted prompt sections, most important first: the file uploaded for this
+# story, then the project description, then the general knowledge base.
+# Raw input and custom prompt are the user's own words and never trimmed.
+SECTION_PRIORITIES = {"file_content": 1, "project_description": 2, "kb_files_text": 3}
 
+def _build_instruction(raw_input: str, context: dict, custom_prompt: str, file_content: str,
+                       kb_files_text: str, token_budget: Optional[int] = DEFAULT_SECTION_BUDGET,
+                       model: str = "gpt-5") -> Tuple[str, PromptBudget]:
+    raw = {"file_content": file_content, "project_description": context.get("project_description"),
+           "kb_files_text": kb_files_text}
+    texts, budget = fit_sections(
+        [Section(name, text, SECTION_PRIORITIES[name]) for name, text in raw.items() if isinstance(text, str)],
+        token_budget, query=f"{raw_input}\n{custom_prompt}", model=model)
+    file_content = texts.get("file_content", file_content)
+    project_description = texts.get("project_description", raw["project_description"])
+    kb_files_text = texts.get("kb_files_text", kb_files_text)
     # The 'instruction' variable is a well-formatted prompt for the model.
-    instruction = f"""You are an expert AI product partner helping Agile Product Owners generate high-quality user stories and testable acceptance criteria for export to Azure DevOps.
+    return f"""You are an expert AI product partner helping Agile Product Owners generate high-quality user stories and testable acceptance criteria for export to Azure DevOps.
 
     Context (knowledge base):
     - Project: {context.get('project_name')}               # Project Name
-    - Description: {context.get('project_description')}    # Description
+    - Description: {project_description}    # Description
     - Tone: {context.get('tone')}                          # Tone   
     - Format: {context.get('format')}                      # Style guidelines
     - Project Files: {kb_files_text}                       # Knowledge Base Files Text
@@ -49,18 +57,9 @@ def generate_user_story(
     Produce an INVEST-quality user story aligned to the context.
     The user story should include a title, description, and testable acceptance criteria in bullet points.
     Return JSON if possible, but if not, just return text.
-    """
-
-    # Make the API call to OpenAI.
-    response = client.responses.create(
-        model=model,
-        instructions=instruction,
-        input={},
-        temperature=0.0
-    )
-
-    output = response.choices[0].message.content
+    """, budget
 
+def _parse_story(output: str):
     try:
         parsed = json.loads(output)
         parsed.pop("definition_of_done", None)
@@ -69,6 +68,139 @@ def generate_user_story(
         print("⚠️ Model did not return valid JSON. Showing formatted output instead.\n")
         return pretty_print(output)
 
+def generate_user_story(
+    raw_input: str,
+    context: dict,
+    custom_prompt: str = "",
+    file_content: str = "",
+    kb_files_text: str = "",
+    model: str = "gpt-5",
+    token_budget: Optional[int] = DEFAULT_SECTION_BUDGET,
+    return_budget: bool = False,
+    cache_mode: str = "use"
+):
+    """
+    Turns raw input into a structured user story using project context.
+    The function handles both valid JSON and plain-text output from the model.
+    Responses are cached per project (see LLMGateway.chat for cache_mode).
+
+    file_content, the project description and kb_files_text share
+    `token_budget` tokens (None: unbounded). return_budget=True returns
+    (result, budget report); pass the report on as response metadata,
+    e.g. build_suggestion(..., meta={"prompt_budget": report}).
+    """
+    instruction, budget = _build_instruction(raw_input, context, custom_prompt, file_content, kb_files_text,
+                                             token_budget, model)
+
+    # Make the API call to OpenAI (same request as the async variant, so both share cache entries).
+    output = chat_sync(
+        [{"role": "user", "content": instruction}],
+        model=model,
+        temperature=0.0,
+        cache_namespace=context.get("project_name") or DEFAULT_NAMESPACE,
+        cache_mode=cache_mode
+    )
+    result = _parse_story(output)
+    return (result, budget) if return_budget else result
+
+async def generate_user_story_async(
+    raw_input: str,
+    context: dict,
+    custom_prompt: str = "",
+    file_content: str = "",
+    kb_files_text: str = "",
+    model: str = "gpt-5",
+    gateway: Optional[LLMGateway] = None,
+    cache_mode: str = "use",
+    token_budget: Optional[int] = DEFAULT_SECTION_BUDGET,
+    return_budget: bool = False
+):
+    """
+    Async generate_user_story through the shared LLM gateway (pooled
+    connections, bounded concurrency). Same prompt and return value.
+    Responses are cached per project (see LLMGateway.chat for cache_mode).
+    """
+    instruction, budget = _build_instruction(raw_input, context, custom_prompt, file_content, kb_files_text,
+                                             token_budget, model)
+    output = await (gateway or get_gateway()).complete(
+        instruction, model=model, temperature=0.0,
+        cache_namespace=context.get("project_name") or DEFAULT_NAMESPACE, cache_mode=cache_mode)
+    result = _parse_story(output)
+    return (result, budget) if return_budget else result
+
+def _story_events(parser: StoryStreamParser, chunk: str) -> Iterator[StreamEvent]:
+    for event in parser.feed(chunk):
+        if event.field != "definition_of_done":   # dropped, as in _parse_story
+            yield event
+
+def _finish_stream(parser: StoryStreamParser, parts: Iterable[str], budget: PromptBudget) -> StreamEvent:
+    if parser.done and not parser.failed:
+        story = dict(parser.story)
+        story.pop("definition_of_done", None)
+    else:
+        story = _parse_story("".join(parts))
+    return StreamEvent("done", "story", story, meta={"prompt_budget": budget})
+
+def generate_user_story_stream(
+    raw_input: str,
+    context: dict,
+    custom_prompt: str = "",
+    file_content: str = "",
+    kb_files_text: str = "",
+    model: str = "gpt-5",
+    token_budget: Optional[int] = DEFAULT_SECTION_BUDGET,
+    cache_mode: str = "use"
+) -> Iterator[StreamEvent]:
+    """
+    Streaming generate_user_story: yields a StreamEvent for each top-level
+    field (title, description, ...) and each acceptance criterion as soon as
+    the model has finished writing it, then a final ("done", "story", result)
+    event whose value is what generate_user_story would have returned and
+    whose meta carries the prompt budget report under "prompt_budget".
+    Responses are cached per project like generate_user_story's; a cached
+    response yields the same events at once.
+    """
+    instruction, budget = _build_instruction(raw_input, context, custom_prompt, file_content, kb_files_text,
+                                             token_budget, model)
+    parser, parts = StoryStreamParser(), []
+    pieces = stream_sync(
+        [{"role": "user", "content": instruction}], model=model, temperature=0.0,
+        cache_namespace=context.get("project_name") or DEFAULT_NAMESPACE, cache_mode=cache_mode)
+    with closing(pieces):  # closing this generator early closes the HTTP stream
+        for text in pieces:
+            parts.append(text)
+            yield from _story_events(parser, text)
+    yield _finish_stream(parser, parts, budget)
+
+async def generate_user_story_stream_async(
+    raw_input: str,
+    context: dict,
+    custom_prompt: str = "",
+    file_content: str = "",
+    kb_files_text: str = "",
+    model: str = "gpt-5",
+    gateway: Optional[LLMGateway] = None,
+    cache_mode: str = "use",
+    token_budget: Optional[int] = DEFAULT_SECTION_BUDGET
+) -> AsyncIterator[StreamEvent]:
+    """
+    Async generate_user_story_stream through the shared LLM gateway. Close
+    it if you stop early (contextlib.aclosing): until then it holds one of
+    the gateway's concurrency slots (see LLMGateway.stream).
+    """
+    instruction, budget = _build_instruction(raw_input, context, custom_prompt, file_content, kb_files_text,
+                                             token_budget, model)
+    parser, parts = StoryStreamParser(), []
+    pieces = (gateway or get_gateway()).stream(
+        [{"role": "user", "content": instruction}], model=model, temperature=0.0,
+        cache_namespace=context.get("project_name") or DEFAULT_NAMESPACE, cache_mode=cache_mode)
+    async with aclosing(pieces):
+        async for text in pieces:
+            parts.append(text)
+            for event in _story_events(parser, text):
+                yield event
+    yield _finish_stream(parser, parts, budget)
+
 if __name__ == "__main__":
     raw_input = "As a user, I want to reset my password so that I can regain access if I forget it."
     custom_prompt = "Focus on security and user experience."
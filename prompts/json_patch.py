@@ -0,0 +1,202 @@
+# json_patch.py
+# RFC 6902 JSON Patch engine for story suggestions (add / remove / replace /
+# move / copy / test, RFC 6901 pointers). Patches from build_suggestion's
+# _diff_dict are valid input: their extra "before"/"after" members are ignored.
+#
+# apply_patch() is copy-on-write by default: only the containers on the paths
+# an op touches are copied, so the cost scales with the size of the change and
+# the result shares every untouched subtree with the input.
+
+from typing import Any, Dict, List, Tuple
+
+Patch = List[Dict[str, Any]]
+
+_MISSING = object()
+
+
+class JsonPatchError(ValueError):
+    """A patch is malformed or does not apply to the document."""
+
+
+def escape_token(key: str) -> str:
+    """One RFC 6901 reference token ('a/b' -> 'a~1b')."""
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """'/a/b~1c' -> ['a', 'b/c']; '' is the whole document."""
+    if pointer == "":
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def clone_json(value: Any) -> Any:
+    """Deep copy of JSON data (values taken from a patch must not alias it)."""
+    if isinstance(value, dict):
+        return {k: clone_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [clone_json(v) for v in value]
+    return value
+
+
+def json_equal(a: Any, b: Any) -> bool:
+    """JSON equality for 'test': unlike ==, true is not 1 and 1 is 1.0."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    if isinstance(a, dict):
+        return (isinstance(b, dict) and a.keys() == b.keys()
+                and all(json_equal(v, b[k]) for k, v in a.items()))
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    return type(a) is type(b) and a == b
+
+
+def _index(container: List[Any], token: str, *, for_add: bool = False) -> int:
+    if token == "-" and for_add:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    i = int(token)
+    if i > len(container) or (i == len(container) and not for_add):
+        raise JsonPatchError(f"Array index out of range: {i}")
+    return i
+
+
+class _Applier:
+    """Applies ops to `root`, copying containers on first write unless in_place."""
+
+    def __init__(self, root: Any, in_place: bool):
+        self.root = root
+        self.in_place = in_place
+        # Containers this applier created (safe to mutate), by id; holding them keeps ids unique
+        self._owned: Dict[int, Any] = {}
+
+    def _own(self, node: Any) -> Any:
+        if self.in_place or id(node) in self._owned:
+            return node
+        node = dict(node) if isinstance(node, dict) else list(node)
+        self._owned[id(node)] = node
+        return node
+
+    def _parent(self, tokens: List[str]) -> Tuple[Any, str]:
+        """Writable container holding tokens[-1], copying the path to it as needed."""
+        self.root = node = self._own(self.root) if isinstance(self.root, (dict, list)) else self.root
+        for token in tokens[:-1]:
+            if isinstance(node, dict):
+                if token not in node:
+                    raise JsonPatchError(f"Path not found: {token!r}")
+                child = node[token]
+                key: Any = token
+            elif isinstance(node, list):
+                key = _index(node, token)
+                child = node[key]
+            else:
+                raise JsonPatchError(f"Cannot descend into a {type(node).__name__} at {token!r}")
+            if not isinstance(child, (dict, list)):
+                raise JsonPatchError(f"Cannot descend into a {type(child).__name__} at {token!r}")
+            owned = self._own(child)
+            if owned is not child:
+                node[key] = owned
+            node = owned
+        if not isinstance(node, (dict, list)):
+            raise JsonPatchError(f"Cannot address into a {type(node).__name__}")
+        return node, tokens[-1]
+
+    def get(self, tokens: List[str]) -> Any:
+        node = self.root
+        for token in tokens:
+            if isinstance(node, dict):
+                node = node.get(token, _MISSING)
+                if node is _MISSING:
+                    raise JsonPatchError(f"Path not found: {token!r}")
+            elif isinstance(node, list):
+                node = node[_index(node, token)]
+            else:
+                raise JsonPatchError(f"Cannot descend into a {type(node).__name__} at {token!r}")
+        return node
+
+    def add(self, tokens: List[str], value: Any) -> None:
+        if not tokens:
+            self.root = value
+            return
+        parent, token = self._parent(tokens)
+        if isinstance(parent, dict):
+            parent[token] = value
+        else:
+            parent.insert(_index(parent, token, for_add=True), value)
+
+    def remove(self, tokens: List[str]) -> Any:
+        if not tokens:
+            raise JsonPatchError("Cannot remove the whole document.")
+        parent, token = self._parent(tokens)
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise JsonPatchError(f"Path not found: {token!r}")
+            return parent.pop(token)
+        return parent.pop(_index(parent, token))
+
+    def replace(self, tokens: List[str], value: Any) -> None:
+        if not tokens:
+            self.root = value
+            return
+        parent, token = self._parent(tokens)
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise JsonPatchError(f"Path not found: {token!r}")
+            parent[token] = value
+        else:
+            parent[_index(parent, token)] = value
+
+
+def _member(op: Dict[str, Any], name: str) -> Any:
+    if name not in op:
+        raise JsonPatchError(f"Operation {op.get('op')!r} is missing {name!r}.")
+    return op[name]
+
+
+def apply_patch(doc: Any, patch: Patch, *, in_place: bool = False) -> Any:
+    """
+    Apply an RFC 6902 patch and return the patched document.
+
+    Copy-on-write (default): `doc` is left untouched and the result shares
+    unchanged subtrees with it, so treat both as read-only or copy before
+    mutating. Failure raises JsonPatchError and leaves `doc` as it was.
+
+    in_place=True mutates `doc` directly (no copies). Not atomic: if an op
+    fails, the ops before it have already been applied.
+    """
+    if not isinstance(patch, list):
+        raise JsonPatchError("A patch must be a list of operations.")
+    applier = _Applier(doc, in_place)
+    for op in patch:
+        if not isinstance(op, dict):
+            raise JsonPatchError(f"Invalid operation: {op!r}")
+        kind = op.get("op")
+        path = parse_pointer(_member(op, "path"))
+        if kind == "add":
+            applier.add(path, clone_json(_member(op, "value")))
+        elif kind == "remove":
+            applier.remove(path)
+        elif kind == "replace":
+            applier.replace(path, clone_json(_member(op, "value")))
+        elif kind == "move":
+            frm = parse_pointer(_member(op, "from"))
+            if path[:len(frm)] == frm and len(path) > len(frm):
+                raise JsonPatchError("Cannot move a value into one of its own children.")
+            if frm == path:
+                applier.get(frm)  # still must exist
+            else:
+                applier.add(path, applier.remove(frm))
+        elif kind == "copy":
+            applier.add(path, clone_json(applier.get(parse_pointer(_member(op, "from")))))
+        elif kind == "test":
+            if not json_equal(applier.get(path), _member(op, "value")):
+                raise JsonPatchError(f"Test failed at {op['path']!r}.")
+        else:
+            raise JsonPatchError(f"Unknown operation: {kind!r}")
+    return applier.root
+
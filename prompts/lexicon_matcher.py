@@ -0,0 +1,82 @@
+# lexicon_matcher.py
+# One compiled multi-pattern matcher shared by early_evals (AC bullet heuristics)
+# and the story point estimator (unknown cues). All lexicon entries are combined
+# into a single alternation, so a text is scanned once and every hit is
+# reported with its lexicon and entry.
+
+import re
+from typing import Dict, Iterator, List, Mapping, Sequence, Set, Tuple
+
+Hits = Dict[str, Set[str]]  # lexicon name -> entries that matched
+
+
+class LexiconMatcher:
+    """
+    lexicons: {name: [regex, ...]}. Every entry reports its own hits, as if
+    searched separately: hits of different entries (and lexicons) may start
+    at the same position or overlap; hits of one entry don't overlap each
+    other. Entries starting with '^' are anchored: they are checked once at
+    the start of the text.
+
+    With lowercase=True (default) entries must be written in lowercase: the
+    text is lowercased once and matched case-sensitively, which is equivalent
+    to re.I for these lexicons and several times faster.
+    """
+
+    def __init__(self, lexicons: Mapping[str, Sequence[str]], *, lowercase: bool = True):
+        self.lexicons: Dict[str, List[str]] = {name: list(entries) for name, entries in lexicons.items()}
+        self.lowercase = lowercase
+        flags = 0 if lowercase else re.I
+        self._anchored: List[Tuple[str, str, "re.Pattern[str]"]] = []
+        self._entries: List[Tuple[str, str, "re.Pattern[str]"]] = []
+        for name, entries in self.lexicons.items():
+            for entry in entries:
+                target = self._anchored if entry.startswith("^") else self._entries
+                target.append((name, entry, re.compile(entry, flags)))
+        # Zero-width lookahead over a plain non-capturing alternation: one scan
+        # finds every position where some entry matches, without consuming it,
+        # so overlapping hits of other entries are not skipped. Named groups per
+        # entry would defeat sre's literal-prefix optimisations (~4x slower), so
+        # the entries behind each position are resolved afterwards (hits are rare).
+        alts = "|".join(f"(?:{entry})" for _, entry, _ in self._entries)
+        self._rx = re.compile(f"(?=(?:{alts}))" if alts else r"(?!)", flags)
+
+    def finditer(self, text: str) -> Iterator[Tuple[str, str, "re.Match[str]"]]:
+        """Yield (lexicon, entry, match) for every hit, in text order."""
+        if self.lowercase:
+            text = text.lower()
+        for name, entry, rx in self._anchored:
+            m = rx.match(text)
+            if m:
+                yield name, entry, m
+        ends = [0] * len(self._entries)  # per entry: end of its last hit
+        for hit in self._rx.finditer(text):
+            pos = hit.start()
+            for i, (name, entry, rx) in enumerate(self._entries):
+                if pos < ends[i]:
+                    continue
+                m = rx.match(text, pos)
+                if m:
+                    ends[i] = max(m.end(), pos + 1)
+                    yield name, entry, m
+
+    def scan(self, text: str) -> Hits:
+        """Single pass over `text`; returns the distinct entries hit per lexicon."""
+        hits: Hits = {name: set() for name in self.lexicons}
+        for name, entry, _ in self.finditer(text):
+            hits[name].add(entry)
+        return hits
+
+
+def literal_entries(words: Sequence[str]) -> List[str]:
+    """Plain substrings (the old `cue in text` checks) as matcher entries."""
+    return [re.escape(w.lower()) for w in words]
+
+
+def lead_word_entry(words: Sequence[str]) -> str:
+    """
+    Anchored entry matching when the first whitespace-separated token is one
+    of `words`, optionally followed by trailing 's' (e.g. "Displays").
+    """
+    alts = "|".join(re.escape(w.lower()) for w in words)
+    return rf"^\s*(?:{alts})s*(?!\S)"
@@ -0,0 +1,363 @@
+# llm_gateway.py
+# One shared gateway to the model API instead of a module-level OpenAI(...)
+# client per prompt module. The async API lets a single worker serve many
+# chat sessions concurrently without a thread per request: calls share one
+# AsyncOpenAI client (one pooled HTTP connection pool, keep-alive reused
+# across requests) and a semaphore caps how many requests are in flight.
+#
+# Configuration comes from the environment like the OpenAI SDK's own:
+# OPENAI_API_KEY, OPENAI_BASE_URL (e.g. a local fake endpoint in tests or a
+# proxy) and LLM_MAX_CONCURRENCY. Clients are created on first use, never at
+# import time. With LLM_CACHE_PATH set, temperature-0 responses are cached on
+# disk (response_cache.py), for the async gateway and for chat_sync() and
+# stream_sync() alike; cache lookups and writes run in a worker thread so
+# SQLite never blocks the event loop.
+#
+# Identical chat() calls that overlap in time (a double-clicked Generate,
+# several tabs opening the same story) are coalesced: the first starts the
+# upstream request and the others await the same result ("single flight").
+# chat_sync() does the same across threads.
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from openai import AsyncOpenAI, OpenAI
+
+from response_cache import DEFAULT_NAMESPACE, ResponseCache, response_key
+
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+DEFAULT_TIMEOUT = 60.0      # seconds per request
+DEFAULT_MAX_RETRIES = 2
+
+Message = Dict[str, Any]
+
+
+class _LoopState:
+    """What a gateway keeps per event loop: the semaphore, the client's
+    connection pool and in-flight tasks all bind to the loop that uses them."""
+
+    def __init__(self, max_concurrency: int):
+        self.sem = asyncio.Semaphore(max_concurrency)
+        self.client: Optional[AsyncOpenAI] = None
+        self.inflight: Dict[str, asyncio.Task] = {}
+
+
+class LLMGateway:
+    """
+    Async chat-completions gateway. One instance per process (get_gateway());
+    safe to use from many tasks of one event loop, and from several loops in
+    turn or in parallel (e.g. one asyncio.run() after another): each loop
+    gets its own semaphore and client, so max_concurrency applies per loop.
+    An injected `client` is shared by all loops. Not picklable or fork-safe:
+    create it in the worker that uses it.
+    """
+
+    def __init__(self, *, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_concurrency: int = MAX_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, client: Optional[AsyncOpenAI] = None,
+                 cache: Optional[ResponseCache] = None, coalesce: bool = True):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1.")
+        self.max_concurrency = max_concurrency
+        self._client_args = {"api_key": api_key, "base_url": base_url, "timeout": timeout,
+                             "max_retries": max_retries}
+        self._client = client
+        self.cache = cache
+        self.coalesce = coalesce
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = \
+            weakref.WeakKeyDictionary()
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_seconds = 0.0
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState(self.max_concurrency)
+        return state
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The client for the running event loop (created on first use)."""
+        if self._client is not None:
+            return self._client
+        state = self._state()
+        if state.client is None:
+            state.client = AsyncOpenAI(**{k: v for k, v in self._client_args.items() if v is not None})
+        return state.client
+
+    async def chat(self, messages: List[Message], *, model: str, cache_namespace: str = DEFAULT_NAMESPACE,
+                   cache_mode: str = "use", **params: Any) -> str:
+        """
+        Run one chat completion and return the first choice's text ("" if none).
+
+        Temperature-0 calls go through the response cache, if one is set, in
+        `cache_namespace`. cache_mode: "use" (read and write), "refresh"
+        (skip the lookup, store the new response) or "bypass" (no cache).
+        A call identical to one already in flight waits for that one's result,
+        except with "bypass", which always makes its own request.
+        """
+        key = self._cache_key(messages, model, params, cache_mode)
+        if key is not None and cache_mode == "use":
+            cached = await self._cached(key, cache_namespace)
+            if cached is not None:
+                return cached
+        if not self.coalesce or cache_mode == "bypass":
+            return await self._fetch(messages, model, params, key, cache_namespace)
+        fingerprint = cache_namespace + ":" + (key or response_key(messages, model, params))
+        inflight = self._state().inflight
+        task = inflight.get(fingerprint)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # A task, so one caller being cancelled doesn't cancel the others' request
+            task = asyncio.ensure_future(self._fetch(messages, model, params, key, cache_namespace))
+            inflight[fingerprint] = task
+            task.add_done_callback(lambda t: self._request_done(inflight, fingerprint, t))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, messages: List[Message], model: str, params: Dict[str, Any], key: Optional[str],
+                     namespace: str) -> str:
+        content = await self._create(messages, model, params)
+        if key is not None:
+            await asyncio.to_thread(self.cache.put, key, content, namespace)
+        return content
+
+    def _request_done(self, inflight: Dict[str, asyncio.Task], fingerprint: str, task: asyncio.Task) -> None:
+        del inflight[fingerprint]
+        if not task.cancelled():
+            task.exception()  # mark retrieved: every waiter may have been cancelled
+
+    async def stream(self, messages: List[Message], *, model: str, cache_namespace: str = DEFAULT_NAMESPACE,
+                     cache_mode: str = "use", **params: Any) -> AsyncIterator[str]:
+        """
+        chat() that yields the response text in pieces as the model produces
+        them. A cached response comes back as a single piece; a stream read
+        to the end is cached like chat()'s result.
+
+        Until the generator finishes or is closed it holds a concurrency slot
+        and the open HTTP stream. A caller that may stop early must close it,
+        e.g. `async with contextlib.aclosing(gateway.stream(...)) as pieces:`;
+        an abandoned generator is only closed when garbage collected.
+        """
+        key = self._cache_key(messages, model, params, cache_mode)
+        if key is not None and cache_mode == "use":
+            cached = await self._cached(key, cache_namespace)
+            if cached is not None:
+                yield cached
+                return
+        parts = []
+        async with self._state().sem:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            start = time.perf_counter()
+            try:
+                response = await self.client.chat.completions.create(model=model, messages=messages, stream=True,
+                                                                     **params)
+                # Closing the generator (GeneratorExit at the yield) closes the
+                # HTTP stream here and frees the slot on the way out
+                async with response:
+                    async for chunk in response:
+                        text = chunk.choices[0].delta.content if chunk.choices else None
+                        if text:
+                            parts.append(text)
+                            yield text
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                self.requests += 1
+                self.total_seconds += time.perf_counter() - start
+        if key is not None:
+            await asyncio.to_thread(self.cache.put, key, "".join(parts), cache_namespace)
+
+    def _cache_key(self, messages: List[Message], model: str, params: Dict[str, Any],
+                   cache_mode: str) -> Optional[str]:
+        return _cache_key(self.cache, messages, model, params, cache_mode)
+
+    async def _cached(self, key: str, namespace: str) -> Optional[str]:
+        cached = await asyncio.to_thread(self.cache.get, key, namespace)
+        if cached is not None:
+            self.cache_hits += 1
+        return cached
+
+    async def _create(self, messages: List[Message], model: str, params: Dict[str, Any]) -> str:
+        async with self._state().sem:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            start = time.perf_counter()
+            try:
+                response = await self.client.chat.completions.create(model=model, messages=messages, **params)
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                self.requests += 1
+                self.total_seconds += time.perf_counter() - start
+        return response.choices[0].message.content or ""
+
+    async def complete(self, prompt: str, *, model: str, **params: Any) -> str:
+        """chat() with a single user message."""
+        return await self.chat([{"role": "user", "content": prompt}], model=model, **params)
+
+    async def aclose(self) -> None:
+        """Close the running loop's client (and an injected one)."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        state = self._loops.get(asyncio.get_running_loop())
+        if state is not None and state.client is not None:
+            await state.client.close()
+            state.client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_concurrency": self.max_concurrency,
+            "avg_latency_s": round(self.total_seconds / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+def _cache_key(cache: Optional[ResponseCache], messages: List[Message], model: str, params: Dict[str, Any],
+               cache_mode: str) -> Optional[str]:
+    if cache_mode not in ("use", "refresh", "bypass"):
+        raise ValueError("cache_mode must be 'use', 'refresh' or 'bypass'.")
+    if cache is None or cache_mode == "bypass" or params.get("temperature") != 0:
+        return None
+    return response_key(messages, model, params)
+
+
+_gateway: Optional[LLMGateway] = None
+_sync_client: Optional[OpenAI] = None
+_response_cache: Optional[ResponseCache] = None
+_sync_inflight: Dict[str, "Future[str]"] = {}  # chat_sync() fingerprint -> the leading call's result
+_sync_inflight_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The process-wide response cache at LLM_CACHE_PATH, opened on first use (None if unset)."""
+    global _response_cache
+    if _response_cache is None:
+        path = os.environ.get("LLM_CACHE_PATH")
+        if path:
+            _response_cache = ResponseCache(path)
+    return _response_cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """Replace the process-wide response cache (configuration, tests); None resets it."""
+    global _response_cache
+    _response_cache = cache
+
+
+def get_gateway() -> LLMGateway:
+    """The process-wide gateway, created on first use from the environment."""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway(cache=get_response_cache())
+    return _gateway
+
+
+def set_gateway(gateway: Optional[LLMGateway]) -> None:
+    """Replace the process-wide gateway (configuration, tests); None resets it."""
+    global _gateway
+    _gateway = gateway
+
+
+def get_sync_client() -> OpenAI:
+    """Shared blocking client for the existing synchronous call sites."""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = OpenAI(timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES)
+    return _sync_client
+
+
+def chat_sync(messages: List[Message], *, model: str, cache_namespace: str = DEFAULT_NAMESPACE,
+              cache_mode: str = "use", **params: Any) -> str:
+    """
+    Blocking LLMGateway.chat() for the synchronous call sites: the shared
+    sync client behind the process-wide response cache. Keys are the same,
+    so sync and async calls share cache entries. A call identical to one
+    already in flight in another thread waits for that one's result (or
+    exception), except with cache_mode="bypass".
+    """
+    cache = get_response_cache()
+    key = _cache_key(cache, messages, model, params, cache_mode)
+    if key is not None and cache_mode == "use":
+        cached = cache.get(key, cache_namespace)
+        if cached is not None:
+            return cached
+    if cache_mode == "bypass":
+        return _fetch_sync(cache, messages, model, params, key, cache_namespace)
+    fingerprint = cache_namespace + ":" + (key or response_key(messages, model, params))
+    with _sync_inflight_lock:
+        future = _sync_inflight.get(fingerprint)
+        leader = future is None
+        if leader:
+            future = _sync_inflight[fingerprint] = Future()
+    if not leader:
+        return future.result()
+    try:
+        content = _fetch_sync(cache, messages, model, params, key, cache_namespace)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(content)
+    finally:
+        with _sync_inflight_lock:
+            del _sync_inflight[fingerprint]
+    return content
+
+
+def _fetch_sync(cache: Optional[ResponseCache], messages: List[Message], model: str, params: Dict[str, Any],
+                key: Optional[str], namespace: str) -> str:
+    response = get_sync_client().chat.completions.create(model=model, messages=messages, **params)
+    content = response.choices[0].message.content or ""
+    if key is not None:
+        cache.put(key, content, namespace)
+    return content
+
+
+def stream_sync(messages: List[Message], *, model: str, cache_namespace: str = DEFAULT_NAMESPACE,
+                cache_mode: str = "use", **params: Any) -> Iterator[str]:
+    """
+    Blocking LLMGateway.stream() on the shared sync client: a cached response
+    comes back as a single piece and a stream read to the end is cached, with
+    the same keys as chat_sync(). Close the generator if you stop early
+    (contextlib.closing) to close the HTTP stream.
+    """
+    cache = get_response_cache()
+    key = _cache_key(cache, messages, model, params, cache_mode)
+    if key is not None and cache_mode == "use":
+        cached = cache.get(key, cache_namespace)
+        if cached is not None:
+            yield cached
+            return
+    response = get_sync_client().chat.completions.create(model=model, messages=messages, stream=True, **params)
+    parts = []
+    with response:  # closing the generator early closes the HTTP stream
+        for chunk in response:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                parts.append(text)
+                yield text
+    if key is not None:
+        cache.put(key, "".join(parts), cache_namespace)
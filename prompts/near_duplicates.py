@@ -0,0 +1,239 @@
+# near_duplicates.py
+# Near-duplicate detection for acceptance criteria. LLM output often restates
+# a criterion with slightly different wording ("Show a success message" /
+# "Display the success message"), which the exact dedupe in early_evals misses.
+#
+# Texts are reduced to sets of character shingles and compared by Jaccard
+# similarity. Within one story the bullets are few, so pairs are compared
+# directly; across a backlog, NearDuplicateIndex keeps MinHash signatures in
+# LSH buckets so a query only looks at candidates that share a bucket instead
+# of every indexed criterion.
+
+import random
+import re
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+SHINGLE_SIZE = 4            # characters per shingle
+DEFAULT_THRESHOLD = 0.6     # Jaccard similarity at which two criteria count as near duplicates
+DEFAULT_NUM_PERM = 64       # MinHash signature length
+BRUTE_FORCE_LIMIT = 64      # near_duplicate_pairs compares all pairs up to this many texts
+
+_WORD_RX = re.compile(r"\w+")
+
+_MAX_HASH = (1 << 32) - 1
+
+
+Shingles = FrozenSet[Tuple[str, ...]]
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_WORD_RX.findall(text.lower()))
+
+
+@lru_cache(maxsize=8192)
+def shingles(text: str, k: int = SHINGLE_SIZE) -> Shingles:
+    """
+    Character k-shingles of the normalized text, as tuples of characters
+    (built by zip in C, ~2x cheaper than slicing). Texts shorter than k are a
+    single shingle; texts without words (e.g. punctuation-only) have none, so
+    they are never anyone's duplicate. Cached: refinement turns re-evaluate
+    mostly unchanged AC.
+    """
+    norm = normalize(text)
+    if not norm:
+        return frozenset()
+    if len(norm) <= k:
+        return frozenset([tuple(norm)])
+    return frozenset(zip(*(norm[i:] for i in range(k))))
+
+
+def jaccard(a: Shingles, b: Shingles) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def near_duplicate_pairs(texts: List[str], threshold: float = DEFAULT_THRESHOLD,
+                         k: int = SHINGLE_SIZE) -> List[Tuple[int, int, float]]:
+    """
+    (i, j, similarity) for every pair of `texts` with Jaccard >= threshold,
+    i < j, in index order. Small lists are compared pairwise (exact); larger
+    ones go through a NearDuplicateIndex.
+    """
+    if len(texts) > BRUTE_FORCE_LIMIT:
+        index = NearDuplicateIndex(threshold=threshold, k=k)
+        pairs = []
+        for j, text in enumerate(texts):
+            pairs.extend((i, j, sim) for i, sim in index.query(text))
+            index.add(j, text)
+        return sorted(pairs)
+
+    sets = [shingles(t, k) for t in texts]
+    sizes = [len(s) for s in sets]
+    pairs = []
+    for j in range(1, len(sets)):
+        sj, nj = sets[j], sizes[j]
+        for i in range(j):
+            ni = sizes[i]
+            # Jaccard <= min/max of the sizes: skip pairs that can't reach the threshold
+            if not ni or not nj or min(ni, nj) < threshold * max(ni, nj):
+                continue
+            inter = len(sets[i] & sj)
+            sim = inter / (ni + nj - inter)
+            if sim >= threshold:
+                pairs.append((i, j, sim))
+    return sorted(pairs)
+
+
+class MinHasher:
+    """
+    MinHash signatures by one-permutation hashing: each shingle hash is
+    permuted once and binned into `num_perm` slots keeping the minimum per
+    slot; empty slots borrow from the next filled one (rotation
+    densification). Same estimator as `num_perm` independent hash functions
+    at one hash per shingle instead of `num_perm`, i.e. ~25x cheaper here.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._mul = rng.getrandbits(32) | 1  # odd multiplier: a bijection mod 2**32
+        self._xor = rng.getrandbits(32)
+
+    def signature(self, shingle_set: Shingles) -> Tuple[int, ...]:
+        n, mul, xor = self.num_perm, self._mul, self._xor
+        sig: List[Optional[int]] = [None] * n
+        for sh in shingle_set:
+            # crc32, not hash(): str hashing is salted per process
+            h = ((zlib.crc32("".join(sh).encode("utf-8")) * mul) & _MAX_HASH) ^ xor
+            slot, value = h % n, h // n
+            cur = sig[slot]
+            if cur is None or value < cur:
+                sig[slot] = value
+        if None not in sig:
+            return tuple(sig)
+        if all(v is None for v in sig):
+            return (0,) * n
+        out = []
+        for j in range(n):
+            d = 0
+            while sig[(j + d) % n] is None:
+                d += 1
+            # Offset by distance so a borrowed value only collides with the same borrow
+            out.append(sig[(j + d) % n] + d * (_MAX_HASH + 1))
+        return tuple(out)
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows <= num_perm whose S-curve midpoint
+    (1/bands) ** (1/rows) is closest to `threshold`, preferring more bands
+    (fewer missed pairs; false candidates are filtered exactly afterwards).
+    """
+    best = (num_perm, 1)
+    best_err = float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        err = abs((1 / bands) ** (1 / rows) - threshold)
+        if err < best_err - 1e-9:
+            best, best_err = (bands, rows), err
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    Backlog-wide index of criteria. add() stores a text under any hashable key
+    (e.g. (story_id, ac_index)); query() returns the indexed keys whose text is
+    a near duplicate. Candidates come from LSH buckets and are confirmed with
+    exact Jaccard on the shingle sets, so results have no false positives and
+    lookups cost a handful of bucket probes, not a scan of the backlog.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, *, num_perm: int = DEFAULT_NUM_PERM,
+                 k: int = SHINGLE_SIZE, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1].")
+        self.threshold = threshold
+        self.k = k
+        self._hasher = MinHasher(num_perm, seed)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._buckets: List[Dict[Tuple[int, ...], Set[Hashable]]] = [{} for _ in range(self.bands)]
+        self._items: Dict[Hashable, Tuple[Shingles, Tuple[int, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def _band_keys(self, sig: Tuple[int, ...]) -> Iterable[Tuple[int, ...]]:
+        r = self.rows
+        return (sig[i * r:(i + 1) * r] for i in range(self.bands))
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Index `text` under `key`, replacing any text previously stored under it."""
+        if key in self._items:
+            self.remove(key)
+        sh = shingles(text, self.k)
+        sig = self._hasher.signature(sh)
+        self._items[key] = (sh, sig)
+        if not sh:
+            return  # no shingles: never a candidate
+        for bucket, band in zip(self._buckets, self._band_keys(sig)):
+            bucket.setdefault(band, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        for bucket, band in zip(self._buckets, self._band_keys(item[1])):
+            keys = bucket.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band]
+
+    def _matches(self, sh: Shingles, sig: Tuple[int, ...],
+                 exclude: Optional[Hashable]) -> List[Tuple[Hashable, float]]:
+        if not sh:
+            return []
+        candidates: Set[Hashable] = set()
+        for bucket, band in zip(self._buckets, self._band_keys(sig)):
+            candidates.update(bucket.get(band, ()))
+        candidates.discard(exclude)
+        out = []
+        for key in candidates:
+            sim = jaccard(sh, self._items[key][0])
+            if sim >= self.threshold:
+                out.append((key, sim))
+        out.sort(key=lambda kv: -kv[1])
+        return out
+
+    def query(self, text: str) -> List[Tuple[Hashable, float]]:
+        """(key, similarity) of indexed near duplicates of `text`, most similar first."""
+        sh = shingles(text, self.k)
+        return self._matches(sh, self._hasher.signature(sh), None)
+
+    def similar_to(self, key: Hashable) -> List[Tuple[Hashable, float]]:
+        """Near duplicates of an already indexed entry (excluding itself)."""
+        sh, sig = self._items[key]
+        return self._matches(sh, sig, key)
+
+
+def index_backlog(stories: Iterable[Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD,
+                  **kwargs: Any) -> NearDuplicateIndex:
+    """Index every string AC of every story under (story id or position, ac index)."""
+    index = NearDuplicateIndex(threshold, **kwargs)
+    for pos, story in enumerate(stories):
+        ac = story.get("acceptance_criteria")
+        if not isinstance(ac, list):
+            continue
+        sid = story.get("id", pos)
+        for i, text in enumerate(ac):
+            if isinstance(text, str) and text.strip():
+                index.add((sid, i), text)
+    return index
@@ -0,0 +1,165 @@
+# prompt_budget.py
+# Token budget for the bulky, optional parts of a generation prompt
+# (uploaded file content, project context, knowledge-base files). These were
+# interpolated unbounded, so a large upload raised latency and cost and could
+# overflow the context window.
+#
+# fit_sections() counts each section's tokens locally, allocates the budget
+# by priority (every section first gets a small floor, then the remainder
+# goes to the highest priorities), and shrinks sections that don't fit:
+#   - extraction: keep the sentences/lines sharing the most terms with the
+#     query (the user's raw input), in their original order, "[...]" marking
+#     the gaps;
+#   - trimming: keep the head when nothing matches the query.
+# The report says what each section needed, got and kept; callers return it
+# next to the response metadata (build_suggestion(meta={"prompt_budget": ...})).
+#
+# Token counts use tiktoken when it is installed, else a conservative local
+# estimate (about 4 characters per token, punctuation counted separately).
+
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, TypedDict
+
+try:
+    import tiktoken
+except ImportError:  # optional: estimate instead
+    tiktoken = None
+
+DEFAULT_SECTION_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", "6000"))  # tokens for all budgeted sections
+MIN_SECTION_TOKENS = 200        # floor each section keeps when the budget allows
+GAP_MARKER = "[...]"
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_UNIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_TERM_RE = re.compile(r"[a-z0-9]{3,}")
+_STOPWORDS = frozenset(
+    "the and for that with this from have will should can are was were not but all any into able "
+    "user want wants need needs when then their there which".split())
+
+
+class Section(NamedTuple):
+    name: str
+    text: str
+    priority: int       # lower is more important
+
+
+class SectionBudget(TypedDict):
+    priority: int
+    tokens: int         # before budgeting
+    allocated: int
+    kept: int           # after budgeting
+    method: str         # "kept", "extracted", "trimmed" or "dropped"
+
+
+class PromptBudget(TypedDict):
+    budget: Optional[int]
+    tokens_before: int
+    tokens_after: int
+    counter: str        # "tiktoken" or "estimate"
+    sections: Dict[str, SectionBudget]
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-5") -> int:
+    """Tokens in `text` for `model` (tiktoken), or a slight over-estimate without it."""
+    if not text:
+        return 0
+    if tiktoken is not None:
+        return len(_encoding(model).encode(text, disallowed_special=()))
+    return sum((len(t) + 3) // 4 for t in _TOKEN_RE.findall(text))
+
+
+def allocate(needs: List[int], priorities: List[int], budget: int) -> List[int]:
+    """Split `budget` over sections: floors first, then the rest by priority."""
+    order = sorted(range(len(needs)), key=lambda i: priorities[i])
+    alloc = [0] * len(needs)
+    left = budget
+    for i in order:
+        alloc[i] = min(needs[i], MIN_SECTION_TOKENS, left)
+        left -= alloc[i]
+    for i in order:
+        extra = min(needs[i] - alloc[i], left)
+        alloc[i] += extra
+        left -= extra
+    return alloc
+
+
+def _terms(text: str) -> set:
+    return {t for t in _TERM_RE.findall(text.lower()) if t not in _STOPWORDS}
+
+
+def extract(text: str, max_tokens: int, query: str = "", *,
+            count: Callable[[str], int] = count_tokens) -> Tuple[str, str]:
+    """Shrink `text` to about `max_tokens`; returns (text, method)."""
+    if max_tokens <= 0:
+        return "", "dropped"
+    units = [u.strip() for u in _UNIT_RE.split(text) if u and u.strip()]
+    sizes = [count(u) + 1 for u in units]   # +1 for the joining newline
+    wanted = _terms(query)
+    scores = [len(_terms(u) & wanted) / math.sqrt(n) for u, n in zip(units, sizes)]
+    if any(scores):
+        ranked = sorted(range(len(units)), key=lambda i: (-scores[i], i))
+        method = "extracted"
+    else:
+        ranked = list(range(len(units)))
+        method = "trimmed"
+    gap_cost = count(GAP_MARKER) + 1
+    chosen, used = [], 0
+    for i in ranked:
+        if used + sizes[i] + gap_cost <= max_tokens:
+            chosen.append(i)
+            used += sizes[i] + gap_cost   # worst case: each unit followed by a gap marker
+    if not chosen:
+        # One unit larger than the whole allocation (e.g. minified text): cut by characters
+        return text[:len(text) * max_tokens // max(count(text), 1)].rstrip(), "trimmed"
+    chosen.sort()
+    out, prev = [], -1
+    for i in chosen:
+        if i != prev + 1:
+            out.append(GAP_MARKER)
+        out.append(units[i])
+        prev = i
+    if prev != len(units) - 1:
+        out.append(GAP_MARKER)
+    return "\n".join(out), method
+
+
+def fit_sections(sections: List[Section], budget: Optional[int] = DEFAULT_SECTION_BUDGET, *,
+                 query: str = "", model: str = "gpt-5") -> Tuple[Dict[str, str], PromptBudget]:
+    """
+    Fit the sections' text into `budget` tokens (None: no limit, report only).
+    Returns the texts to interpolate, by section name, and the breakdown.
+    """
+    count = lambda text: count_tokens(text, model)
+    needs = [count(s.text) for s in sections]
+    if budget is None or sum(needs) <= budget:
+        alloc = list(needs)
+    else:
+        alloc = allocate(needs, [s.priority for s in sections], budget)
+    texts: Dict[str, str] = {}
+    report: Dict[str, SectionBudget] = {}
+    for s, need, allowed in zip(sections, needs, alloc):
+        if need <= allowed:
+            text, method = s.text, "kept"
+        else:
+            text, method = extract(s.text, allowed, query, count=count)
+        texts[s.name] = text
+        report[s.name] = {"priority": s.priority, "tokens": need, "allocated": allowed,
+                          "kept": need if method == "kept" else count(text), "method": method}
+    return texts, {
+        "budget": budget,
+        "tokens_before": sum(needs),
+        "tokens_after": sum(r["kept"] for r in report.values()),
+        "counter": "tiktoken" if tiktoken is not None else "estimate",
+        "sections": report,
+    }
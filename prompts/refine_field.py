@@ -1,9 +1,10 @@
 # refines a single field in the story
 
-from openai import OpenAI
 import json
+from typing import Optional
 
-client = OpenAI()  # use env var OPENAI_API_KEY
+from llm_gateway import LLMGateway, chat_sync, get_gateway  # key from env var OPENAI_API_KEY
+from response_cache import DEFAULT_NAMESPACE
 
 def pretty_print(output: str):
     try:
@@ -16,21 +17,13 @@ def pretty_print(output: str):
 # Note: 'definition_of_done' has been removed for consistency.
 ALLOWED_FIELDS = {"title", "description", "acceptance_criteria", "story_points", "tags"}
 
-def refine_field(
-    existing_story: dict,
-    field_name: str,
-    user_instruction: str,
-    model: str = "gpt-5"
-):
-    """
-    Refine exactly one field. Returns {field_name: new_value} if JSON; else pretty text.
-    """
+def _build_prompt(existing_story: dict, field_name: str, user_instruction: str) -> str:
     if field_name not in ALLOWED_FIELDS:
         raise ValueError(f"Field '{field_name}' is not editable. Allowed: {sorted(ALLOWED_FIELDS)}")
 
     current_value = existing_story.get(field_name)
 
-    prompt = f"""You are refining ONE field of a user story.
+    return f"""You are refining ONE field of a user story.
 
 Field: {field_name}
 Current value:
@@ -49,16 +42,51 @@ Rules:
 Return JSON like:
 {{ "{field_name}": <new_value> }}
 """
-    # CORRECTED API CALL: Use the modern chat.completions endpoint.
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.0
-    )
 
-    output = response.choices[0].message.content
+def _parse_output(output: str):
     try:
         return json.loads(output)
     except json.JSONDecodeError:
         print("⚠️ Non-JSON from model. Showing formatted text.\n")
-        return pretty_print(output)
\ No newline at end of file
+        return pretty_print(output)
+
+def refine_field(
+    existing_story: dict,
+    field_name: str,
+    user_instruction: str,
+    model: str = "gpt-5",
+    cache_namespace: str = DEFAULT_NAMESPACE,
+    cache_mode: str = "use"
+):
+    """
+    Refine exactly one field. Returns {field_name: new_value} if JSON; else pretty text.
+    Responses are cached in `cache_namespace` (see LLMGateway.chat for cache_mode).
+    """
+    prompt = _build_prompt(existing_story, field_name, user_instruction)
+    # CORRECTED API CALL: Use the modern chat.completions endpoint.
+    output = chat_sync(
+        [{"role": "user", "content": prompt}],
+        model=model,
+        temperature=0.0,
+        cache_namespace=cache_namespace,
+        cache_mode=cache_mode
+    )
+    return _parse_output(output)
+
+async def refine_field_async(
+    existing_story: dict,
+    field_name: str,
+    user_instruction: str,
+    model: str = "gpt-5",
+    gateway: Optional[LLMGateway] = None,
+    cache_namespace: str = DEFAULT_NAMESPACE,
+    cache_mode: str = "use"
+):
+    """
+    Async refine_field through the shared LLM gateway. Same prompt and return value.
+    Responses are cached in `cache_namespace` (see LLMGateway.chat for cache_mode).
+    """
+    prompt = _build_prompt(existing_story, field_name, user_instruction)
+    output = await (gateway or get_gateway()).complete(prompt, model=model, temperature=0.0,
+                                                       cache_namespace=cache_namespace, cache_mode=cache_mode)
+    return _parse_output(output)
\ No newline at end of file
@@ -1,15 +1,32 @@
-from openai import OpenAI
 import json
 import uuid
+from typing import Any, Optional
 from refinement import refine_user_story
-
-# This dictionary will store the chat history for each session.
-# In a real application, you would use a database like Firestore for this.
-session_history = {}
+from llm_gateway import get_sync_client
+from prompt_budget import DEFAULT_SECTION_BUDGET, Section, fit_sections
+from session_store import LazySessionStore
+
+# Chat history for each session, persisted in SQLite (WAL) so it survives
+# restarts and can be shared by several workers. Path: SESSION_DB_PATH.
+# Opened on first use, so importing this module creates no database; still
+# indexable like the dict it replaces (session_history[session_id]).
+session_history = LazySessionStore()
+
+def record_turn(session_id: str, message: str, reply: Any) -> None:
+    """Persist one refinement turn: the user's message and the model's reply."""
+    if not isinstance(reply, str):
+        reply = json.dumps(reply, indent=2)
+    session_history.extend(session_id, [{"role": "user", "content": message},
+                                        {"role": "assistant", "content": reply}])
+
+def refine_and_record(session_id: str, message: str, **kwargs: Any) -> Any:
+    """One chat turn: refine_user_story(), then persist the message and reply to session_history."""
+    reply = refine_user_story(session_id, message, **kwargs)
+    record_turn(session_id, message, reply)
+    return reply
 
 # IMPORTANT: Do not hardcode your API key in production code.
-# Use environment variables instead.
-client = OpenAI(api_key="...")  # or env var
+# The shared client (llm_gateway) reads OPENAI_API_KEY from the environment.
 
 def pretty_print(output: str):
     """
@@ -28,12 +45,18 @@ def generate_user_story(
     custom_prompt: str = "",
     file_content: str = "",
     project_context: str = "",
-    model: str = "gpt-5"
+    model: str = "gpt-5",
+    token_budget: Optional[int] = DEFAULT_SECTION_BUDGET
 ):
     """
     Turns raw input into a structured user story using project context.
     The function handles both valid JSON and plain-text output from the model.
+    file_content and project_context share `token_budget` tokens (None: unbounded).
     """
+    # Bound the bulky inputs; the uploaded file outranks general project context
+    texts, _ = fit_sections([Section("file_content", file_content, 1), Section("project_context", project_context, 2)],
+                            token_budget, query=f"{raw_input}\n{custom_prompt}", model=model)
+    file_content, project_context = texts["file_content"], texts["project_context"]
 
     # The 'instruction' variable is a well-formatted prompt for the model.
     instruction = f"""You are an expert AI product partner helping Agile Product Owners generate high-quality user stories and testable acceptance criteria for export to Azure DevOps.
@@ -60,7 +83,7 @@ def generate_user_story(
     """
 
     # Make the API call to OpenAI.
-    response = client.chat.completions.create(
+    response = get_sync_client().chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": instruction}],
         temperature=0.0
@@ -102,13 +125,15 @@ if __name__ == "__main__":
         initial_story_string = initial_story
         print(initial_story_string)
 
+    client = get_sync_client()
+
     # Create a unique session ID for this conversation.
     current_session_id = str(uuid.uuid4())
 
     # --- STEP 2: FIRST REFINEMENT TURN ---
     refinement_message_1 = f"Please add a note about password complexity to the acceptance criteria. The rule is: 'must be at least 12 characters, include a number and a symbol'.\n\nCurrent Story:\n{initial_story_string}"
     
-    refined_story_1 = refine_user_story(current_session_id, refinement_message_1, client=client, pretty_print=pretty_print)
+    refined_story_1 = refine_and_record(current_session_id, refinement_message_1, client=client, pretty_print=pretty_print)
     
     print("\n--- First Refinement Turn ---")
     print(refined_story_1)
@@ -116,7 +141,9 @@ if __name__ == "__main__":
     # --- STEP 3: SECOND REFINEMENT TURN ---
     refinement_message_2 = "Can you also add a bullet point about logging all password reset attempts for security auditing?"
 
-    refined_story_2 = refine_user_story(current_session_id, refinement_message_2, client=client, pretty_print=pretty_print)
+    refined_story_2 = refine_and_record(current_session_id, refinement_message_2, client=client, pretty_print=pretty_print)
 
     print("\n--- Second Refinement Turn ---")
     print(refined_story_2)
+
+    print(f"\n{len(session_history.history(current_session_id))} messages saved for session {current_session_id}")
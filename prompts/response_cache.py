@@ -0,0 +1,158 @@
+# response_cache.py
+# Disk-backed cache of model responses for deterministic (temperature 0)
+# calls: generate_user_story and refine_field with the same instruction,
+# model and parameters return the stored text instead of paying full model
+# latency again. Makes repeated demos and regression runs near-instant.
+#
+# Entries live in SQLite (WAL, shareable by several workers) under a
+# namespace, e.g. one per project, so a project's entries can be invalidated
+# together. Keys hash the whitespace-normalized messages, the model and the
+# request parameters. Entries expire after `ttl` seconds, and the least
+# recently used are evicted beyond `max_entries` / `max_bytes`.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", "llm_cache.db")
+DEFAULT_TTL = 30 * 24 * 3600       # seconds
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_BYTES = 256 << 20      # total size of cached responses
+DEFAULT_NAMESPACE = "default"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def normalize_prompt(text: str) -> str:
+    """Collapse whitespace runs, so re-indented prompt templates hit the same entry."""
+    return " ".join(text.split())
+
+
+def response_key(messages: List[Dict[str, Any]], model: str, params: Dict[str, Any]) -> str:
+    """Hash of the normalized messages, model and request parameters."""
+    doc = {
+        "messages": [{**m, "content": normalize_prompt(m["content"])} if isinstance(m.get("content"), str) else m
+                     for m in messages],
+        "model": model,
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(doc, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Namespaced, size-bounded response cache with TTL. Thread-safe; several
+    processes may share one file.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, *, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("max_entries and max_bytes must be >= 1.")
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE namespace = ? AND key = ?",
+                                     (namespace, key)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE namespace = ? AND key = ?", (namespace, key))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                               (now, namespace, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str, namespace: str = DEFAULT_NAMESPACE) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                             (namespace, key, value, size, now, now))
+                self._evict()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        conn = self._conn
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Least recently used first until both limits hold
+        drop = []
+        for ns, key, size in conn.execute("SELECT namespace, key, size FROM responses ORDER BY accessed_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            drop.append((ns, key))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE namespace = ? AND key = ?", drop)
+        self.evictions += len(drop)
+
+    def invalidate(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        """Delete one entry, a namespace, or (no arguments) everything; returns how many."""
+        where, args = [], []
+        if namespace is not None:
+            where.append("namespace = ?")
+            args.append(namespace)
+        if key is not None:
+            where.append("key = ?")
+            args.append(key)
+        sql = "DELETE FROM responses" + (" WHERE " + " AND ".join(where) if where else "")
+        with self._lock:
+            return self._conn.execute(sql, args).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
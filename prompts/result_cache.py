@@ -0,0 +1,152 @@
+# result_cache.py
+# Bounded, content-addressed LRU cache for early_evals / estimate_points_v1 results.
+# The React flow re-submits unchanged stories (undo, version restore, re-open);
+# a repeat costs one canonical hash instead of a full evaluation.
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+from typing import Any, Callable, Dict, Optional
+
+import early_evals as _early_evals
+import story_point_estimator as _estimator
+from early_evals import EvalResult, Story
+from story_point_estimator import EstimationResult
+
+CACHE_FILE_VERSION = 1
+_MISSING = object()  # get() default that can't be confused with a cached None
+
+
+def _clone_json(obj: Any) -> Any:
+    """deepcopy for JSON-shaped data (dict/list/scalars); other objects are shared."""
+    if isinstance(obj, dict):
+        return {k: _clone_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_clone_json(v) for v in obj]
+    return obj
+
+
+def story_key(story: Any) -> str:
+    """Canonical content hash of a story dict (or dataclass), like build_suggestion's _sha."""
+    if is_dataclass(story) and not isinstance(story, type):
+        story = asdict(story)
+    return hashlib.sha256(json.dumps(story, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache with a size limit and hit/miss counters. Values must be
+    JSON-serializable so the cache can be saved and reloaded across worker
+    restarts (save()/load()). Not thread-safe: use one cache per worker.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1.")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def get(self, key: str, default: Any = None) -> Optional[Any]:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], *, copy: bool = False) -> Any:
+        """
+        Cached value for `key`, computing and storing it on a miss.
+
+        The stored value itself is returned and is shared by every later hit:
+        treat it as read-only. Pass copy=True to get a private deep copy to mutate.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            # Results may share values with the caller's story; store a private copy
+            value = _clone_json(compute())
+            self.put(key, value)
+        return _clone_json(value) if copy else value
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def save(self, path: str) -> None:
+        """Write entries (oldest first) as JSON; atomic, so a crash never leaves a torn file."""
+        payload = {"version": CACHE_FILE_VERSION, "max_size": self.max_size,
+                   "entries": list(self._data.items())}
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str, max_size: Optional[int] = None) -> "ResultCache":
+        """Rebuild a cache from save(); a missing file yields an empty cache."""
+        try:
+            with open(path, encoding="utf-8") as fh:
+                payload = json.load(fh)
+        except FileNotFoundError:
+            return cls(max_size or 1024)
+        if payload.get("version") != CACHE_FILE_VERSION:
+            raise ValueError(f"Unsupported cache file version: {payload.get('version')!r}")
+        cache = cls(max_size or payload["max_size"])
+        for key, value in payload["entries"]:
+            cache.put(key, value)
+        cache.evictions = 0
+        return cache
+
+
+# Default per-process cache shared by the wrappers below
+default_cache = ResultCache()
+
+
+def cached_early_evals(story: Story, cache: Optional[ResultCache] = None, *, copy: bool = False) -> EvalResult:
+    """early_evals() through the cache; keyed by story content and the current rule config. Read-only unless copy=True."""
+    cache = default_cache if cache is None else cache
+    key = f"early_evals:{_early_evals.rules_fingerprint()}:{story_key(story)}"
+    return cache.get_or_compute(key, lambda: _early_evals.early_evals(story), copy=copy)
+
+
+def cached_estimate_points(story: _estimator.Story, cache: Optional[ResultCache] = None, *,
+                           copy: bool = False) -> EstimationResult:
+    """estimate_points_v1() through the cache; keyed by story content and the current cues. Read-only unless copy=True."""
+    cache = default_cache if cache is None else cache
+    key = f"estimate_points_v1:{_estimator.rules_fingerprint()}:{story_key(story)}"
+    return cache.get_or_compute(key, lambda: _estimator.estimate_points_v1(story), copy=copy)
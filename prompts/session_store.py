@@ -0,0 +1,307 @@
+# session_store.py
+# Durable chat history for the refinement chat, replacing the module-level
+# `session_history = {}`: embedded SQLite in WAL mode, so several worker
+# processes can share one database file (readers never block the writer).
+#
+# Writes are queued in-process and flushed in one transaction once
+# `batch_size` messages are pending or, by a background timer, `flush_interval`
+# seconds after the oldest pending one (and on flush()/close()). Histories are cached in a bounded LRU; a cached
+# history is validated with one primary-key lookup of the session's message
+# count and only messages appended since (e.g. by another worker) are read.
+# Sessions idle for longer than `ttl` are deleted.
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_DB_PATH = os.environ.get("SESSION_DB_PATH", "sessions.db")
+DEFAULT_TTL = 7 * 24 * 3600        # seconds a session may sit idle
+DEFAULT_CACHE_SIZE = 256           # histories kept in memory per process
+DEFAULT_BATCH_SIZE = 16            # pending messages that trigger a flush
+DEFAULT_FLUSH_INTERVAL = 0.5       # seconds before pending messages are flushed anyway
+CLEANUP_INTERVAL = 600             # seconds between automatic TTL sweeps
+
+Message = Dict[str, Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    n_messages INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class SessionStore:
+    """
+    Chat histories by session id: append() a message, history() to read the
+    messages in order. A process sees its own pending writes immediately;
+    other processes see them after the next flush. Thread-safe.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, *, ttl: float = DEFAULT_TTL,
+                 cache_size: int = DEFAULT_CACHE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        if cache_size < 1 or batch_size < 1:
+            raise ValueError("cache_size and batch_size must be >= 1.")
+        self.path = path
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; safe with WAL
+        self._conn.executescript(_SCHEMA)
+        self._cache: "OrderedDict[str, List[Message]]" = OrderedDict()
+        self._pending: List[Tuple[str, Message, float]] = []
+        self._oldest_pending = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._last_cleanup = time.time()
+        self._closed = False
+
+    def __enter__(self) -> "SessionStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # -- writes --------------------------------------------------------------
+
+    def append(self, session_id: str, role: str, content: str) -> None:
+        self.extend(session_id, [{"role": role, "content": content}])
+
+    def extend(self, session_id: str, messages: List[Message]) -> None:
+        """Queue messages ({"role", "content"}) for a session."""
+        now = time.time()
+        with self._lock:
+            if not self._pending:
+                self._oldest_pending = now
+            for m in messages:
+                self._pending.append((session_id, {"role": m["role"], "content": m["content"]}, now))
+            if len(self._pending) >= self.batch_size or now - self._oldest_pending >= self.flush_interval:
+                self.flush()
+            else:
+                self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._closed or not self._pending:
+                return
+            try:
+                self.flush()
+            except sqlite3.Error:
+                self._schedule_flush()  # still queued: retry later
+
+    def flush(self) -> None:
+        """Write all pending messages in one transaction."""
+        with self._lock:
+            if self._pending:
+                pending, self._pending = self._pending, []
+                try:
+                    self._write(pending)
+                except sqlite3.Error:
+                    self._pending = pending + self._pending
+                    raise
+            if time.time() - self._last_cleanup >= CLEANUP_INTERVAL:
+                self.cleanup()
+
+    def _write(self, pending: List[Tuple[str, Message, float]]) -> None:
+        by_session: Dict[str, List[Tuple[Message, float]]] = {}
+        for sid, msg, ts in pending:
+            by_session.setdefault(sid, []).append((msg, ts))
+        conn = self._conn
+        # IMMEDIATE: take the write lock up front so concurrent workers can't
+        # allocate the same seq numbers
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sid, items in by_session.items():
+                row = conn.execute("SELECT n_messages FROM sessions WHERE session_id = ?", (sid,)).fetchone()
+                n = row[0] if row else 0
+                conn.executemany(
+                    "INSERT INTO messages (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(sid, n + i, m["role"], m["content"], ts) for i, (m, ts) in enumerate(items)])
+                last = items[-1][1]
+                conn.execute(
+                    "INSERT INTO sessions (session_id, created_at, updated_at, n_messages) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (session_id) DO UPDATE SET updated_at = excluded.updated_at, "
+                    "n_messages = excluded.n_messages",
+                    (sid, items[0][1], last, n + len(items)))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._pending = [p for p in self._pending if p[0] != session_id]
+            self._cache.pop(session_id, None)
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def cleanup(self, now: Optional[float] = None) -> int:
+        """Delete sessions idle for longer than the TTL; returns how many."""
+        cutoff = (time.time() if now is None else now) - self.ttl
+        with self._lock:
+            self._last_cleanup = time.time()
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = [r[0] for r in conn.execute(
+                    "SELECT session_id FROM sessions WHERE updated_at < ?", (cutoff,))]
+                conn.executemany("DELETE FROM messages WHERE session_id = ?", [(s,) for s in expired])
+                conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            for sid in expired:
+                self._cache.pop(sid, None)
+            return len(expired)
+
+    # -- reads ---------------------------------------------------------------
+
+    def history(self, session_id: str) -> List[Message]:
+        """All messages of a session in order (a copy; [] for unknown sessions)."""
+        with self._lock:
+            stored = self._stored(session_id)
+            out = [dict(m) for m in stored]
+            out.extend(dict(m) for sid, m, _ in self._pending if sid == session_id)
+            return out
+
+    def _stored(self, session_id: str) -> List[Message]:
+        conn = self._conn
+        cached = self._cache.get(session_id)
+        # One read transaction: the count and the rows come from the same snapshot
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute("SELECT n_messages FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            n = row[0] if row else 0
+            if cached is None or len(cached) > n:  # unknown, or deleted/expired elsewhere
+                cached = []
+            if len(cached) < n:
+                cached = cached + [{"role": r, "content": c} for r, c in conn.execute(
+                    "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? ORDER BY seq",
+                    (session_id, len(cached)))]
+        finally:
+            conn.execute("COMMIT")
+        if n:
+            self._cache[session_id] = cached
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.pop(session_id, None)
+        return cached
+
+    def __contains__(self, session_id: str) -> bool:
+        return bool(self.history(session_id))
+
+    # -- dict-style access, as with the old `session_history = {}` -----------
+
+    def __getitem__(self, session_id: str) -> List[Message]:
+        """history() of a known session; KeyError otherwise. A copy: assign it back to store changes."""
+        messages = self.history(session_id)
+        if not messages:
+            raise KeyError(session_id)
+        return messages
+
+    def get(self, session_id: str, default: Any = None) -> Any:
+        return self.history(session_id) or default
+
+    def __setitem__(self, session_id: str, messages: List[Message]) -> None:
+        """Replace a session's history with `messages`."""
+        with self._lock:
+            self.delete(session_id)
+            self.extend(session_id, messages)
+
+    def __delitem__(self, session_id: str) -> None:
+        with self._lock:
+            if session_id not in self:
+                raise KeyError(session_id)
+            self.delete(session_id)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            try:
+                self.flush()
+            finally:
+                self._conn.close()
+                self._closed = True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions, messages = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(n_messages), 0) FROM sessions").fetchone()
+            return {"sessions": sessions, "messages": messages, "pending": len(self._pending),
+                    "cached": len(self._cache), "path": self.path}
+
+
+class LazySessionStore:
+    """
+    A SessionStore opened on first use and closed at interpreter exit, for
+    module-level globals: importing the module creates no database. Forwards
+    attribute and dict-style access to the store.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._args = args
+        self._kwargs = kwargs
+        self._store: Optional[SessionStore] = None
+        self._lock = threading.Lock()
+
+    def store(self) -> SessionStore:
+        with self._lock:
+            if self._store is None:
+                self._store = SessionStore(*self._args, **self._kwargs)
+                atexit.register(self._store.close)  # flush batched writes
+            return self._store
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.store(), name)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.store()
+
+    def __getitem__(self, session_id: str) -> List[Message]:
+        return self.store()[session_id]
+
+    def __setitem__(self, session_id: str, messages: List[Message]) -> None:
+        self.store()[session_id] = messages
+
+    def __delitem__(self, session_id: str) -> None:
+        del self.store()[session_id]
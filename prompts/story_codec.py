@@ -0,0 +1,254 @@
+# story_codec.py
+# Compact binary encoding for suggestions (build_suggestion output) and
+# version records, replacing indented JSON in the audit trail.
+#
+# A tagged binary format with varint lengths and a per-record string table:
+# the first occurrence of a short string is written once and later ones as a
+# 1-2 byte reference. The table starts preloaded with the keys and values
+# every story, patch op and suggestion repeats ("acceptance_criteria", "op",
+# "replace", "metadata", "model", ...), so these cost one byte even on first
+# use. Records are self-contained (any one decodes on its own); stream
+# helpers frame records with a length prefix for append-only logs.
+#
+# Data model is JSON's: dict (str keys), list/tuple, str, int, float, bool,
+# None. Like json, a tuple decodes as a list.
+
+import struct
+import zlib
+from typing import IO, Any, Dict, Iterator, List, Tuple
+
+MAGIC = b"LSC"
+FORMAT_VERSION = 1
+INTERN_MAX_LEN = 64          # strings up to this many characters go in the string table
+COMPRESS_MIN_BYTES = 1024    # compress=True only deflates bodies at least this large
+
+# Preloaded string table (format version 1). Append only: indexes are part of the format.
+PRESET_STRINGS = (
+    "id", "title", "description", "acceptance_criteria", "story_points", "tags",
+    "definition_of_done", "dev_notes", "status", "iteration",
+    "scope", "field_name", "before", "after", "diff", "metadata", "base_hash",
+    "created_at", "model", "temperature", "retrieval_used",
+    "op", "path", "value", "from", "text_diff",
+    "add", "remove", "replace", "move", "copy", "test", "=", "-", "+",
+    "full", "field", "version", "meta", "keyframe", "patch",
+    "gpt-5", "gpt-4o",
+)
+
+_T_NONE, _T_FALSE, _T_TRUE, _T_INT, _T_NEG, _T_FLOAT, _T_STR, _T_REF, _T_LIST, _T_DICT = range(10)
+_FLAG_ZLIB = 1
+
+_pack_double = struct.Struct("<d").pack
+_unpack_double = struct.Struct("<d").unpack_from
+
+
+class CodecError(ValueError):
+    """Data is not valid story_codec output."""
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _encode(value: Any) -> bytes:
+    out = bytearray()
+    table: Dict[str, int] = {s: i for i, s in enumerate(PRESET_STRINGS)}
+    write_varint = _write_varint
+
+    def enc_str(s: str) -> None:
+        ref = table.get(s)
+        if ref is not None:
+            out.append(_T_REF)
+            write_varint(out, ref)
+            return
+        if len(s) <= INTERN_MAX_LEN:
+            table[s] = len(table)
+        data = s.encode("utf-8")
+        out.append(_T_STR)
+        write_varint(out, len(data))
+        out.extend(data)
+
+    def enc(v: Any) -> None:
+        t = type(v)
+        if t is str:
+            enc_str(v)
+        elif t is dict:
+            out.append(_T_DICT)
+            write_varint(out, len(v))
+            for k, x in v.items():
+                if type(k) is not str:
+                    raise TypeError(f"Dict keys must be strings, not {type(k).__name__}.")
+                enc_str(k)
+                enc(x)
+        elif t is list or t is tuple:
+            out.append(_T_LIST)
+            write_varint(out, len(v))
+            for x in v:
+                enc(x)
+        elif v is None:
+            out.append(_T_NONE)
+        elif t is bool:
+            out.append(_T_TRUE if v else _T_FALSE)
+        elif t is int:
+            if v >= 0:
+                out.append(_T_INT)
+                write_varint(out, v)
+            else:
+                out.append(_T_NEG)
+                write_varint(out, -v - 1)
+        elif t is float:
+            out.append(_T_FLOAT)
+            out.extend(_pack_double(v))
+        else:
+            raise TypeError(f"Cannot encode {t.__name__}.")
+
+    enc(value)
+    return bytes(out)
+
+
+def dumps(value: Any, *, compress: bool = False) -> bytes:
+    """
+    Encode JSON-shaped data. compress=True additionally deflates bodies of
+    COMPRESS_MIN_BYTES or more (worth it for full before/after suggestions).
+    """
+    body = _encode(value)
+    flags = 0
+    if compress and len(body) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(body, 6)
+        if len(packed) < len(body):
+            body, flags = packed, _FLAG_ZLIB
+    return MAGIC + bytes((FORMAT_VERSION, flags)) + body
+
+
+def loads(data: bytes) -> Any:
+    """Decode the output of dumps()."""
+    if len(data) < 5 or data[:3] != MAGIC:
+        raise CodecError("Not story_codec data.")
+    if data[3] != FORMAT_VERSION:
+        raise CodecError(f"Unsupported format version: {data[3]}")
+    body = data[5:]
+    if data[4] & _FLAG_ZLIB:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as e:
+            raise CodecError(f"Corrupt compressed body: {e}") from e
+    try:
+        value, pos = _decode(body)
+    except (IndexError, UnicodeDecodeError, struct.error) as e:
+        raise CodecError(f"Truncated or corrupt data: {e}") from e
+    if pos != len(body):
+        raise CodecError("Trailing bytes after value.")
+    return value
+
+
+def _decode(buf: bytes) -> Tuple[Any, int]:
+    table: List[str] = list(PRESET_STRINGS)
+    intern = table.append
+    pos = 0
+
+    def varint() -> int:
+        nonlocal pos
+        n, shift = 0, 0
+        while True:
+            b = buf[pos]
+            pos += 1
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def string(tag: int) -> str:
+        # Tag already consumed; one-byte varints (the common case) read inline
+        nonlocal pos
+        n = buf[pos]
+        if n < 0x80:
+            pos += 1
+        else:
+            n = varint()
+        if tag == _T_REF:
+            if n >= len(table):
+                raise CodecError(f"Bad string reference: {n}")
+            return table[n]
+        end = pos + n
+        if end > len(buf):
+            raise IndexError("string past end of data")
+        s = buf[pos:end].decode("utf-8")
+        pos = end
+        if len(s) <= INTERN_MAX_LEN:
+            intern(s)
+        return s
+
+    def dec() -> Any:
+        nonlocal pos
+        tag = buf[pos]
+        pos += 1
+        if tag == _T_REF or tag == _T_STR:
+            return string(tag)
+        if tag == _T_DICT or tag == _T_LIST:
+            n = buf[pos]
+            if n < 0x80:
+                pos += 1
+            else:
+                n = varint()
+            if tag == _T_LIST:
+                return [dec() for _ in range(n)]
+            out = {}
+            for _ in range(n):
+                ktag = buf[pos]
+                pos += 1
+                if ktag != _T_REF and ktag != _T_STR:
+                    raise CodecError("Dict key is not a string.")
+                k = string(ktag)
+                out[k] = dec()
+            return out
+        if tag == _T_INT:
+            return varint()
+        if tag == _T_NEG:
+            return -varint() - 1
+        if tag == _T_FLOAT:
+            (v,) = _unpack_double(buf, pos)
+            pos += 8
+            return v
+        if tag == _T_NONE:
+            return None
+        if tag == _T_TRUE:
+            return True
+        if tag == _T_FALSE:
+            return False
+        raise CodecError(f"Unknown tag: {tag}")
+
+    value = dec()
+    return value, pos
+
+
+# --- Record streams (append-only audit logs) ---
+
+def write_record(fp: IO[bytes], value: Any, *, compress: bool = False) -> int:
+    """Append one length-prefixed record; returns the bytes written."""
+    data = dumps(value, compress=compress)
+    header = bytearray()
+    _write_varint(header, len(data))
+    fp.write(bytes(header) + data)
+    return len(header) + len(data)
+
+
+def iter_records(fp: IO[bytes]) -> Iterator[Any]:
+    """Decode records written by write_record, in order."""
+    while True:
+        n, shift = 0, 0
+        while True:
+            b = fp.read(1)
+            if not b:
+                if shift:
+                    raise CodecError("Truncated record header.")
+                return
+            n |= (b[0] & 0x7F) << shift
+            if b[0] < 0x80:
+                break
+            shift += 7
+        data = fp.read(n)
+        if len(data) != n:
+            raise CodecError("Truncated record.")
+        yield loads(data)
@@ -0,0 +1,84 @@
+# story_fixtures.py
+# Seeded synthetic stories shared by the unit tests and the benchmarks
+# (bench_suite, bench_early_evals). The same (n, spec, seed) always yields
+# the same corpus, so test expectations and benchmark results are stable.
+
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+Story = Dict[str, Any]
+
+_VERBS = ["Display", "Validate", "Send", "Log", "Reject", "Store", "Allow", "Show", "Users can", "Ideally"]
+_OBJECTS = ["a success message", "the reset email", "password complexity", "every login attempt",
+            "the audit record", "invalid tokens", "the order summary", "search results",
+            "the export file", "a lockout notice", "the session cookie", "the retry banner"]
+_TAILS = ["within 2 seconds", "for up to 5 retries", "and so on", "in a user-friendly way",
+          "with at least 12 characters", "", "for 3 fields", "if it should", "when the API is unknown"]
+_SENTENCES = ["As a user, I want to manage my account so that I stay secure.",
+              "The flow should integrate with the external identity provider.",
+              "Then the user can submit the form and verify the result.",
+              "Details of the retry policy are TBD.",
+              "Errors are logged for the support team."]
+_TAGS = ["security", "chatgpt", "ai-story-gen", "account mgmt", "ux", "backend"]
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Shape of each synthetic story; ranges are inclusive (lo, hi)."""
+    ac_count: Tuple[int, int] = (3, 8)
+    desc_sentences: Tuple[int, int] = (1, 4)
+    tag_noise: float = 0.3   # chance a tag gets case/whitespace noise or is repeated
+    dup_rate: float = 0.1    # chance an AC restates an earlier one (case/spacing changed)
+
+
+# Per-story input sizes benchmarked by default
+SIZES: Dict[str, CorpusSpec] = {
+    "small": CorpusSpec(ac_count=(2, 4), desc_sentences=(1, 2)),
+    "medium": CorpusSpec(ac_count=(8, 12), desc_sentences=(4, 6)),
+    "large": CorpusSpec(ac_count=(40, 60), desc_sentences=(20, 30)),
+}
+
+
+def _noisy(rng: random.Random, text: str) -> str:
+    return rng.choice([text.upper(), f"  {text} ", text.replace(" ", "  "), text.title()])
+
+
+def make_story(rng: random.Random, i: int, spec: CorpusSpec) -> Story:
+    acs: List[str] = []
+    for _ in range(rng.randint(*spec.ac_count)):
+        if acs and rng.random() < spec.dup_rate:
+            acs.append(_noisy(rng, rng.choice(acs)))
+        else:
+            acs.append(f"{rng.choice(_VERBS)} {rng.choice(_OBJECTS)} {rng.choice(_TAILS)}".strip() + ".")
+    tags: List[str] = []
+    for tag in rng.sample(_TAGS, rng.randint(1, 4)):
+        if rng.random() < spec.tag_noise:
+            tags.append(_noisy(rng, tag))
+            if rng.random() < 0.5:
+                tags.append(tag)
+        else:
+            tags.append(tag)
+    return {
+        "id": f"S-{i}",
+        "title": f"  Story {i}: {rng.choice(_OBJECTS)} ",
+        "description": " ".join(rng.choice(_SENTENCES) for _ in range(rng.randint(*spec.desc_sentences))),
+        "acceptance_criteria": acs,
+        "story_points": rng.choice([1, 2, 3, 5, 8, 13, 21]),
+        "tags": tags,
+    }
+
+
+def make_corpus(n: int, spec: CorpusSpec = CorpusSpec(), *, seed: int = 7) -> List[Story]:
+    """`n` synthetic stories; the same (n, spec, seed) always yields the same corpus."""
+    rng = random.Random(seed)
+    return [make_story(rng, i, spec) for i in range(n)]
+
+
+def revise_story(rng: random.Random, story: Story) -> Story:
+    """A plausible refinement of `story` (title edit, one AC rewritten, one appended, a tag added)."""
+    acs = list(story["acceptance_criteria"])
+    acs[rng.randrange(len(acs))] = f"{rng.choice(_VERBS)} {rng.choice(_OBJECTS)} within 1 second."
+    acs.append("Log every failed attempt.")
+    return {**story, "title": story["title"].strip() + " (refined)", "acceptance_criteria": acs,
+            "tags": story["tags"] + ["refined"]}
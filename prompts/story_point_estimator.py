@@ -0,0 +1,142 @@
+# story_point_estimator.py
+# The estimator (types + estimate_points_v1). Single source: the scaffold's
+# estimator_v1 section (story_point_estimator_scaffolding.py) imports it from here. Full Fibonacci (1–21); 13/21 → "too large for one sprint—must split".
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Literal, Optional, Tuple, TypedDict
+import hashlib
+import re
+
+from lexicon_matcher import LexiconMatcher, literal_entries
+
+Fibonacci = Literal[1, 2, 3, 5, 8, 13, 21]
+UnknownLevel = Literal["low", "med", "high"]
+
+
+@dataclass
+class Story:
+    title: str
+    description: str
+    acceptance_criteria: List[str]
+    attachments: List[str] | None = None
+    tags: List[str] | None = None
+    id: str | None = None  # local or ADO id
+
+
+class EstimationComponents(TypedDict):
+    duration: int
+    complexity: int
+
+
+class ComplexityBreakdown(TypedDict):
+    steps: int
+    unknowns: UnknownLevel
+
+
+class EstimationResult(TypedDict):
+    points: Fibonacci
+    components: EstimationComponents
+    complexity_breakdown: ComplexityBreakdown
+    rationale: str
+    advisories: List[str]
+
+
+FIB_SEQUENCE: List[Fibonacci] = [1, 2, 3, 5, 8, 13, 21]
+
+# Substrings hinting at unknowns (customize for your org; call configure_unknown_cues)
+UNKNOWN_CUES = [
+    "tbd",
+    "unknown",
+    "investigate",
+    "spike",
+    "blocked",
+    "requires access",
+    "integrate",
+    "dependency",
+    "external",
+    "not defined",
+    "new pattern",
+]
+
+_UNKNOWN_MATCHER = LexiconMatcher({"unknown": literal_entries(UNKNOWN_CUES)})
+
+
+def configure_unknown_cues(cues: List[str]) -> None:
+    """Replace the unknown-cue lexicon and rebuild its matcher."""
+    global UNKNOWN_CUES, _UNKNOWN_MATCHER
+    UNKNOWN_CUES = list(cues)
+    _UNKNOWN_MATCHER = LexiconMatcher({"unknown": literal_entries(UNKNOWN_CUES)})
+
+
+_fingerprint_memo: Tuple[Optional[List[str]], str] = (None, "")  # (cue list hashed, its fingerprint)
+
+
+def rules_fingerprint() -> str:
+    """Short hash of the current unknown cues; changes whenever estimates could."""
+    global _fingerprint_memo
+    # configure_unknown_cues installs a new list, so identity tells whether to rehash
+    if _fingerprint_memo[0] is not UNKNOWN_CUES:
+        _fingerprint_memo = (UNKNOWN_CUES, hashlib.sha256(repr(UNKNOWN_CUES).encode("utf-8")).hexdigest()[:12])
+    return _fingerprint_memo[1]
+
+
+def _map_to_fibonacci(score: int) -> Fibonacci:
+    for f in FIB_SEQUENCE:
+        if score <= f:
+            return f
+    return 21
+
+
+def _classify_unknowns(text: str, acs: List[str]) -> UnknownLevel:
+    # One scan over description + ACs; hits = number of distinct cues present
+    hits = len(_UNKNOWN_MATCHER.scan(text + " " + " ".join(acs))["unknown"])
+    if hits >= 3:
+        return "high"
+    if hits == 2:
+        return "med"
+    return "low"
+
+
+def _count_steps(description: str, acs: List[str]) -> int:
+    # Simple proxy: AC count + imperative-like hints in description
+    hints = re.findall(r"\b(then|and|next|verify|click|enter|submit)\b", description, flags=re.I)
+    return len(acs) + min(len(hints), 5)
+
+
+def estimate_points_v1(story: Story) -> EstimationResult:
+    steps = _count_steps(story.description, story.acceptance_criteria)
+    unknowns = _classify_unknowns(story.description, story.acceptance_criteria)
+
+    # Duration proxy: more ACs ~ more time; gentle scaling
+    duration = max(1, round(len(story.acceptance_criteria) * 0.8))
+
+    # Complexity: steps + unknowns weighting (low=0, med=1, high=3)
+    unknown_weight = 3 if unknowns == "high" else 1 if unknowns == "med" else 0
+    complexity = max(0, round(steps * 0.6) + unknown_weight)
+
+    points = _map_to_fibonacci(duration + complexity)  # full Fibonacci; may be 13 or 21
+
+    advisories: List[str] = []
+    if points >= 13:
+        advisories.append("Too large for one sprint—must split")
+    elif points > 8:
+        advisories.append("Consider splitting: baseline > 8 points")
+    if unknowns == "high":
+        advisories.append("Unknowns high: add clarifications / DoR checks")
+    if points == 1:
+        advisories.append("Very small: consider batching with adjacent work")
+
+    rationale = (
+        f"Duration ≈ {duration}; Complexity ≈ {complexity} "
+        f"(steps={steps}, unknowns={unknowns}). Estimate={points}."
+    )
+
+    result: EstimationResult = {
+        "points": points,
+        "components": {"duration": duration, "complexity": complexity},
+        "complexity_breakdown": {"steps": steps, "unknowns": unknowns},
+        "rationale": rationale,
+        "advisories": advisories,
+    }
+    return result
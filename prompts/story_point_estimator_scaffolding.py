@@ -49,94 +49,16 @@ class DriftAssessment(TypedDict):
 # ============================================================================
 # File: src/estimators/story_points/estimator_v1.py
 # ============================================================================
-from __future__ import annotations
-import re
-from typing import List
-from ..types.story_types import (
-    Story,
-    EstimationResult,
-    EstimationComponents,
-    ComplexityBreakdown,
-    Fibonacci,
-    UnknownLevel,
+# Single source: prompts/story_point_estimator.py (importable and tested).
+# Copy that module here when materializing the scaffold; the estimator is
+# not maintained twice.
+from story_point_estimator import (  # noqa: F401
+    FIB_SEQUENCE,
+    UNKNOWN_CUES,
+    configure_unknown_cues,
+    estimate_points_v1,
 )
 
-FIB_SEQUENCE: List[Fibonacci] = [1, 2, 3, 5, 8, 13, 21]
-
-
-def _map_to_fibonacci(score: int) -> Fibonacci:
-    for f in FIB_SEQUENCE:
-        if score <= f:
-            return f
-    return 21
-
-
-def _classify_unknowns(text: str, acs: List[str]) -> UnknownLevel:
-    hay = (text + " " + " ".join(acs)).lower()
-    unknown_cues = [
-        "tbd",
-        "unknown",
-        "investigate",
-        "spike",
-        "blocked",
-        "requires access",
-        "integrate",
-        "dependency",
-        "external",
-        "not defined",
-        "new pattern",
-    ]
-    hits = sum(1 for c in unknown_cues if c in hay)
-    if hits >= 3:
-        return "high"
-    if hits == 2:
-        return "med"
-    return "low"
-
-
-def _count_steps(description: str, acs: List[str]) -> int:
-    # Simple proxy: AC count + imperative-like hints in description
-    hints = re.findall(r"\b(then|and|next|verify|click|enter|submit)\b", description, flags=re.I)
-    return len(acs) + min(len(hints), 5)
-
-
-def estimate_points_v1(story: Story) -> EstimationResult:
-    steps = _count_steps(story.description, story.acceptance_criteria)
-    unknowns = _classify_unknowns(story.description, story.acceptance_criteria)
-
-    # Duration proxy: more ACs ~ more time; gentle scaling
-    duration = max(1, round(len(story.acceptance_criteria) * 0.8))
-
-    # Complexity: steps + unknowns weighting (low=0, med=1, high=3)
-    unknown_weight = 3 if unknowns == "high" else 1 if unknowns == "med" else 0
-    complexity = max(0, round(steps * 0.6) + unknown_weight)
-
-    points = _map_to_fibonacci(duration + complexity)  # full Fibonacci; may be 13 or 21
-
-    advisories: List[str] = []
-    if points >= 13:
-        advisories.append("Too large for one sprint—must split")
-    elif points > 8:
-        advisories.append("Consider splitting: baseline > 8 points")
-    if unknowns == "high":
-        advisories.append("Unknowns high: add clarifications / DoR checks")
-    if points == 1:
-        advisories.append("Very small: consider batching with adjacent work")
-
-    rationale = (
-        f"Duration ≈ {duration}; Complexity ≈ {complexity} "
-        f"(steps={steps}, unknowns={unknowns}). Estimate={points}."
-    )
-
-    result: EstimationResult = {
-        "points": points,
-        "components": {"duration": duration, "complexity": complexity},
-        "complexity_breakdown": {"steps": steps, "unknowns": unknowns},
-        "rationale": rationale,
-        "advisories": advisories,
-    }
-    return result
-
 
 # ============================================================================
 # File: src/hooks/on_generate_story_success.py
@@ -354,7 +276,8 @@ pythonpath = ["."]
 # 1) Create this structure in your repo:
 #    src/
 #      types/story_types.py
-#      estimators/story_points/estimator_v1.py
+#      estimators/story_points/estimator_v1.py   (copy of prompts/story_point_estimator.py)
+#      text/lexicon_matcher.py   (copy of prompts/lexicon_matcher.py)
 #      hooks/on_generate_story_success.py
 #      hooks/on_restart_story.py
 #      hooks/apply_suggestion.py
@@ -0,0 +1,175 @@
+# story_stream.py
+# Incremental parsing of a story JSON object while the model is still
+# generating it. Instead of waiting for the whole completion and calling
+# json.loads once, StoryStreamParser is fed text deltas as they arrive and
+# reports each top-level field ("title", "description", ...) as soon as its
+# value is complete, and each item of a top-level list ("acceptance_criteria")
+# as soon as that item is complete. The UI can render the title while the
+# criteria are still being written.
+#
+# The parser only tracks structure (nesting, strings, escapes) in one pass
+# over the new text; complete values are decoded with json.loads on their
+# slice. Text before the first "{" (prose, a ```json fence) is skipped. If
+# the output turns out not to be a JSON object the parser stops emitting
+# (failed = True) and the caller falls back to its usual full-text handling.
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+_WHITESPACE = " \t\r\n"
+
+
+class StreamEvent(NamedTuple):
+    kind: str                     # "field" (complete top-level value), "item" (one list element) or "done"
+    field: str
+    value: Any
+    index: Optional[int] = None   # position in the list, for "item"
+    meta: Optional[Dict[str, Any]] = None   # response metadata on "done", e.g. {"prompt_budget": report}
+
+
+class _Frame:
+    __slots__ = ("kind", "open_at", "key", "expect", "start", "count")
+
+    def __init__(self, kind: str, open_at: int):
+        self.kind = kind                                  # "{" or "["
+        self.open_at = open_at                            # offset of the opening bracket
+        self.key: Optional[str] = None                    # current member name (objects)
+        self.expect = "key" if kind == "{" else "value"
+        self.start: Optional[int] = None                  # pending scalar's start offset
+        self.count = 0                                    # completed elements (arrays)
+
+
+class StoryStreamParser:
+    """
+    Feed text with feed(); each call returns the events completed by it.
+    After the closing brace `done` is True and `story` holds every field.
+    """
+
+    def __init__(self):
+        self.buf = ""
+        self.pos = 0
+        self.stack: List[_Frame] = []
+        self.story: dict = {}
+        self.started = False
+        self.done = False
+        self.failed = False
+        self._str_start: Optional[int] = None   # offset of the open string's quote
+        self._escape = False
+
+    def feed(self, text: str) -> List[StreamEvent]:
+        if self.done or self.failed or not text:
+            return []
+        self.buf += text
+        events: List[StreamEvent] = []
+        try:
+            self._scan(events)
+        except ValueError:
+            # Not the JSON object we expected; keep what was emitted and stop
+            self.failed = True
+        return events
+
+    def _scan(self, events: List[StreamEvent]) -> None:
+        buf, stack = self.buf, self.stack
+        pos, end = self.pos, len(buf)
+        if not self.started:
+            brace = buf.find("{", pos)
+            if brace < 0:
+                self.pos = end
+                return
+            self.started = True
+            stack.append(_Frame("{", brace))
+            pos = brace + 1
+        while pos < end:
+            if self._str_start is not None:
+                # Jump to the next quote or backslash inside the string
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                q = buf.find('"', pos)
+                b = buf.find("\\", pos, q if q >= 0 else end)
+                if b >= 0:
+                    self._escape = True
+                    pos = b + 1
+                    continue
+                if q < 0:
+                    pos = end
+                    break
+                start, self._str_start = self._str_start, None
+                pos = q + 1
+                frame = stack[-1]
+                if frame.expect == "key":
+                    frame.key = json.loads(buf[start:pos])
+                    frame.expect = ":"
+                else:
+                    self._complete(start, pos, events)
+                continue
+            c = buf[pos]
+            frame = stack[-1]
+            if c in _WHITESPACE:
+                if frame.expect == "scalar":
+                    self._complete_scalar(pos, events)
+            elif c == '"':
+                if frame.expect not in ("key", "value"):
+                    raise ValueError(f"Unexpected string at offset {pos}")
+                self._str_start = pos
+            elif c == "{" or c == "[":
+                if frame.expect != "value":
+                    raise ValueError(f"Unexpected {c!r} at offset {pos}")
+                stack.append(_Frame(c, pos))
+                frame.expect = "container"
+            elif c == "}" or c == "]":
+                if frame.kind != ("{" if c == "}" else "["):
+                    raise ValueError(f"Unbalanced {c!r} at offset {pos}")
+                if frame.expect == "scalar":
+                    self._complete_scalar(pos, events)
+                stack.pop()
+                if not stack:
+                    self.done = True
+                    pos += 1
+                    break
+                self._complete(frame.open_at, pos + 1, events)
+            elif c == ",":
+                if frame.expect == "scalar":
+                    self._complete_scalar(pos, events)
+                if frame.expect != "next":
+                    raise ValueError(f"Unexpected ',' at offset {pos}")
+                frame.expect = "key" if frame.kind == "{" else "value"
+            elif c == ":":
+                if frame.expect != ":":
+                    raise ValueError(f"Unexpected ':' at offset {pos}")
+                frame.expect = "value"
+            elif frame.expect == "value":
+                frame.start = pos
+                frame.expect = "scalar"
+            elif frame.expect != "scalar":
+                raise ValueError(f"Unexpected {c!r} at offset {pos}")
+            pos += 1
+        self.pos = pos
+
+    def _complete_scalar(self, end: int, events: List[StreamEvent]) -> None:
+        frame = self.stack[-1]
+        start, frame.start = frame.start, None
+        self._complete(start, end, events)
+
+    def _complete(self, start: int, end: int, events: List[StreamEvent]) -> None:
+        """A value spanning buf[start:end] finished inside the frame on top of the stack."""
+        stack = self.stack
+        frame = stack[-1]
+        frame.expect = "next"
+        depth = len(stack)
+        if depth == 1:
+            value = json.loads(self.buf[start:end])
+            self.story[frame.key] = value
+            events.append(StreamEvent("field", frame.key, value))
+        elif depth == 2 and frame.kind == "[":
+            value = json.loads(self.buf[start:end])
+            events.append(StreamEvent("item", stack[0].key, value, frame.count))
+            frame.count += 1
+
+
+def iter_story_events(chunks: Iterable[str], parser: Optional[StoryStreamParser] = None) -> Iterator[StreamEvent]:
+    """Parse an iterable of text deltas, yielding events as they complete."""
+    parser = parser or StoryStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
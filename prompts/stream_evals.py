@@ -0,0 +1,156 @@
+# stream_evals.py
+# Generator pipeline for evaluating story exports of any size with flat memory:
+#   iter_stories(file)  ->  evaluate_stream(...)  ->  StreamStats.observe(...)  ->  output
+#
+# Usage:
+#   python stream_evals.py export.jsonl > results.jsonl      (or: ... < export.json)
+#   Input may be JSONL, concatenated JSON objects, or one top-level JSON array.
+#   Results go to stdout as JSONL; running aggregate stats go to stderr as JSON lines.
+
+import argparse
+import json
+import sys
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from early_evals import EvalResult, Story, apply_quick_fixes, early_evals_many
+
+READ_SIZE = 1 << 16              # characters per read from the source
+MAX_RECORD_CHARS = 16 << 20     # a single story larger than this is treated as corrupt input
+
+_decoder = json.JSONDecoder()
+
+
+def iter_stories(source: TextIO, *, read_size: int = READ_SIZE,
+                 max_record_chars: int = MAX_RECORD_CHARS) -> Iterator[Story]:
+    """
+    Yield story objects one at a time from `source`, reading it in fixed-size
+    pieces. Only the current partial record is buffered, so memory does not
+    grow with the input.
+    """
+    buf, pos, eof = "", 0, False
+    in_array = None  # unknown until the first significant character
+    while True:
+        # Skip separators between records
+        while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+            pos += 1
+        if pos < len(buf) and in_array is None:
+            in_array = buf[pos] == "["
+            if in_array:
+                pos += 1
+                continue
+        if pos < len(buf) and in_array and buf[pos] == "]":
+            return
+        if pos < len(buf):
+            try:
+                obj, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                obj, end = None, None
+            if end is not None:
+                if not isinstance(obj, dict):
+                    raise ValueError(f"Expected a story object, got {type(obj).__name__}.")
+                yield obj
+                pos = end
+                continue
+            if len(buf) - pos > max_record_chars:
+                raise ValueError(f"Record exceeds {max_record_chars} characters; input is corrupt or not JSON.")
+        elif eof:
+            if in_array:
+                raise ValueError("Unterminated JSON array.")
+            return
+        # Need more input: drop consumed text and read the next piece. Reads grow
+        # with the pending partial record so a huge story isn't re-parsed per piece.
+        chunk = source.read(max(read_size, len(buf) - pos))
+        buf, pos = buf[pos:] + chunk, 0
+        eof = not chunk
+
+
+def evaluate_stream(stories: Iterable[Story], *, batch_size: int = 256,
+                    quick_fix: bool = True) -> Iterator[Tuple[Story, EvalResult, Optional[Story]]]:
+    """
+    Yield (story, EvalResult, fixed_story_or_None) per input story, in order.
+    Stories are evaluated with early_evals_many in small batches, so at most
+    `batch_size` stories are held at once.
+    """
+    batch: List[Story] = []
+    for story in stories:
+        batch.append(story)
+        if len(batch) >= batch_size:
+            yield from _evaluate_batch(batch, quick_fix)
+            batch = []
+    if batch:
+        yield from _evaluate_batch(batch, quick_fix)
+
+
+def _evaluate_batch(batch: List[Story], quick_fix: bool) -> Iterator[Tuple[Story, EvalResult, Optional[Story]]]:
+    for story, res in zip(batch, early_evals_many(batch)):
+        yield story, res, apply_quick_fixes(story, res) if quick_fix else None
+
+
+class StreamStats:
+    """Running aggregates over a stream of EvalResults (constant memory in the number of stories)."""
+
+    def __init__(self, bucket_size: int = 10):
+        self.bucket_size = bucket_size
+        self.count = 0
+        self.passed = 0
+        self.score_total = 0
+        self.score_histogram: Counter = Counter()  # bucket start -> stories
+        self.failed_findings: Counter = Counter()  # finding id -> stories where it failed
+
+    def update(self, res: EvalResult) -> None:
+        self.count += 1
+        self.passed += bool(res["ok"])
+        self.score_total += res["score"]
+        # 100 shares the top bucket (90-100)
+        self.score_histogram[min(res["score"], 99) // self.bucket_size * self.bucket_size] += 1
+        self.failed_findings.update(f["id"] for f in res["findings"] if not f["ok"])
+
+    def observe(self, items: Iterable[Tuple[Story, EvalResult, Optional[Story]]]
+                ) -> Iterator[Tuple[Story, EvalResult, Optional[Story]]]:
+        """Pass-through pipeline stage that updates the stats."""
+        for item in items:
+            self.update(item[1])
+            yield item
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "passed": self.passed,
+            "mean_score": round(self.score_total / self.count, 2) if self.count else 0.0,
+            "score_histogram": {f"{b}-{b + self.bucket_size - 1 if b + self.bucket_size < 100 else 100}": n
+                                for b, n in sorted(self.score_histogram.items())},
+            "failed_findings": dict(self.failed_findings.most_common()),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Stream-evaluate a story export (JSONL or JSON array).")
+    parser.add_argument("input", nargs="?", default="-", help="export file (default: stdin)")
+    parser.add_argument("--stats-every", type=int, default=10000,
+                        help="emit running stats to stderr every N stories (0: only at the end)")
+    parser.add_argument("--no-fix", action="store_true", help="skip apply_quick_fixes")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    stats = StreamStats()
+    try:
+        pipeline = stats.observe(evaluate_stream(iter_stories(src), quick_fix=not args.no_fix))
+        for story, res, fixed in pipeline:
+            record = {"id": story.get("id"), "eval": res}
+            if fixed is not None:
+                record["fixed"] = fixed
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if args.stats_every and stats.count % args.stats_every == 0:
+                print(json.dumps(stats.snapshot()), file=sys.stderr)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    print(json.dumps(stats.snapshot()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# struct_hash.py
+# Merkle-style structural hashing for stories. A node's digest combines its
+# children's digests, so a story's digest is built from per-field digests and
+# two stories (or subtrees) are equal exactly when their digests are.
+#
+# String leaves (descriptions, dev notes, AC text) dominate the hashing cost
+# and are immutable, so their digests are cached by content across calls.
+# Dicts and lists are mutable and are re-hashed on every call unless the
+# caller passes a memo: within one pass over data that is not mutated meanwhile
+# (build_suggestion hashing and diffing a before/after pair), each container is
+# hashed once, shared subtrees are not re-hashed, and equal subtrees can be
+# recognised by digest. That replaces json.dumps(sort_keys=True) of the whole
+# before/after pair per suggestion ID.
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+LEAF_CACHE_MIN_LEN = 256            # shorter strings are cheaper to hash than to look up
+LEAF_CACHE_MAX_BYTES = 8 << 20      # total length of cached strings (bounded memory)
+
+
+class _LeafCache:
+    """LRU of string -> digest, bounded by the total length of the cached strings."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def get(self, text: str) -> bytes:
+        d = self._data.get(text)
+        if d is not None:
+            self._data.move_to_end(text)
+            return d
+        d = hashlib.sha256(b"s" + text.encode("utf-8")).digest()
+        if len(text) <= self.max_bytes:
+            self._data[text] = d
+            self.size += len(text)
+            while self.size > self.max_bytes:
+                old, _ = self._data.popitem(last=False)
+                self.size -= len(old)
+        return d
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size = 0
+
+
+_leaf_cache = _LeafCache(LEAF_CACHE_MAX_BYTES)
+
+# Container digests by id; entries hold the container so its id stays unique
+DigestMemo = Dict[int, Tuple[Any, bytes]]
+
+
+def digest(obj: Any, memo: Optional[DigestMemo] = None) -> bytes:
+    """
+    32-byte Merkle digest of JSON-shaped data; dict key order does not matter.
+    With a memo, container digests are stored in it and reused: only valid
+    while none of the memoized containers is mutated.
+    """
+    if isinstance(obj, str):
+        if len(obj) >= LEAF_CACHE_MIN_LEN:
+            return _leaf_cache.get(obj)
+        return hashlib.sha256(b"s" + obj.encode("utf-8")).digest()
+    if isinstance(obj, (dict, list, tuple)):
+        if memo is not None:
+            hit = memo.get(id(obj))
+            if hit is not None:
+                return hit[1]
+        if isinstance(obj, dict):
+            h = hashlib.sha256(b"d")
+            for k in sorted(obj):
+                h.update(digest(str(k)))
+                h.update(digest(obj[k], memo))
+        else:
+            h = hashlib.sha256(b"l")
+            for v in obj:
+                h.update(digest(v, memo))
+        d = h.digest()
+        if memo is not None:
+            memo[id(obj)] = (obj, d)
+        return d
+    # Scalars are type-tagged: "1", 1 and true differ; 1 and 1.0 are the same JSON number
+    if obj is None or isinstance(obj, bool):
+        return hashlib.sha256(b"c" + repr(obj).encode()).digest()
+    if isinstance(obj, float) and obj.is_integer():
+        obj = int(obj)
+    if isinstance(obj, (int, float)):
+        return hashlib.sha256(b"n" + repr(obj).encode()).digest()
+    return hashlib.sha256(b"o" + str(obj).encode("utf-8")).digest()
+
+
+def field_digests(story: Dict[str, Any]) -> Dict[str, bytes]:
+    """Digest of each top-level field."""
+    return {k: digest(v) for k, v in story.items()}
+
+
+def story_hash(story: Any, memo: Optional[DigestMemo] = None) -> str:
+    """Hex Merkle digest of a story (equal to digest(story).hex())."""
+    return digest(story, memo).hex()
+
+
+def clear_cache() -> None:
+    _leaf_cache.clear()
@@ -0,0 +1,22 @@
+# test_bench_suite.py
+
+import json
+
+from bench_suite import BENCHMARKS, compare, run_suite
+from story_fixtures import CorpusSpec, make_corpus
+
+def test_corpus_is_seeded_and_follows_spec():
+    spec = CorpusSpec(ac_count=(5, 5), desc_sentences=(2, 2), tag_noise=1.0, dup_rate=0.5)
+    corpus = make_corpus(50, spec, seed=3)
+    assert corpus == make_corpus(50, spec, seed=3)
+    assert corpus != make_corpus(50, spec, seed=4)
+    assert all(len(s["acceptance_criteria"]) == 5 for s in corpus)
+    # dup_rate re-states earlier criteria with different case/spacing
+    assert any(len({" ".join(a.lower().split()) for a in s["acceptance_criteria"]}) < 5 for s in corpus)
+
+def test_run_suite_reports_every_benchmark_as_json():
+    doc = run_suite(5, sizes=["small"], repeat=1)
+    assert [r["benchmark"] for r in doc["results"]] == list(BENCHMARKS)
+    assert all(r["ops_per_sec"] > 0 and r["peak_kib"] >= 0 for r in doc["results"])
+    again = json.loads(json.dumps(doc))
+    assert {r["ratio"] for r in compare(doc, again)} == {1.0}
@@ -1,6 +1,12 @@
 # test_early_evals.py
 
-from early_evals import early_evals, apply_quick_fixes, REQUIRED_TAGS
+from early_evals import (
+    early_evals, early_evals_incremental, early_evals_many, apply_quick_fixes, configure_lexicons, list_rules,
+    quick_fix_changes, register_rule, unregister_rule, rules_fingerprint, RuleConfig, RuleProfiler,
+    REQUIRED_TAGS,
+)
+from build_suggestion import _diff_dict
+import early_evals as early_evals_module
 
 def test_valid_story_passes():
     story = {
@@ -65,3 +71,162 @@ def test_story_points_out_of_range_warns():
     result = early_evals(story)
     sp_findings = [f for f in result["findings"] if f["id"] == "sp.range"]
     assert sp_findings and sp_findings[0]["ok"] is False
+
+def test_early_evals_many_matches_single_story_results():
+    stories = [
+        {
+            "title": "  Reset password  ",
+            "description": "As a user, I want to reset my password so that I can regain access.",
+            "acceptance_criteria": [
+                "Display a success message within 2 seconds.",
+                "Ideally it should be fast",
+                "Display a success message within 2 seconds",
+            ],
+            "story_points": 5,
+            "tags": [" Security ", "security"],
+        },
+        {"title": 3, "acceptance_criteria": "not a list", "tags": None},
+        {"title": "Export", "description": "", "acceptance_criteria": [], "definition_of_done": ["Docs."]},
+    ]
+    assert early_evals_many(stories) == [early_evals(s) for s in stories]
+    assert early_evals_many([]) == []
+
+def test_incremental_matches_full_reevaluation():
+    before = {
+        "title": "Reset password",
+        "description": "As a user, I want to reset my password so that I can regain access.",
+        "acceptance_criteria": ["Send a reset email", "Validate password"],
+        "story_points": 5,
+        "tags": ["security"],
+    }
+    prior = early_evals(before)
+    edits = [
+        {**before, "title": "  Reset password via email  "},
+        {**before, "acceptance_criteria": ["Ideally be fast"] + before["acceptance_criteria"]},
+        {k: v for k, v in before.items() if k != "tags"},
+        {**before, "definition_of_done": ["Reviewed."], "story_points": 40},
+    ]
+    for after in edits:
+        diff = _diff_dict(before, after)
+        assert early_evals_incremental(after, prior, diff) == early_evals(after)
+
+def test_configure_lexicons_rebuilds_matcher():
+    story = {
+        "title": "Reset password",
+        "description": "As a user, I want to reset my password so that I can regain access.",
+        "acceptance_criteria": ["Send a reset email pronto"],
+        "story_points": 3,
+        "tags": ["chatgpt", "ai-story-gen"],
+    }
+    vague = [f for f in early_evals(story)["findings"] if f["id"] == "ac.vague_ratio"]
+    assert vague[0]["ok"] is True
+    saved = list(early_evals_module._VAGUE_PATTERNS)
+    configure_lexicons(vague=[r"\bpronto\b"])
+    try:
+        vague = [f for f in early_evals(story)["findings"] if f["id"] == "ac.vague_ratio"]
+        assert vague[0]["ok"] is False
+    finally:
+        configure_lexicons(vague=saved)
+
+def test_proposed_fix_is_copy_on_write():
+    story = {
+        "title": "  Reset password  ",
+        "description": "As a user, I want to reset my password so that I can regain access.",
+        "acceptance_criteria": ["Send a reset email", "Validate password"],
+        "story_points": 3,
+        "tags": ["chatgpt", "ai-story-gen"],
+        "attachments": [{"name": "flow.png"}],
+    }
+    result = early_evals(story)
+    fixed = result["proposed_fix"]
+    assert fixed["acceptance_criteria"] is story["acceptance_criteria"]
+    assert fixed["attachments"] is story["attachments"]
+    assert quick_fix_changes(story, result) == {"title": "Reset password"}
+
+    shared = apply_quick_fixes(story, result)
+    assert shared["title"] == "Reset password" and shared["tags"] is story["tags"]
+    copied = apply_quick_fixes(story, result, copy=True)
+    assert copied == shared and copied["tags"] is not story["tags"]
+
+def test_registered_rule_runs_and_is_scored():
+    story = {
+        "title": "Reset password",
+        "description": "As a user, I want to reset my password so that I can regain access.",
+        "acceptance_criteria": ["Send a reset email within 1 minute"],
+        "story_points": 3,
+        "tags": ["chatgpt", "ai-story-gen"],
+    }
+    before = early_evals(story)
+    fingerprint = rules_fingerprint()
+
+    @register_rule("org", fields=("title",), weights={"org.jira_key": 20})
+    def _org_rule(story, fixed, findings, bullet_flags):
+        ok = str(story.get("title", "")).startswith("PROJ-")
+        findings.append({"id": "org.jira_key", "ok": ok, "severity": "warn", "msg": "Title needs a Jira key."})
+
+    try:
+        assert rules_fingerprint() != fingerprint
+        result = early_evals(story)
+        assert result["findings"][-1]["id"] == "org.jira_key"
+        assert result["score"] < before["score"] and result["ok"] is True
+
+        # Per-project config: drop the org rule, or make its failure blocking
+        assert early_evals(story, config=RuleConfig(disabled={"org"})) == before
+        strict = early_evals(story, config=RuleConfig(severities={"org": "error"}))
+        assert strict["ok"] is False
+        assert early_evals(story, config=RuleConfig(weights={"org": 0}))["score"] == before["score"]
+    finally:
+        unregister_rule("org")
+    assert rules_fingerprint() == fingerprint
+
+def test_config_keys_cover_sub_rules_and_zero_weights_score_zero():
+    story = {"title": "Reset password", "description": "Too short", "acceptance_criteria": ["Send email"]}
+    ids = lambda config: {f["id"] for f in early_evals(story, config=config)["findings"]}
+    assert not {i for i in ids(RuleConfig(disabled={"ac"})) if i.startswith("ac.")}
+    only_sub = ids(RuleConfig(disabled={"ac.near_duplicates"}))
+    assert "ac.near_duplicates" not in only_sub and "ac.type" in only_sub
+
+    weights = {r.prefix: 0 for r in list_rules()}
+    assert early_evals(story, config=RuleConfig(weights=weights))["score"] == 0
+
+def test_profiler_records_every_rule():
+    story = {"title": "Reset password", "description": "Too short", "acceptance_criteria": ["Send email"]}
+    profiler = RuleProfiler()
+    early_evals_many([story, story], profiler=profiler)
+    report = profiler.report()
+    assert {r["rule"] for r in report} == {
+        "struct", "title", "desc", "ac", "ac.near_duplicates", "dod", "sp", "tags"}
+    assert all(r["calls"] == 2 for r in report)
+
+def test_near_duplicate_ac_warns_without_touching_score():
+    story = {
+        "title": "Reset password",
+        "description": "As a user, I want to reset my password so that I can regain access.",
+        "acceptance_criteria": ["Display a success message within 2 seconds",
+                                "Show the success message within 2 seconds.", "Send the reset email"],
+        "story_points": 3,
+        "tags": ["chatgpt", "ai-story-gen"],
+    }
+    result = early_evals(story)
+    near = [f for f in result["findings"] if f["id"] == "ac.near_duplicates"]
+    assert near[0]["ok"] is False and "#1/#2" in near[0]["msg"]
+    reworded = dict(story, acceptance_criteria=story["acceptance_criteria"][::2])
+    assert early_evals(reworded)["score"] == result["score"]
+
+def test_rules_fingerprint_tracks_tunables_and_lexicons(monkeypatch):
+    import early_evals as ee
+    fingerprint = rules_fingerprint()
+    assert rules_fingerprint() == fingerprint
+
+    monkeypatch.setattr(ee, "MIN_DESC_LEN", ee.MIN_DESC_LEN + 1)
+    assert rules_fingerprint() != fingerprint
+    monkeypatch.undo()
+    assert rules_fingerprint() == fingerprint
+
+    verbs = list(ee._START_VERBS)
+    try:
+        configure_lexicons(start_verbs=verbs + ["archive"])
+        assert rules_fingerprint() != fingerprint
+    finally:
+        configure_lexicons(start_verbs=verbs)
+    assert rules_fingerprint() == fingerprint
@@ -0,0 +1,42 @@
+# test_evaluate_backlog.py
+
+import io
+import json
+
+import pytest
+
+from early_evals import early_evals
+from evaluate_backlog import evaluate_backlog
+
+STORIES = [
+    {"id": f"S-{i}", "title": f" Story {i} ", "description": "As a user, I want things so that stuff happens.",
+     "acceptance_criteria": ["Display a banner within 2 seconds", "Send a receipt"],
+     "story_points": 3, "tags": ["security"]}
+    for i in range(7)
+]
+
+
+def _run(lines, **kwargs):
+    out = io.StringIO()
+    n = evaluate_backlog(lines, out, **kwargs)
+    return n, [json.loads(row) for row in out.getvalue().splitlines()]
+
+
+def test_pool_output_matches_serial_and_keeps_input_order():
+    lines = [json.dumps(s) + "\n" for s in STORIES] + ["\n", "{broken\n", "[1, 2]\n"]
+    n_serial, serial = _run(lines, workers=1, chunk_size=3)
+    n_pool, pooled = _run(lines, workers=2, chunk_size=3)
+
+    assert n_serial == n_pool == 9
+    assert serial == pooled
+    assert [r["line"] for r in pooled] == [1, 2, 3, 4, 5, 6, 7, 9, 10]
+    assert pooled[0]["eval"] == json.loads(json.dumps(early_evals(STORIES[0])))
+    assert pooled[0]["fixed"]["title"] == "Story 0"
+    assert pooled[0]["estimate"]["points"] in {1, 2, 3, 5, 8, 13, 21}
+    assert "error" in pooled[-2] and "error" in pooled[-1]
+
+
+def test_rejects_non_positive_workers():
+    for workers in (0, -2):
+        with pytest.raises(ValueError):
+            evaluate_backlog([], io.StringIO(), workers=workers)
@@ -0,0 +1,46 @@
+# test_generate_recommendations.py
+
+import pytest
+
+pytest.importorskip("openai")
+
+from generate_recommendations import apply_recommendations
+
+STORY = {
+    "title": "Reset password",
+    "description": "As a user I want to reset my password.",
+    "acceptance_criteria": ["Email sent"],
+    "story_points": 3,
+    "tags": ["auth"],
+}
+
+
+def test_applies_valid_recommendations_in_one_copy():
+    recs = [
+        {"title": "Clarify title", "changes": {"title": "Reset a forgotten password"}},
+        {"title": "Add dev notes", "changes": {"dev_notes": "Use the existing mailer."}},
+        {"title": "Add AC", "changes": [{"op": "add", "path": "/acceptance_criteria/-", "value": "Link expires"}]},
+        {"title": "Same tags", "changes": {"tags": ["auth"]}},
+    ]
+    updated, report = apply_recommendations(STORY, recs)
+    assert [r["status"] for r in report] == ["applied", "applied", "applied", "noop"]
+    assert updated["title"] == "Reset a forgotten password"
+    assert updated["dev_notes"] == "Use the existing mailer."  # new field isn't dropped
+    assert updated["acceptance_criteria"] == ["Email sent", "Link expires"]
+    assert STORY["acceptance_criteria"] == ["Email sent"] and "dev_notes" not in STORY
+
+
+def test_reports_invalid_and_conflicting_recommendations():
+    recs = [
+        {"title": "A", "changes": {"story_points": 5}},
+        {"title": "B", "changes": {"story_points": 8, "title": "New"}},
+        {"title": "C", "changes": {"story_points": 5}},
+        {"title": "D", "changes": {"priority": "high"}},
+        {"title": "E", "changes": {"tags": "auth"}},
+        {"title": "F", "changes": [{"op": "remove", "path": "/missing"}]},
+    ]
+    updated, report = apply_recommendations(STORY, recs)
+    assert [r["status"] for r in report] == ["conflict", "conflict", "conflict", "invalid", "invalid", "invalid"]
+    assert report[1]["conflicts_with"] == [0, 2] and report[1]["fields"] == ["story_points", "title"]
+    assert report[3]["errors"] == ["Unknown field 'priority'."]
+    assert updated == STORY
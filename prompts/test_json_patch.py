@@ -0,0 +1,54 @@
+# test_json_patch.py
+
+import pytest
+from json_patch import JsonPatchError, apply_patch, escape_token, parse_pointer
+
+def test_rfc6902_operations():
+    doc = {"foo": ["bar", "baz"], "a": {"b": {"c": "hello"}}, "q": 1}
+    patch = [
+        {"op": "add", "path": "/foo/1", "value": "qux"},
+        {"op": "add", "path": "/foo/-", "value": "end"},
+        {"op": "remove", "path": "/q"},
+        {"op": "replace", "path": "/a/b/c", "value": 42},
+        {"op": "move", "from": "/a/b/c", "path": "/a/d"},
+        {"op": "copy", "from": "/foo/0", "path": "/copied"},
+        {"op": "test", "path": "/foo", "value": ["bar", "qux", "baz", "end"]},
+    ]
+    assert apply_patch(doc, patch) == {
+        "foo": ["bar", "qux", "baz", "end"], "a": {"b": {}, "d": 42}, "copied": "bar"}
+
+@pytest.mark.parametrize("op", [
+    {"op": "add", "path": "/missing/x", "value": 1},
+    {"op": "remove", "path": "/nope"},
+    {"op": "replace", "path": "/list/5", "value": 1},
+    {"op": "add", "path": "/list/01", "value": 1},
+    {"op": "move", "from": "/obj", "path": "/obj/child"},
+    {"op": "test", "path": "/n", "value": True},  # 1 is not true in JSON
+    {"op": "frobnicate", "path": "/n"},
+    {"op": "add", "path": "no-slash", "value": 1},
+    {"op": "add", "path": "/n"},
+])
+def test_invalid_ops_raise(op):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"list": [1], "obj": {}, "n": 1}, [op])
+
+def test_copy_on_write_shares_untouched_subtrees():
+    doc = {"big": {"text": "x" * 100}, "tags": ["a", "b"], "nested": {"k": [1, 2]}}
+    out = apply_patch(doc, [{"op": "add", "path": "/nested/k/-", "value": 3}])
+    assert doc["nested"]["k"] == [1, 2]
+    assert out["nested"]["k"] == [1, 2, 3]
+    assert out["big"] is doc["big"] and out["tags"] is doc["tags"]
+
+def test_failed_patch_leaves_document_untouched():
+    doc = {"a": [1, 2]}
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, [{"op": "remove", "path": "/a/0"}, {"op": "remove", "path": "/b"}])
+    assert doc == {"a": [1, 2]}
+
+def test_in_place_and_pointer_escaping():
+    doc = {"a/b": 1, "m~n": 2}
+    assert parse_pointer("/" + escape_token("a/b")) == ["a/b"]
+    out = apply_patch(doc, [{"op": "replace", "path": "/a~1b", "value": 3},
+                            {"op": "remove", "path": "/m~0n"}], in_place=True)
+    assert out is doc and doc == {"a/b": 3}
+    assert apply_patch(doc, [{"op": "replace", "path": "", "value": [1]}]) == [1]
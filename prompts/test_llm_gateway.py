@@ -0,0 +1,379 @@
+# test_llm_gateway.py
+# Runs the gateway and the async prompt functions against a local fake
+# chat-completions endpoint (no network, no API key).
+
+import asyncio
+import contextlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("openai")
+
+from generate_recommendations import generate_recommendations_async
+from generate_user_story import (
+    generate_user_story, generate_user_story_async, generate_user_story_stream, generate_user_story_stream_async,
+)
+import llm_gateway
+from llm_gateway import LLMGateway
+from openai import OpenAI
+from prompt_budget import DEFAULT_SECTION_BUDGET
+from refine_field import refine_field, refine_field_async
+from response_cache import ResponseCache
+
+
+class _FakeOpenAI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+    replies = []
+    state = {"active": 0, "max_active": 0, "requests": 0, "clients": set()}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            self.state["active"] += 1
+            self.state["requests"] += 1
+            self.state["max_active"] = max(self.state["max_active"], self.state["active"])
+            self.state["clients"].add(self.client_address)
+        time.sleep(0.05)
+        prompt = body["messages"][-1]["content"]
+        content = next((reply for marker, reply in self.replies if marker in prompt), "{}")
+        if content is None:
+            with self.lock:
+                self.state["active"] -= 1
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if body.get("stream"):
+            self._stream(body, content)
+            return
+        payload = json.dumps({
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+        }).encode()
+        with self.lock:
+            self.state["active"] -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, body, content):
+        # Server-sent events, a few characters per chunk, like the real API
+        with self.lock:
+            self.state["active"] -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = [content[i:i + 8] for i in range(0, len(content), 8)]
+        try:
+            for piece in pieces + [None]:
+                delta = {"content": piece} if piece is not None else {}
+                event = {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0,
+                         "model": body["model"],
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": None if piece else "stop"}]}
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+                time.sleep(0.005)
+            self.state["last_chunk_at"] = time.perf_counter()
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client stopped reading and closed the stream
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _FakeOpenAI.state.update(active=0, max_active=0, requests=0, clients=set())
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_gateway_bounds_concurrency_and_reuses_connections(fake_endpoint):
+    _FakeOpenAI.replies = [("Field: title", json.dumps({"title": "Reset a forgotten password"}))]
+
+    async def main():
+        gateway = LLMGateway(api_key="test", base_url=fake_endpoint, max_concurrency=3)
+        story = {"title": "Reset password"}
+        results = await asyncio.gather(*(
+            refine_field_async(story, "title", f"clearer #{i}", gateway=gateway) for i in range(12)))
+        await gateway.aclose()
+        return results, gateway.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == [{"title": "Reset a forgotten password"}] * 12
+    assert stats["requests"] == 12 and stats["errors"] == 0 and stats["max_in_flight"] == 3
+    assert _FakeOpenAI.state["max_active"] <= 3
+    assert len(_FakeOpenAI.state["clients"]) <= 3  # pooled: 12 requests over at most 3 connections
+
+
+def test_async_variants_parse_model_output(fake_endpoint):
+    _FakeOpenAI.replies = [
+        ("INVEST-quality", json.dumps({"title": "T", "definition_of_done": ["x"]})),
+        ("recommendations", json.dumps({"recommendations": [{"title": "R", "changes": {}}]})),
+    ]
+
+    async def main():
+        gateway = LLMGateway(api_key="test", base_url=fake_endpoint, max_retries=0)
+        story, recs = await asyncio.gather(
+            generate_user_story_async("reset password", {"project_name": "Shop"}, gateway=gateway),
+            generate_recommendations_async({"title": "T"}, gateway=gateway))
+        with pytest.raises(ValueError):
+            await refine_field_async({}, "priority", "x", gateway=gateway)
+        await gateway.aclose()
+        return story, recs
+
+    story, recs = asyncio.run(main())
+    assert story == {"title": "T"}
+    assert recs == [{"title": "R", "changes": {}}]
+
+
+def test_large_uploads_are_budgeted_and_reported(fake_endpoint):
+    _FakeOpenAI.replies = [("INVEST-quality", json.dumps({"title": "T"}))]
+    kb = "Shipping labels are printed every morning. " * 5000
+
+    async def main():
+        gateway = LLMGateway(api_key="test", base_url=fake_endpoint)
+        result = await generate_user_story_async("reset password", {"project_name": "Shop"}, kb_files_text=kb,
+                                                 gateway=gateway, token_budget=500, return_budget=True)
+        await gateway.aclose()
+        return result
+
+    story, budget = asyncio.run(main())
+    assert story == {"title": "T"}
+    assert budget["sections"]["kb_files_text"]["tokens"] > 10000
+    assert budget["tokens_after"] <= 500
+
+
+def test_temperature_zero_calls_are_served_from_cache(fake_endpoint, tmp_path):
+    _FakeOpenAI.replies = [("Field: title", json.dumps({"title": "Reset a forgotten password"}))]
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+
+    async def main():
+        gateway = LLMGateway(api_key="test", base_url=fake_endpoint, cache=cache)
+        story = {"title": "Reset password"}
+        for mode in ("use", "use", "refresh", "bypass", "use"):
+            assert await refine_field_async(story, "title", "clearer", gateway=gateway, cache_namespace="shop",
+                                            cache_mode=mode) == {"title": "Reset a forgotten password"}
+        await refine_field_async(story, "title", "clearer", gateway=gateway, cache_namespace="crm")
+        await gateway.complete("Field: title", model="gpt-5", temperature=0.7)  # never cached
+        with pytest.raises(ValueError):
+            await gateway.complete("x", model="gpt-5", temperature=0, cache_mode="sometimes")
+        await gateway.aclose()
+        return gateway.stats()
+
+    stats = asyncio.run(main())
+    # use (miss), use (hit), refresh, bypass, use (hit), crm (miss), temperature 0.7
+    assert stats["cache_hits"] == 2 and stats["requests"] == 5
+    assert _FakeOpenAI.state["requests"] == 5
+    assert cache.invalidate(namespace="shop") == 1
+    cache.close()
+
+
+def test_sync_calls_go_through_the_shared_cache(fake_endpoint, tmp_path, monkeypatch):
+    _FakeOpenAI.replies = [("Field: title", json.dumps({"title": "Reset a forgotten password"})),
+                           ("INVEST-quality", json.dumps({"title": "Reset password"}))]
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_BASE_URL", fake_endpoint)
+    monkeypatch.setattr(llm_gateway, "_sync_client", None)
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(llm_gateway, "_response_cache", cache)
+
+    for _ in range(2):
+        assert refine_field({"title": "T"}, "title", "clearer") == {"title": "Reset a forgotten password"}
+    assert generate_user_story("reset password", {"project_name": "Shop"}) == {"title": "Reset password"}
+    assert _FakeOpenAI.state["requests"] == 2
+
+    async def main():
+        # Same keys as the sync call: the async variant is served from the cache
+        gateway = LLMGateway(api_key="test", base_url=fake_endpoint, cache=cache)
+        story = await generate_user_story_async("reset password", {"project_name": "Shop"}, gateway=gateway)
+        await gateway.aclose()
+        return story
+
+    assert asyncio.run(main()) == {"title": "Reset password"}
+    assert _FakeOpenAI.state["requests"] == 2
+    cache.close()
+
+
+def test_streaming_story_yields_fields_before_the_completion_ends(fake_endpoint, tmp_path):
+    story = {"title": "Reset a forgotten password", "description": "As a user, I want to reset my password.",
+             "acceptance_criteria": [f"Given case {i}, the reset link works" for i in range(4)],
+             "definition_of_done": ["Reviewed"]}
+    _FakeOpenAI.replies = [("INVEST-quality", json.dumps(story, indent=2))]
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+
+    async def main():
+        gateway = LLMGateway(api_key="test", base_url=fake_endpoint, cache=cache)
+        runs = []
+        for _ in range(2):
+            events = []
+            async for event in generate_user_story_stream_async("reset password", {"project_name": "Shop"},
+                                                                gateway=gateway):
+                events.append((event, time.perf_counter()))
+            runs.append(events)
+        await gateway.aclose()
+        return runs, gateway.stats()
+
+    (streamed, cached), stats = asyncio.run(main())
+    kinds = [(e.kind, e.field, e.index) for e, _ in streamed]
+    assert kinds == [("field", "title", None), ("field", "description", None)] + [
+        ("item", "acceptance_criteria", i) for i in range(4)] + [
+        ("field", "acceptance_criteria", None), ("done", "story", None)]
+    first_at = streamed[0][1]
+    assert first_at < _FakeOpenAI.state["last_chunk_at"]   # title arrived while the model was still writing
+    expected = {k: v for k, v in story.items() if k != "definition_of_done"}
+    assert streamed[-1][0].value == expected
+    assert streamed[-1][0].meta["prompt_budget"]["budget"] == DEFAULT_SECTION_BUDGET
+    # Second run is a cache hit: one piece, same events
+    assert [e for e, _ in cached] == [e for e, _ in streamed]
+    assert stats["cache_hits"] == 1 and stats["requests"] == 1
+    cache.close()
+
+
+def test_sync_stream_goes_through_the_shared_cache(fake_endpoint, tmp_path, monkeypatch):
+    story = {"title": "Reset password", "acceptance_criteria": ["Send a reset link", "Expire it in 1 hour"]}
+    _FakeOpenAI.replies = [("INVEST-quality", json.dumps(story))]
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_BASE_URL", fake_endpoint)
+    monkeypatch.setattr(llm_gateway, "_sync_client", None)
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(llm_gateway, "_response_cache", cache)
+
+    streamed = list(generate_user_story_stream("reset password", {"project_name": "Shop"}))
+    cached = list(generate_user_story_stream("reset password", {"project_name": "Shop"}))
+    assert cached == streamed and streamed[-1].value == story
+    assert _FakeOpenAI.state["requests"] == 1
+    # Same key as the non-streaming call
+    assert generate_user_story("reset password", {"project_name": "Shop"}) == story
+    assert _FakeOpenAI.state["requests"] == 1
+    list(generate_user_story_stream("reset password", {"project_name": "Shop"}, cache_mode="bypass"))
+    assert _FakeOpenAI.state["requests"] == 2
+    cache.close()
+
+
+def test_stream_closed_early_frees_its_slot(fake_endpoint):
+    _FakeOpenAI.replies = [("INVEST-quality", json.dumps({"title": "T", "description": "x" * 4000})),
+                           ("Field: title", json.dumps({"title": "T"}))]
+
+    async def main():
+        gateway = LLMGateway(api_key="test", base_url=fake_endpoint, max_concurrency=1)
+        async with contextlib.aclosing(generate_user_story_stream_async("reset password", {}, gateway=gateway)) \
+                as events:
+            async for _ in events:
+                break
+        in_flight = gateway.stats()["in_flight"]
+        # With one slot, this would wait for the abandoned stream if it still held it
+        reply = await asyncio.wait_for(gateway.complete("Field: title", model="gpt-5"), timeout=5)
+        await gateway.aclose()
+        return in_flight, reply
+
+    in_flight, reply = asyncio.run(main())
+    assert in_flight == 0 and reply == json.dumps({"title": "T"})
+
+
+def test_identical_concurrent_calls_share_one_request(fake_endpoint):
+    _FakeOpenAI.replies = [
+        ("INVEST-quality", json.dumps({"title": "T"})),
+        ("recommendations", json.dumps({"recommendations": []})),
+        ("Field: priority", None),  # upstream error
+    ]
+
+    async def main():
+        gateway = LLMGateway(api_key="test", base_url=fake_endpoint, max_retries=0)
+        context = {"project_name": "Shop"}
+        calls = [generate_user_story_async("reset password", context, gateway=gateway) for _ in range(4)]
+        calls += [generate_recommendations_async({"title": "T"}, gateway=gateway) for _ in range(3)]
+        # One impatient caller gives up; the request it started still serves the others
+        impatient = asyncio.ensure_future(generate_user_story_async("reset password", context, gateway=gateway))
+        results = asyncio.gather(*calls)
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        results = await results
+
+        failures = await asyncio.gather(*(gateway.complete("Field: priority", model="gpt-5") for _ in range(3)),
+                                        return_exceptions=True)
+        again = await generate_user_story_async("reset password", context, gateway=gateway)
+        stats = gateway.stats()
+        # "bypass" never shares a request
+        await asyncio.gather(*(generate_user_story_async("reset password", context, gateway=gateway,
+                                                         cache_mode="bypass") for _ in range(2)))
+        await gateway.aclose()
+        return results, failures, again, stats
+
+    results, failures, again, stats = asyncio.run(main())
+    assert results == [{"title": "T"}] * 4 + [[]] * 3
+    assert len(failures) == 3 and all(isinstance(f, Exception) for f in failures)
+    assert again == {"title": "T"}  # finished requests are not reused
+    assert stats["coalesced"] == 4 + 2 + 2 and stats["requests"] == 4
+    assert _FakeOpenAI.state["requests"] == 4 + 2
+
+
+def test_identical_concurrent_sync_calls_share_one_request(fake_endpoint, monkeypatch):
+    _FakeOpenAI.replies = [("INVEST-quality", json.dumps({"title": "T"})), ("Field: priority", None)]
+    monkeypatch.setattr(llm_gateway, "_sync_client", OpenAI(api_key="test", base_url=fake_endpoint, max_retries=0))
+    monkeypatch.setattr(llm_gateway, "_response_cache", None)
+
+    def run_together(call, n=4):
+        barrier, results = threading.Barrier(n), [None] * n
+
+        def worker(i):
+            barrier.wait()
+            try:
+                results[i] = call()
+            except Exception as exc:
+                results[i] = exc
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    messages = [{"role": "user", "content": "INVEST-quality story"}]
+    results = run_together(lambda: llm_gateway.chat_sync(messages, model="gpt-5", temperature=0.0))
+    assert results == [json.dumps({"title": "T"})] * 4
+    assert _FakeOpenAI.state["requests"] == 1
+
+    failures = run_together(lambda: llm_gateway.chat_sync([{"role": "user", "content": "Field: priority"}],
+                                                          model="gpt-5", temperature=0.0))
+    assert all(f is failures[0] for f in failures) and isinstance(failures[0], Exception)
+    assert _FakeOpenAI.state["requests"] == 2
+
+    # "bypass" never shares a request
+    run_together(lambda: llm_gateway.chat_sync(messages, model="gpt-5", temperature=0.0, cache_mode="bypass"))
+    assert _FakeOpenAI.state["requests"] == 6
+    assert not llm_gateway._sync_inflight
+
+
+def test_gateway_survives_successive_event_loops(fake_endpoint):
+    _FakeOpenAI.replies = [("Field: title", json.dumps({"title": "T"}))]
+    gateway = LLMGateway(api_key="test", base_url=fake_endpoint, max_concurrency=1, coalesce=False)
+
+    async def main():
+        # Contention: waiters park on the semaphore, which binds it to this loop
+        results = await asyncio.gather(*(gateway.complete(f"Field: title #{i}", model="gpt-5") for i in range(3)))
+        await gateway.aclose()
+        return results
+
+    assert asyncio.run(main()) == [json.dumps({"title": "T"})] * 3
+    assert asyncio.run(main()) == [json.dumps({"title": "T"})] * 3
+    assert gateway.stats()["requests"] == 6 and gateway.stats()["max_in_flight"] == 1
@@ -0,0 +1,48 @@
+# test_near_duplicates.py
+
+import random
+
+from near_duplicates import NearDuplicateIndex, index_backlog, near_duplicate_pairs
+import near_duplicates as near_duplicates_module
+
+def test_pairs_catch_rewording_but_not_unrelated_criteria():
+    texts = ["Display a success message within 2 seconds", "Send the reset email",
+             "display the SUCCESS message within 2 seconds.", "Log every failed login attempt"]
+    assert [(i, j) for i, j, _ in near_duplicate_pairs(texts)] == [(0, 2)]
+    assert near_duplicate_pairs(["---", "...", "!!", "Send the reset email"]) == []
+
+def test_index_matches_brute_force_pairs(monkeypatch):
+    rng = random.Random(4)
+    words = ["display", "send", "validate", "the", "a", "success", "message", "reset", "email",
+             "within", "2", "seconds", "log", "every", "attempt", "password", "reject", "token"]
+    texts = []
+    for _ in range(120):
+        if texts and rng.random() < 0.3:
+            base = rng.choice(texts).split()
+            base[rng.randrange(len(base))] = rng.choice(words)
+            texts.append(" ".join(base))
+        else:
+            texts.append(" ".join(rng.choice(words) for _ in range(rng.randint(4, 9))))
+    exact = near_duplicate_pairs(texts)
+    monkeypatch.setattr(near_duplicates_module, "BRUTE_FORCE_LIMIT", 0)
+    via_index = near_duplicate_pairs(texts)
+    # LSH may miss a borderline pair but never reports one below the threshold
+    assert set(via_index) <= set(exact)
+    assert len(via_index) >= 0.95 * len(exact)
+
+def test_backlog_index_query_and_remove():
+    backlog = [
+        {"id": "S-1", "acceptance_criteria": ["Send the password reset email", "Validate password complexity"]},
+        {"id": "S-2", "acceptance_criteria": ["Send the password reset e-mail.", "Show order history"]},
+        {"acceptance_criteria": "not a list"},
+    ]
+    index = index_backlog(backlog)
+    assert len(index) == 4
+    assert [key for key, _ in index.similar_to(("S-1", 0))] == [("S-2", 0)]
+    assert index.query("Validate the password complexity")[0][0] == ("S-1", 1)
+    index.remove(("S-2", 0))
+    assert index.similar_to(("S-1", 0)) == []
+    assert NearDuplicateIndex().query("anything") == []
+    index.add("dash", "---")
+    index.add("dots", "...")
+    assert index.similar_to("dash") == [] and index.query("!!") == []
@@ -0,0 +1,45 @@
+# test_prompt_budget.py
+
+from prompt_budget import GAP_MARKER, MIN_SECTION_TOKENS, Section, allocate, count_tokens, extract, fit_sections
+
+FILLER = "The warehouse team reviews shipping labels every morning before pickup. "
+
+
+def test_small_inputs_are_untouched_and_reported():
+    sections = [Section("file_content", "Passwords need 12 characters.", 1), Section("kb_files_text", "", 3)]
+    texts, report = fit_sections(sections, 1000, query="reset password")
+    assert texts == {"file_content": "Passwords need 12 characters.", "kb_files_text": ""}
+    assert report["tokens_before"] == report["tokens_after"] == count_tokens("Passwords need 12 characters.")
+    assert report["sections"]["file_content"]["method"] == "kept"
+    assert fit_sections(sections, None)[0] == texts
+
+
+def test_allocation_gives_floors_then_follows_priority():
+    assert allocate([5000, 5000, 50], [1, 2, 3], 1000) == [1000 - MIN_SECTION_TOKENS - 50, MIN_SECTION_TOKENS, 50]
+    assert allocate([5000, 5000], [2, 1], 300) == [100, 200]
+    assert sum(allocate([10, 20, 30], [1, 1, 1], 1000)) == 60
+
+
+def test_extraction_keeps_sentences_relevant_to_the_query_within_budget():
+    kb = FILLER * 200 + "Password reset links expire after 15 minutes. " + FILLER * 200
+    upload = "Reset emails are sent from no-reply@shop.test.\n" + FILLER * 100
+    sections = [Section("file_content", upload, 1), Section("project_description", "Online shop.", 2),
+                Section("kb_files_text", kb, 3)]
+    texts, report = fit_sections(sections, 600, query="As a user I want to reset my password")
+
+    assert "Password reset links expire after 15 minutes." in texts["kb_files_text"]
+    assert texts["file_content"].startswith("Reset emails are sent")
+    assert GAP_MARKER in texts["kb_files_text"]
+    assert texts["project_description"] == "Online shop."
+    assert report["tokens_after"] <= 600 < report["tokens_before"]
+    for name, section in report["sections"].items():
+        assert section["kept"] == count_tokens(texts[name]) <= section["allocated"]
+    assert report["sections"]["kb_files_text"]["method"] == "extracted"
+
+
+def test_trim_without_matches_and_oversized_units():
+    text, method = extract(FILLER * 50, 40, query="password")
+    assert method == "trimmed" and text.startswith(FILLER.strip()) and count_tokens(text) <= 40
+    text, method = extract("x" * 10000, 50)
+    assert method == "trimmed" and 0 < count_tokens(text) <= 50
+    assert extract(FILLER, 0) == ("", "dropped")
@@ -0,0 +1,46 @@
+# test_response_cache.py
+
+from response_cache import ResponseCache, response_key
+
+
+def _messages(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_key_normalizes_whitespace_but_not_model_or_params():
+    key = response_key(_messages("Field: title\n  Instruction:  clearer"), "gpt-5", {"temperature": 0})
+    assert key == response_key(_messages("Field: title Instruction: clearer"), "gpt-5", {"temperature": 0})
+    assert key != response_key(_messages("Field: title Instruction: clearer"), "gpt-4o", {"temperature": 0})
+    assert key != response_key(_messages("Field: title Instruction: clearer"), "gpt-5",
+                               {"temperature": 0, "max_tokens": 10})
+
+
+def test_ttl_eviction_namespaces_and_invalidate(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_entries=3)
+    for i in range(4):
+        cache.put(f"k{i}", f"v{i}", namespace="shop")
+    assert cache.get("k0", "shop") is None  # least recently used, evicted
+    assert cache.get("k3", "shop") == "v3"
+    assert cache.get("k3", "other") is None
+
+    cache.get("k1", "shop")                  # k1 now more recent than k2
+    cache.put("k4", "v4", namespace="other")
+    assert cache.get("k2", "shop") is None and cache.get("k1", "shop") == "v1"
+    assert cache.stats()["evictions"] == 2
+
+    assert cache.invalidate(namespace="shop") == 2
+    assert cache.stats()["entries"] == 1
+    assert cache.invalidate() == 1
+
+    by_size = ResponseCache(str(tmp_path / "size.db"), max_bytes=10)
+    by_size.put("a", "12345")
+    by_size.put("b", "123456")
+    by_size.put("huge", "x" * 11)            # larger than the whole cache: not stored
+    assert by_size.get("a") is None and by_size.get("b") == "123456" and by_size.get("huge") is None
+
+    expired = ResponseCache(str(tmp_path / "ttl.db"), ttl=-1)
+    expired.put("k", "v")
+    assert expired.get("k") is None
+    for c in (cache, by_size, expired):
+        c.close()
+
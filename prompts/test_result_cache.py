@@ -0,0 +1,61 @@
+# test_result_cache.py
+
+from early_evals import early_evals
+from result_cache import ResultCache, cached_early_evals, cached_estimate_points, story_key
+from story_point_estimator import Story, estimate_points_v1
+
+STORY = {
+    "title": "Reset password",
+    "description": "As a user, I want to reset my password so that I can regain access.",
+    "acceptance_criteria": ["Send a reset email", "Validate password"],
+    "story_points": 3,
+    "tags": ["chatgpt", "ai-story-gen"],
+}
+
+
+def test_repeat_evaluation_hits_cache_and_copies_only_on_request():
+    cache = ResultCache(max_size=4)
+    first = cached_early_evals(STORY, cache)
+    second = cached_early_evals(dict(reversed(list(STORY.items()))), cache)  # key order doesn't matter
+    assert first == second == early_evals(STORY)
+    assert second is first
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    private = cached_early_evals(STORY, cache, copy=True)
+    assert private == first and private is not first
+    private["findings"].clear()
+    assert cached_early_evals(STORY, cache)["findings"]
+
+
+def test_lru_eviction_and_estimates_share_the_cache():
+    cache = ResultCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and cache.evictions == 1
+
+    story = Story(title="Login", description="Enter username and password", acceptance_criteria=["Show dashboard"])
+    assert cached_estimate_points(story, cache) == estimate_points_v1(story)
+    assert story_key(story) != story_key(STORY)
+
+
+def test_cached_none_is_a_hit():
+    cache = ResultCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("k", lambda: calls.append(1)) is None
+    assert len(calls) == 1 and cache.stats()["hits"] == 2
+
+
+def test_save_and_load_round_trip(tmp_path):
+    cache = ResultCache(max_size=8)
+    cached_early_evals(STORY, cache)
+    path = tmp_path / "cache.json"
+    cache.save(str(path))
+
+    restored = ResultCache.load(str(path))
+    assert len(restored) == 1
+    assert cached_early_evals(STORY, restored) == early_evals(STORY)
+    assert restored.hits == 1
+    assert len(ResultCache.load(str(tmp_path / "missing.json"))) == 0
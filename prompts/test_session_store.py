@@ -0,0 +1,108 @@
+# test_session_store.py
+
+import sqlite3
+import time
+
+import pytest
+
+from session_store import LazySessionStore, SessionStore
+
+
+def test_history_persists_across_instances_and_batches_writes(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    a = SessionStore(db, batch_size=3, flush_interval=60)
+    b = SessionStore(db, batch_size=3, flush_interval=60)
+    a.append("s1", "user", "Add a password rule")
+    a.append("s1", "assistant", "Done")
+    # Pending writes are visible in-process only until the batch flushes
+    assert [m["content"] for m in a.history("s1")] == ["Add a password rule", "Done"]
+    assert b.history("s1") == []
+    a.append("s1", "user", "Also log attempts")
+    assert len(b.history("s1")) == 3
+
+    # Another worker appends; the cached history picks up only the new rows
+    b.extend("s1", [{"role": "assistant", "content": "Logged"}])
+    b.flush()
+    assert [m["content"] for m in a.history("s1")][-1] == "Logged"
+    a.close()
+    b.close()
+
+    with SessionStore(db) as c:
+        assert len(c.history("s1")) == 4
+        assert c.stats()["messages"] == 4
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_ttl_cleanup_delete_and_bounded_cache(tmp_path):
+    store = SessionStore(str(tmp_path / "s.db"), ttl=100, cache_size=2, batch_size=1)
+    for sid in ("a", "b", "c"):
+        store.append(sid, "user", sid)
+        store.history(sid)
+    assert store.stats()["cached"] == 2
+    assert store.cleanup() == 0
+    assert store.cleanup(now=10 ** 12) == 3
+    assert "a" not in store and store.stats()["sessions"] == 0
+
+    store.append("d", "user", "hi")
+    store.delete("d")
+    assert store.history("d") == []
+    store.close()
+    store.close()
+
+
+def test_pending_writes_flush_on_a_timer(tmp_path):
+    db = str(tmp_path / "s.db")
+    writer = SessionStore(db, batch_size=100, flush_interval=0.05)
+    reader = SessionStore(db)
+    writer.append("s1", "user", "hi")
+    assert reader.history("s1") == []
+    deadline = time.time() + 5
+    while writer.stats()["pending"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert [m["content"] for m in reader.history("s1")] == ["hi"]
+    writer.append("s1", "assistant", "hello")
+    writer.close()  # cancels the timer and flushes
+    assert len(reader.history("s1")) == 2
+    reader.close()
+
+
+def test_failed_delete_rolls_back_and_close_always_closes(tmp_path, monkeypatch):
+    store = SessionStore(str(tmp_path / "s.db"), batch_size=1)
+    store.append("s1", "user", "hi")
+    store._conn.execute("CREATE TRIGGER keep BEFORE DELETE ON messages BEGIN SELECT RAISE(ABORT, 'kept'); END")
+    with pytest.raises(sqlite3.IntegrityError):
+        store.delete("s1")
+    store._conn.execute("DROP TRIGGER keep")  # no transaction left open by the failed delete
+    store.append("s1", "assistant", "hello")
+    assert len(store.history("s1")) == 2
+
+    store.batch_size = 100
+    store.append("s1", "user", "bye")
+
+    def failing_write(pending):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(store, "_write", failing_write)
+    with pytest.raises(sqlite3.OperationalError):
+        store.close()
+    assert store._timer is None
+    with pytest.raises(sqlite3.ProgrammingError):  # connection closed anyway
+        store._conn.execute("SELECT 1")
+
+
+def test_dict_style_access_and_lazy_store(tmp_path):
+    db = str(tmp_path / "s.db")
+    history = LazySessionStore(db, batch_size=1)
+    assert history._store is None  # nothing opened yet
+    assert "s1" not in history and history.get("s1") is None
+    history["s1"] = [{"role": "user", "content": "hi"}]
+    assert history["s1"] == [{"role": "user", "content": "hi"}]
+    history["s1"] = history["s1"] + [{"role": "assistant", "content": "hello"}]
+    with SessionStore(db) as other:
+        assert [m["content"] for m in other.history("s1")] == ["hi", "hello"]
+    del history["s1"]
+    with pytest.raises(KeyError):
+        history["s1"]
+    history.close()
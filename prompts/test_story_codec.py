@@ -0,0 +1,62 @@
+# test_story_codec.py
+
+import io
+import json
+import random
+
+import pytest
+
+from story_fixtures import SIZES, make_corpus, revise_story
+from story_codec import CodecError, dumps, iter_records, loads, write_record
+from story_suggestion import build_suggestion
+from version_store import VersionStore
+
+
+def test_round_trips_json_values():
+    values = [None, True, False, 0, 127, 128, -1, -129, 2 ** 70, -(2 ** 70), 0.1, -2.5, float("inf"),
+              "", "é ✓ 🚀", "x" * 1000, [], {}, [1, [2, [3]]], {"a": {"a": "a"}, "": ["a", "a"]}]
+    for v in values:
+        assert loads(dumps(v)) == v
+        assert type(loads(dumps(v))) is type(v)
+    assert loads(dumps((1, "a"))) == [1, "a"]
+    with pytest.raises(TypeError):
+        dumps({1: "x"})
+    with pytest.raises(TypeError):
+        dumps({"a": object()})
+
+
+def test_suggestions_and_versions_round_trip_smaller_than_json():
+    rng = random.Random(4)
+    corpus = make_corpus(20, SIZES["medium"], seed=4)
+    for story in corpus:
+        revised = revise_story(rng, story)
+        for sugg in (build_suggestion(story, revised, scope="full", text_diff=True),
+                     build_suggestion(story, revised, scope="full", compact=True)):
+            data = dumps(sugg)
+            assert loads(data) == sugg
+            assert loads(dumps(sugg, compress=True)) == sugg
+            assert len(data) < len(json.dumps(sugg, separators=(",", ":")).encode()) * 0.8
+
+    store = VersionStore(keyframe_every=3)
+    story = corpus[0]
+    for _ in range(7):
+        story = revise_story(rng, story)
+        store.append(story, meta={"model": "gpt-5"})
+    restored = VersionStore.from_records(loads(dumps(store.to_records())), keyframe_every=3)
+    assert restored.restore() == story
+
+
+def test_record_stream_and_corrupt_input():
+    buf = io.BytesIO()
+    records = [{"op": "add", "path": f"/tags/{i}", "value": f"t{i}"} for i in range(5)]
+    for r in records:
+        write_record(buf, r, compress=True)
+    buf.seek(0)
+    assert list(iter_records(buf)) == records
+
+    data = dumps({"title": "Reset password"})
+    for bad in (b"", b"JSON" + data[4:], data[:3] + b"\x09" + data[4:], data[:-3], data + b"\x00"):
+        with pytest.raises(CodecError):
+            loads(bad)
+    with pytest.raises(CodecError):
+        list(iter_records(io.BytesIO(b"\x85")))
@@ -0,0 +1,52 @@
+# test_story_stream.py
+
+import json
+
+from story_stream import StoryStreamParser, StreamEvent, iter_story_events
+
+STORY = {
+    "title": 'Reset a "forgotten" password \\ now',
+    "description": "As a user, I want {braces} and [brackets] in text. ✓",
+    "acceptance_criteria": ["Given a reset link", "When it expires", {"given": "x", "then": ["y", 2]}],
+    "story_points": 5, "ready": True, "owner": None, "ratio": -1.5e3,
+    "metadata": {"tags": ["auth", {"nested": "}"}]},
+}
+
+
+def _feed_in_pieces(text, size):
+    parser = StoryStreamParser()
+    events = list(iter_story_events((text[i:i + size] for i in range(0, len(text), size)), parser))
+    return parser, events
+
+
+def test_fields_and_list_items_complete_in_order_for_any_chunking():
+    for text in (json.dumps(STORY), json.dumps(STORY, indent=2, ensure_ascii=False),
+                 "Here is the story:\n```json\n" + json.dumps(STORY, indent=1) + "\n```"):
+        for size in (1, 2, 5, 64, len(text)):
+            parser, events = _feed_in_pieces(text, size)
+            assert parser.done and not parser.failed
+            assert parser.story == STORY
+            assert [e for e in events if e.kind == "field"] == [StreamEvent("field", k, v) for k, v in STORY.items()]
+            # Only top-level lists report items; nested ones arrive inside their field
+            assert [e for e in events if e.kind == "item"] == [
+                StreamEvent("item", "acceptance_criteria", v, i) for i, v in enumerate(STORY["acceptance_criteria"])]
+
+
+def test_title_is_reported_before_the_rest_arrives():
+    text = json.dumps(STORY)
+    cut = text.index('"description"')
+    parser = StoryStreamParser()
+    assert parser.feed(text[:cut]) == [StreamEvent("field", "title", STORY["title"])]
+    first_item = text.index('"When')
+    assert [e.kind for e in parser.feed(text[cut:first_item])] == ["field", "item"]
+    assert not parser.done
+
+
+def test_invalid_output_stops_emitting():
+    parser = StoryStreamParser()
+    assert parser.feed('{"title": "T", "points": tru}') == [StreamEvent("field", "title", "T")]
+    assert parser.failed and not parser.done
+    assert parser.feed(', "more": 1}') == []
+    for text in ('{"title" "T"}', '{"a": [1}', "no JSON here"):
+        parser, events = _feed_in_pieces(text, 3)
+        assert events == [] and not parser.done
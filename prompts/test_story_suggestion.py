@@ -1,8 +1,14 @@
 # test_story_suggestion.py
 # Pytest scaffold for build_suggestion and apply_suggestion
 
+import copy
+import random
+
 import pytest
-from story_suggestion import build_suggestion, apply_suggestion
+from json_patch import apply_patch
+from build_suggestion import diff_with_budget, iter_diff
+import build_suggestion as build_suggestion_module
+from story_suggestion import build_suggestion, apply_suggestion, _diff_dict
 
 def test_build_suggestion_full_scope():
     before = {"title": "Old", "tags": ["a"]}
@@ -49,3 +55,155 @@ def test_apply_invalid_suggestion():
 
     with pytest.raises(ValueError):
         apply_suggestion(before, suggestion)
+
+def test_diff_inserting_at_top_is_one_add():
+    acs = [f"Criterion {i}" for i in range(10)]
+    diff = _diff_dict({"acceptance_criteria": acs}, {"acceptance_criteria": ["New first"] + acs})
+    assert diff == [{"op": "add", "path": "/acceptance_criteria/0", "value": "New first"}]
+
+def test_diff_reorder_is_a_move_and_edits_stay_in_place():
+    acs = ["A", "B", "C", "D"]
+    assert _diff_dict({"ac": acs}, {"ac": ["B", "C", "D", "A"]}) == [
+        {"op": "move", "from": "/ac/0", "path": "/ac/3"}]
+    assert _diff_dict({"ac": acs}, {"ac": ["A", "B2", "C", "D"]}) == [
+        {"op": "replace", "path": "/ac/1", "before": "B", "value": "B2"}]
+
+def test_diff_list_ops_apply_sequentially():
+    rng = random.Random(11)
+    for _ in range(500):
+        before = [rng.choice("abcdef") for _ in range(rng.randint(0, 8))]
+        after = before[:]
+        for _ in range(rng.randint(1, 4)):
+            r = rng.random()
+            if r < 0.3 and after:
+                after.insert(rng.randrange(len(after)), after.pop(rng.randrange(len(after))))
+            elif r < 0.6:
+                after.insert(rng.randint(0, len(after)), rng.choice("xyz"))
+            elif after:
+                after.pop(rng.randrange(len(after)))
+        b = {"ac": before, "notes": [{"k": x} for x in before]}
+        a = {"ac": after, "notes": [{"k": x + "!"} for x in after]}
+        assert apply_patch(b, _diff_dict(b, a)) == a
+
+def test_compact_suggestion_stores_only_the_patch():
+    before = {"title": "Old", "description": "x" * 5000, "tags": ["a"]}
+    after = dict(before, title="New", tags=["a", "b"])
+    suggestion = build_suggestion(before, after, scope="full", compact=True)
+
+    assert "before" not in suggestion and "after" not in suggestion
+    updated = apply_suggestion(before, suggestion)
+    assert updated == after
+    assert updated["description"] is before["description"]  # copy-on-write, not a deep copy
+    assert before["title"] == "Old"
+
+def test_compact_suggestion_warns_on_drift_and_rejects_unappliable_patch(capsys):
+    before = {"title": "Old", "tags": ["a", "b"]}
+    suggestion = build_suggestion(before, {"title": "Old", "tags": ["a"]}, scope="full", compact=True)
+
+    with pytest.raises(ValueError):
+        apply_suggestion({"title": "Old"}, suggestion)
+    assert "differs from the suggestion's 'before'" in capsys.readouterr().out
+
+def test_compact_suggestion_checks_old_values_on_drift(capsys):
+    before = {"title": "Old", "acceptance_criteria": ["A", "B", "C", "D"], "tags": ["x", "y", "z"]}
+    after = dict(before, title="New", acceptance_criteria=["A", "B", "D"])
+    suggestion = build_suggestion(before, after, scope="full", compact=True)
+
+    # A criterion inserted on top shifts every index: removing /2 would drop "B"
+    shifted = dict(before, acceptance_criteria=["X", "A", "B", "C", "D"])
+    with pytest.raises(ValueError):
+        apply_suggestion(shifted, suggestion)
+    assert shifted["acceptance_criteria"] == ["X", "A", "B", "C", "D"]
+    # A concurrent title edit is not overwritten
+    with pytest.raises(ValueError):
+        apply_suggestion(dict(before, title="Edited meanwhile"), suggestion)
+    # Edits the patch doesn't touch are kept
+    current = dict(before, tags=["x", "y", "z", "w"])
+    assert apply_suggestion(current, suggestion) == dict(after, tags=["x", "y", "z", "w"])
+    assert "differs from the suggestion's 'before'" in capsys.readouterr().out
+
+    moved = build_suggestion(before, dict(before, tags=["z", "x", "y"]), scope="full", compact=True)
+    with pytest.raises(ValueError):
+        apply_suggestion(dict(before, tags=["w", "x", "y", "z"]), moved)
+    added = build_suggestion(before, dict(before, owner="me"), scope="full", compact=True)
+    with pytest.raises(ValueError):
+        apply_suggestion(dict(before, owner="someone else"), added)
+
+def test_compact_list_add_checks_its_neighbours_on_drift(capsys):
+    before = {"title": "Old", "acceptance_criteria": ["A", "B", "C"], "tags": ["x"]}
+    after = dict(before, acceptance_criteria=["A", "B", "New", "C"])
+    suggestion = build_suggestion(before, after, scope="full", compact=True)
+    assert suggestion["diff"][0]["anchor"] == {"prev": "B", "next": "C"}
+
+    # A criterion inserted before the target index: /2 now sits between "A" and "B"
+    shifted = dict(before, acceptance_criteria=["A", "X", "B", "C"])
+    with pytest.raises(ValueError):
+        apply_suggestion(shifted, suggestion)
+    assert shifted["acceptance_criteria"] == ["A", "X", "B", "C"]
+    # Appending elsewhere in the list leaves the insertion point intact
+    current = dict(before, acceptance_criteria=["A", "B", "C", "D"])
+    assert apply_suggestion(current, suggestion)["acceptance_criteria"] == ["A", "B", "New", "C", "D"]
+    assert "differs from the suggestion's 'before'" in capsys.readouterr().out
+
+def test_apply_suggestion_in_place():
+    before = {"title": "Old", "tags": ["a"]}
+    suggestion = build_suggestion(before, {"title": "New", "tags": ["a"]}, scope="full")
+    current = {"title": "Old", "tags": ["a"]}
+    assert apply_suggestion(current, suggestion, in_place=True) is current
+    assert current["title"] == "New"
+
+def test_diff_skips_shared_subtrees_and_ids_are_structural():
+    notes = ["long note " * 100] * 20
+    before = {"title": "Old", "dev_notes": notes}
+    after = {"dev_notes": notes, "title": "New"}
+    assert _diff_dict(before, after) == [{"op": "replace", "path": "/title", "before": "Old", "value": "New"}]
+    rebuilt = {"title": "Old", "dev_notes": list(notes)}
+    assert build_suggestion(before, after, scope="full")["id"] == \
+        build_suggestion(rebuilt, dict(after), scope="full")["id"]
+
+def test_diff_skips_subtrees_with_equal_digests(monkeypatch):
+    before = {"title": "Old", "notes": [{"text": f"note {i}", "tags": ["a"]} for i in range(50)]}
+    after = copy.deepcopy(before)
+    after["title"] = "New"
+    walked = []
+    original = build_suggestion_module._diff_list
+    monkeypatch.setattr(build_suggestion_module, "_diff_list", lambda *a: walked.append(a[2]) or original(*a))
+    assert build_suggestion(before, after, scope="full", compact=True)["diff"] == \
+        [{"op": "replace", "path": "/title", "before": "Old", "value": "New"}]
+    assert walked == []
+    after["notes"][3]["tags"].append("b")
+    build_suggestion(before, after, scope="full", compact=True)
+    assert walked == ["/notes", "/notes/3/tags"]
+
+def test_iter_diff_is_lazy_and_depth_limited():
+    before = {"title": "T", "acceptance_criteria": [f"AC {i}" for i in range(1000)], "meta": {"a": {"b": 1}}}
+    after = {"title": "T2", "acceptance_criteria": [f"AC {i}!" for i in range(1000)], "meta": {"a": {"b": 2}}}
+    ops = iter_diff(before, after)
+    first = [next(ops) for _ in range(3)]
+    assert first == _diff_dict(before, after)[:3]
+    apply_patch(before, first)  # any prefix applies
+
+    shallow = list(iter_diff(before, after, max_depth=1))
+    assert {op["path"] for op in shallow} == {"/acceptance_criteria", "/meta", "/title"}
+    assert apply_patch(before, shallow) == after
+
+def test_diff_with_budget_returns_complete_coarser_patch():
+    before = {"title": "T", "acceptance_criteria": [f"AC {i}" for i in range(50)], "tags": ["a"], "old": 1}
+    after = {"title": "T2", "acceptance_criteria": [f"AC {i}!" for i in range(50)], "tags": ["b"], "new": 2}
+    full = diff_with_budget(before, after)
+    assert not full["truncated"] and full["diff"] == _diff_dict(before, after)
+
+    capped = diff_with_budget(before, after, max_ops=10)
+    assert capped["truncated"] and capped["reason"] == "max_ops" and len(capped["diff"]) <= 10
+    assert {"op": "replace", "path": "/acceptance_criteria", "before": before["acceptance_criteria"],
+            "value": after["acceptance_criteria"]} in capped["diff"]
+    assert apply_patch(before, capped["diff"]) == after
+
+    assert diff_with_budget(before, after, max_ops=1)["diff"][0]["path"] == ""
+    with pytest.raises(ValueError):
+        diff_with_budget(before, after, max_ops=0)
+    timed = diff_with_budget(before, after, time_budget=0)
+    assert timed["reason"] == "time" and apply_patch(before, timed["diff"]) == after
+    deep = diff_with_budget({"a": {"b": {"c": 1}}}, {"a": {"b": {"c": 2}}}, max_depth=1)
+    assert deep == {"diff": [{"op": "replace", "path": "/a", "before": {"b": {"c": 1}}, "value": {"b": {"c": 2}}}],
+                    "truncated": True, "reason": "max_depth"}
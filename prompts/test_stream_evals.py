@@ -0,0 +1,44 @@
+# test_stream_evals.py
+
+import io
+import json
+
+import pytest
+
+from early_evals import early_evals
+from stream_evals import StreamStats, evaluate_stream, iter_stories
+
+STORIES = [
+    {"id": i, "title": f"Story {i}", "description": "As a user, I want things so that stuff happens.",
+     "acceptance_criteria": ["Send a receipt", "Ideally be fast"], "story_points": 3, "tags": ["chatgpt"]}
+    for i in range(5)
+]
+
+
+@pytest.mark.parametrize("text", [
+    "\n".join(json.dumps(s) for s in STORIES) + "\n",   # JSONL
+    json.dumps(STORIES, indent=2),                       # one big array
+    "".join(json.dumps(s) for s in STORIES),             # concatenated objects
+])
+def test_iter_stories_reads_incrementally_in_any_layout(text):
+    assert list(iter_stories(io.StringIO(text), read_size=7)) == STORIES
+
+
+def test_iter_stories_rejects_garbage():
+    with pytest.raises(ValueError):
+        list(iter_stories(io.StringIO('[{"id": 1}'), read_size=4))
+    with pytest.raises(ValueError):
+        list(iter_stories(io.StringIO("[1, 2]")))
+
+
+def test_pipeline_yields_results_in_order_and_aggregates():
+    stats = StreamStats()
+    items = list(stats.observe(evaluate_stream(iter(STORIES), batch_size=2)))
+
+    assert [story["id"] for story, _, _ in items] == [0, 1, 2, 3, 4]
+    assert items[0][1] == early_evals(STORIES[0])
+    assert "ai-story-gen" in items[0][2]["tags"]
+    snap = stats.snapshot()
+    assert snap["count"] == 5
+    assert sum(snap["score_histogram"].values()) == 5
+    assert snap["failed_findings"]["tags.required"] == 5
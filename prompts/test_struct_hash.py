@@ -0,0 +1,29 @@
+# test_struct_hash.py
+
+import struct_hash
+from struct_hash import digest, field_digests, story_hash
+
+def test_digest_is_structural():
+    a = {"title": "T", "tags": ["x", "y"], "story_points": 3, "meta": {"ok": True, "n": None}}
+    b = {"meta": {"n": None, "ok": True}, "story_points": 3.0, "tags": ["x", "y"], "title": "T"}
+    assert story_hash(a) == story_hash(b)
+    assert digest(["x", "y"]) != digest(["y", "x"])
+    assert len({digest(1), digest("1"), digest(True), digest(None), digest([1]), digest({"1": 1})}) == 6
+    assert field_digests(a)["tags"] == digest(["x", "y"])
+
+def test_leaf_cache_is_bounded(monkeypatch):
+    cache = struct_hash._LeafCache(max_bytes=1000)
+    monkeypatch.setattr(struct_hash, "_leaf_cache", cache)
+    texts = [f"{i} " + "x" * 300 for i in range(10)]
+    first = [digest(t) for t in texts]
+    assert cache.size <= 1000
+    assert [digest(t) for t in texts] == first
+
+def test_memo_reuses_container_digests():
+    story = {"title": "T", "dev_notes": [{"text": "n", "n": i} for i in range(3)]}
+    memo = {}
+    d = digest(story, memo)
+    assert memo[id(story["dev_notes"])][1] == digest(story["dev_notes"])
+    # Memoized containers are trusted: only valid while they are not mutated
+    story["dev_notes"].append("x")
+    assert digest(story, memo) == d != digest(story)
@@ -0,0 +1,47 @@
+# test_text_diff.py
+
+import random
+
+from json_patch import apply_patch
+from story_suggestion import build_suggestion
+from text_diff import attach_text_diffs, split_text_diff, word_diff
+
+DESCRIPTION = ("As a returning customer I want to reset my password from the login page "
+               "so that I can regain access to my saved orders without contacting support. ") * 20
+
+
+def test_word_diff_round_trips_and_groups_changes():
+    before = "Send the reset email within one minute."
+    after = "Send a password reset email within five minutes!"
+    segments = word_diff(before, after)
+    assert split_text_diff(after, segments) == (before, after)
+    assert segments[0] == ["=", 5]
+    assert ["-", "the "] in segments and ["+", "a password "] in segments
+    assert ["-", "one minute."] in segments and ["+", "five minutes!"] in segments
+
+    rng = random.Random(2)
+    words = DESCRIPTION.split(" ")
+    for _ in range(20):
+        edited = list(words)
+        for _ in range(rng.randint(1, 10)):
+            edited[rng.randrange(len(edited))] = rng.choice(["new", "", "reset,", "Emails"])
+        text = " ".join(edited)
+        assert split_text_diff(text, word_diff(DESCRIPTION, text)) == (DESCRIPTION, text)
+
+
+def test_budget_falls_back_to_plain_replace():
+    assert word_diff("a b c d", "w x y z", max_cost=4) is None
+    assert word_diff("a " * 50, "b " * 50, max_tokens=10) is None
+    op = {"op": "replace", "path": "/title", "before": "Old", "value": "New"}
+    assert attach_text_diffs([op]) == [op]  # diff wouldn't be smaller than the old text
+
+
+def test_suggestion_text_diffs_shrink_payload_and_still_apply():
+    before = {"title": "Reset password", "description": DESCRIPTION}
+    after = {"title": "Reset password", "description": DESCRIPTION.replace("saved orders", "order history", 1)}
+    plain = build_suggestion(before, after, scope="full", compact=True)
+    sugg = build_suggestion(before, after, scope="full", compact=True, text_diff=True)
+    (op,) = sugg["diff"]
+    assert "before" not in op and len(str(op)) < len(str(plain["diff"][0])) / 1.5
+    assert split_text_diff(op["value"], op["text_diff"])[0] == DESCRIPTION
+    assert apply_patch(before, sugg["diff"]) == after
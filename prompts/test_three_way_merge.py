@@ -0,0 +1,80 @@
+# test_three_way_merge.py
+
+import pytest
+
+from story_suggestion import apply_suggestion, build_suggestion
+from three_way_merge import merge3, merge_suggestion
+
+BASE = {
+    "title": "Reset password",
+    "description": "As a user I want to reset my password.",
+    "acceptance_criteria": ["Email sent", "Link expires", "Password updated", "Old sessions end"],
+    "story_points": 3,
+}
+
+
+def test_non_overlapping_edits_merge_per_field_and_element():
+    current = dict(BASE, title="Reset a forgotten password",
+                   acceptance_criteria=["Email sent within 1 minute", "Link expires",
+                                        "Password updated", "Old sessions end"])
+    suggested = dict(BASE, story_points=5,
+                     acceptance_criteria=["Email sent", "Link expires after 24h",
+                                          "Password updated", "Old sessions end", "Audit log entry"])
+    result = merge3(BASE, current, suggested)
+    assert result["clean"] and result["conflicts"] == []
+    assert result["merged"] == {
+        "title": "Reset a forgotten password",
+        "description": BASE["description"],
+        "acceptance_criteria": ["Email sent within 1 minute", "Link expires after 24h",
+                                "Password updated", "Old sessions end", "Audit log entry"],
+        "story_points": 5,
+    }
+
+
+def test_overlapping_edits_are_reported_and_keep_current_by_default():
+    current = dict(BASE, title="Mine", acceptance_criteria=["Email sent", "Link lasts 1h",
+                                                            "Password updated", "Old sessions end"])
+    suggested = dict(BASE, title="Theirs", acceptance_criteria=["Email sent", "Link lasts 24h",
+                                                                "Password updated", "Old sessions end"])
+    result = merge3(BASE, current, suggested)
+    assert not result["clean"]
+    assert result["conflicts"] == [
+        {"path": "/title", "base": "Reset password", "current": "Mine", "suggested": "Theirs"},
+        {"path": "/acceptance_criteria/1", "base": "Link expires",
+         "current": "Link lasts 1h", "suggested": "Link lasts 24h"},
+    ]
+    assert result["merged"]["title"] == "Mine"
+    theirs = merge3(BASE, current, suggested, prefer="suggested")["merged"]
+    assert theirs["title"] == "Theirs" and theirs["acceptance_criteria"][1] == "Link lasts 24h"
+
+
+def test_deletes_and_concurrent_inserts():
+    current = {k: v for k, v in BASE.items() if k != "story_points"}
+    current["acceptance_criteria"] = BASE["acceptance_criteria"] + ["Mine"]
+    suggested = dict(BASE, acceptance_criteria=BASE["acceptance_criteria"] + ["Theirs"], tags=["auth"])
+    result = merge3(BASE, current, suggested)
+    assert result["clean"]
+    assert "story_points" not in result["merged"]
+    assert result["merged"]["acceptance_criteria"][-2:] == ["Mine", "Theirs"]
+    assert result["merged"]["tags"] == ["auth"]
+
+    # Deleted on one side, edited on the other
+    edited = dict(BASE, story_points=8)
+    conflict = merge3(BASE, current, edited)["conflicts"]
+    assert conflict == [{"path": "/story_points", "base": 3, "current": None, "suggested": 8}]
+
+
+def test_apply_suggestion_merges_drifted_story(capsys):
+    suggested = dict(BASE, story_points=5, tags=["auth"])
+    suggestion = build_suggestion(BASE, suggested, scope="full")
+    current = dict(BASE, title="Edited meanwhile")
+    applied = apply_suggestion(current, suggestion)
+    assert "differs from the suggestion's 'before'" in capsys.readouterr().out
+    assert applied["title"] == "Edited meanwhile" and applied["story_points"] == 5
+    # Values from the suggestion are not aliased into the result
+    applied["tags"].append("x")
+    assert suggestion["after"]["tags"] == ["auth"]
+
+    assert merge_suggestion(current, suggestion)["clean"]
+    with pytest.raises(ValueError):
+        merge_suggestion(current, build_suggestion(BASE, suggested, scope="full", compact=True))
@@ -0,0 +1,64 @@
+# test_version_store.py
+
+import random
+
+import pytest
+
+from story_fixtures import SIZES, make_story, revise_story
+from version_store import VersionStore
+
+
+def _history(n, seed=5):
+    rng = random.Random(seed)
+    story = make_story(rng, 0, SIZES["medium"])
+    out = [story]
+    for _ in range(n - 1):
+        story = revise_story(rng, story)
+        out.append(story)
+    return out
+
+
+def test_restore_every_version_after_pruning():
+    history = _history(30)
+    store = VersionStore(max_versions=12, keyframe_every=4)
+    for i, story in enumerate(history):
+        assert store.append(story, meta={"turn": i}) == i + 1
+    assert len(store) == 12 and store.latest == 30
+    assert 18 not in store and 19 in store
+    for n in range(19, 31):
+        assert store.restore(n) == history[n - 1]
+    assert store.restore() == history[-1]
+    # Oldest surviving version was promoted to a keyframe; chains stay within K
+    info = store.versions()
+    assert info[0]["keyframe"] and info[0]["meta"] == {"turn": 18}
+    assert all(sum(1 for v in info[i:i + 4] if v["keyframe"]) >= 1 for i in range(0, 12, 4))
+    with pytest.raises(KeyError):
+        store.restore(3)
+
+
+def test_append_patch_and_isolation():
+    store = VersionStore(keyframe_every=3)
+    base = {"title": "A", "tags": ["x"]}
+    store.append(base)
+    base["tags"].append("mutated")  # caller edits don't leak into history
+    store.append_patch([{"op": "add", "path": "/tags/-", "value": "y"}])
+    assert store.restore(2) == {"title": "A", "tags": ["x", "y"]}
+    restored = store.restore(1)
+    restored["tags"].clear()
+    assert store.restore(1) == {"title": "A", "tags": ["x"]}
+    assert store.stats()["deltas"] == 1
+    store.clear()
+    assert store.append(base) == 1 and store.restore() == base
+    with pytest.raises(ValueError):
+        VersionStore().append_patch([])
+
+
+def test_records_round_trip():
+    history = _history(12)
+    store = VersionStore(keyframe_every=5)
+    for story in history:
+        store.append(story)
+    copy = VersionStore.from_records(store.to_records(), keyframe_every=5)
+    assert copy.versions() == store.versions()
+    assert all(copy.restore(n) == history[n - 1] for n in range(1, 13))
+    assert copy.append(history[0]) == 13 and copy.restore(13) == history[0]
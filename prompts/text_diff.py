@@ -0,0 +1,140 @@
+# text_diff.py
+# Word-level diffs for string fields. _diff_dict replaces a changed string as a
+# whole (old text in "before", new text in "value"), and the UI then re-diffs
+# multi-kilobyte descriptions in the browser. attach_text_diffs() computes the
+# word diff once, server side, and stores it on the replace op instead of the
+# old text:
+#
+#   {"op": "replace", "path": "/description", "value": "<new text>",
+#    "text_diff": [["=", 120], ["-", "old words"], ["+", "new words"], ["=", 48]]}
+#
+# "=" segments are lengths (in characters) of text common to both versions,
+# read from "value"; "-" and "+" carry the removed and inserted text. The old
+# text is recoverable (split_text_diff), so the op shrinks to roughly the new
+# text plus the changed words. Cost is bounded: texts beyond the token/cost
+# limits keep the plain replace.
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from build_suggestion import _myers_matches
+
+TEXT_DIFF_MAX_TOKENS = 20000        # per side, after trimming the common prefix/suffix
+TEXT_DIFF_MAX_COST = 2_000_000      # Myers (N+M)*D budget; beyond it: plain replace
+
+_TOKEN_RX = re.compile(r"\w+|\s+|[^\w\s]")
+
+Segment = List[Any]     # ["=", n_chars] | ["-", text] | ["+", text]
+
+
+def tokenize(text: str) -> List[str]:
+    """Words, whitespace runs and single punctuation marks ("".join gives the text back)."""
+    return _TOKEN_RX.findall(text)
+
+
+def _cleanup(raw: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Merge runs of changes: whitespace kept between two changes is folded into
+    them, so "a b c" -> "x y z" is one removal and one insertion, not three.
+    """
+    out: List[Tuple[str, str]] = []
+    pending_del: List[str] = []
+    pending_ins: List[str] = []
+
+    def flush() -> None:
+        if pending_del:
+            out.append(("-", "".join(pending_del)))
+        if pending_ins:
+            out.append(("+", "".join(pending_ins)))
+        pending_del.clear()
+        pending_ins.clear()
+
+    for n, (tag, text) in enumerate(raw):
+        if tag == "=":
+            between_changes = (pending_del or pending_ins) and n + 1 < len(raw) and raw[n + 1][0] != "="
+            if between_changes and text.isspace():
+                pending_del.append(text)
+                pending_ins.append(text)
+                continue
+            flush()
+            if out and out[-1][0] == "=":
+                out[-1] = ("=", out[-1][1] + text)
+            else:
+                out.append(("=", text))
+        elif tag == "-":
+            pending_del.append(text)
+        else:
+            pending_ins.append(text)
+    flush()
+    return out
+
+
+def word_diff(before: str, after: str, *, max_tokens: int = TEXT_DIFF_MAX_TOKENS,
+              max_cost: int = TEXT_DIFF_MAX_COST) -> Optional[List[Segment]]:
+    """
+    Word-level diff of two strings as text_diff segments, or None when the
+    changed middle is too large for the token or cost budget.
+    """
+    a, b = tokenize(before), tokenize(after)
+    p = 0
+    while p < len(a) and p < len(b) and a[p] == b[p]:
+        p += 1
+    s = 0
+    while s < len(a) - p and s < len(b) - p and a[-1 - s] == b[-1 - s]:
+        s += 1
+    mid_a, mid_b = a[p:len(a) - s], b[p:len(b) - s]
+    if len(mid_a) > max_tokens or len(mid_b) > max_tokens:
+        return None
+    total = len(mid_a) + len(mid_b)
+    matches = _myers_matches(mid_a, mid_b, max_cost // total) if total else []
+    if matches is None:
+        return None
+
+    raw: List[Tuple[str, str]] = [("=", "".join(a[:p]))]
+    ia = ib = 0
+    for i, j in matches + [(len(mid_a), len(mid_b))]:
+        raw.append(("-", "".join(mid_a[ia:i])))
+        raw.append(("+", "".join(mid_b[ib:j])))
+        if i < len(mid_a):
+            raw.append(("=", mid_a[i]))
+        ia, ib = i + 1, j + 1
+    raw.append(("=", "".join(a[len(a) - s:])))
+    return [["=", len(text)] if tag == "=" else [tag, text]
+            for tag, text in _cleanup([(t, x) for t, x in raw if x])]
+
+
+def split_text_diff(value: str, segments: List[Segment]) -> Tuple[str, str]:
+    """(old text, new text) from an op's "value" and "text_diff"."""
+    old: List[str] = []
+    pos = 0
+    for tag, item in segments:
+        if tag == "=":
+            old.append(value[pos:pos + item])
+            pos += item
+        elif tag == "+":
+            pos += len(item)
+        else:
+            old.append(item)
+    if pos != len(value):
+        raise ValueError("text_diff does not match the value.")
+    return "".join(old), value
+
+
+def attach_text_diffs(patch: List[Dict[str, Any]], *, keep_before: bool = False) -> List[Dict[str, Any]]:
+    """
+    Copy of `patch` where string replace ops carry "text_diff" (and, unless
+    keep_before, no longer the old text). Ops are left as they are when the
+    texts exceed the budget or the diff would not be smaller than the old text.
+    """
+    out = []
+    for op in patch:
+        before, value = op.get("before"), op.get("value")
+        if op.get("op") == "replace" and isinstance(before, str) and isinstance(value, str):
+            segments = word_diff(before, value)
+            # ~8 bytes of JSON per segment beyond its text
+            if segments is not None and \
+                    sum(len(x) for t, x in segments if t != "=") + 8 * len(segments) < len(before):
+                op = {k: v for k, v in op.items() if keep_before or k != "before"}
+                op["text_diff"] = segments
+        out.append(op)
+    return out
@@ -0,0 +1,139 @@
+# three_way_merge.py
+# Three-way merge of story versions: base (the suggestion's 'before'), current
+# (the story as the user has it now) and suggested (the suggestion's 'after').
+# Used by apply_suggestion when the story drifted after the suggestion was
+# built: edits that don't overlap are combined instead of the suggestion
+# overwriting the user's work, and overlapping edits come back as structured
+# conflicts (the current value is kept unless prefer="suggested").
+#
+# Dicts merge per key, lists per element via diff3 on LCS alignments against
+# the base, scalars/strings as a whole.
+
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
+
+from build_suggestion import MAX_LIST_EDITS, _myers_matches
+from json_patch import clone_json, escape_token
+
+_MISSING = object()  # key absent on one side
+
+
+class MergeConflict(TypedDict):
+    path: str          # JSON pointer into the merged story
+    base: Any          # None when absent (lists: the conflicting slice)
+    current: Any
+    suggested: Any
+
+
+class MergeResult(TypedDict):
+    merged: Any
+    conflicts: List[MergeConflict]
+    clean: bool
+
+
+def _out(value: Any) -> Any:
+    return None if value is _MISSING else value
+
+
+class _Merger:
+    def __init__(self, prefer: str):
+        if prefer not in ("current", "suggested"):
+            raise ValueError("prefer must be 'current' or 'suggested'.")
+        self.prefer = prefer
+        self.conflicts: List[MergeConflict] = []
+
+    def conflict(self, path: str, base: Any, current: Any, suggested: Any) -> Any:
+        self.conflicts.append({"path": path or "", "base": _out(base),
+                               "current": _out(current), "suggested": _out(suggested)})
+        return current if self.prefer == "current" else clone_json(suggested)
+
+    def merge(self, base: Any, cur: Any, sug: Any, path: str) -> Any:
+        # One side unchanged (or both made the same change): take the other
+        if cur is sug or cur == sug:
+            return cur
+        if base is cur or base == cur:
+            return clone_json(sug)
+        if base is sug or base == sug:
+            return cur
+        if isinstance(base, dict) and isinstance(cur, dict) and isinstance(sug, dict):
+            return self.merge_dict(base, cur, sug, path)
+        if isinstance(base, list) and isinstance(cur, list) and isinstance(sug, list):
+            return self.merge_list(base, cur, sug, path)
+        return self.conflict(path, base, cur, sug)
+
+    def merge_dict(self, base: Dict[str, Any], cur: Dict[str, Any], sug: Dict[str, Any],
+                   path: str) -> Dict[str, Any]:
+        merged: Dict[str, Any] = {}
+        keys = list(cur) + [k for k in sug if k not in cur] + [k for k in base if k not in cur and k not in sug]
+        for k in keys:
+            value = self.merge(base.get(k, _MISSING), cur.get(k, _MISSING), sug.get(k, _MISSING),
+                               f"{path}/{escape_token(k)}")
+            if value is not _MISSING:
+                merged[k] = value
+        return merged
+
+    def merge_list(self, base: List[Any], cur: List[Any], sug: List[Any], path: str) -> List[Any]:
+        to_cur = _alignment(base, cur)
+        to_sug = _alignment(base, sug)
+        if to_cur is None or to_sug is None:  # too different to align: one conflicting chunk
+            return self.conflict(path, base, cur, sug)
+
+        out: List[Any] = []
+        i = j = k = 0
+        n = len(base)
+        while True:
+            # Stable run: base element kept at the aligned position on both sides
+            while i < n and to_cur.get(i) == j and to_sug.get(i) == k:
+                out.append(cur[j])
+                i, j, k = i + 1, j + 1, k + 1
+            if i >= n and j >= len(cur) and k >= len(sug):
+                return out
+            # Next base element both sides kept bounds the unstable chunk
+            i2 = i
+            while i2 < n and not (i2 in to_cur and i2 in to_sug):
+                i2 += 1
+            j2 = to_cur[i2] if i2 < n else len(cur)
+            k2 = to_sug[i2] if i2 < n else len(sug)
+            out.extend(self.merge_chunk(base[i:i2], cur[j:j2], sug[k:k2], path, len(out)))
+            i, j, k = i2, j2, k2
+
+    def merge_chunk(self, b: List[Any], c: List[Any], s: List[Any], path: str, at: int) -> List[Any]:
+        if c == s or b == s:
+            return c
+        if b == c:
+            return clone_json(s)
+        if not b:
+            # Both inserted at the same spot: keep both, current's first
+            return c + [clone_json(x) for x in s if x not in c]
+        if len(b) == len(c) == len(s):
+            # Same-shape edits: merge element by element (e.g. different parts of one AC object)
+            return [self.merge(bx, cx, sx, f"{path}/{at + n}") for n, (bx, cx, sx) in enumerate(zip(b, c, s))]
+        self.conflicts.append({"path": f"{path}/{at}", "base": b, "current": c, "suggested": s})
+        return c if self.prefer == "current" else clone_json(s)
+
+
+def _alignment(base: List[Any], other: List[Any]) -> Optional[Dict[int, int]]:
+    """base index -> other index for elements an LCS keeps; None if beyond the edit cap."""
+    matches: Optional[List[Tuple[int, int]]] = _myers_matches(base, other, MAX_LIST_EDITS)
+    return None if matches is None else dict(matches)
+
+
+def merge3(base: Any, current: Any, suggested: Any, *, prefer: str = "current") -> MergeResult:
+    """
+    Three-way merge. Non-overlapping edits from both sides are combined;
+    overlapping ones are listed in 'conflicts' and resolved in favour of
+    `prefer`. The merged value shares unchanged subtrees with `current`;
+    anything taken from `suggested` is copied.
+    """
+    merger = _Merger(prefer)
+    merged = merger.merge(base, current, suggested, "")
+    return {"merged": merged, "conflicts": merger.conflicts, "clean": not merger.conflicts}
+
+
+def merge_suggestion(current_story: Dict[str, Any], suggestion: Dict[str, Any], *,
+                     prefer: str = "current") -> MergeResult:
+    """Merge a full suggestion (base = its 'before') into a story that has drifted since."""
+    before, after = suggestion.get("before"), suggestion.get("after")
+    if not isinstance(before, dict) or not isinstance(after, dict):
+        raise ValueError("A three-way merge needs the suggestion's 'before' and 'after' "
+                         "(compact suggestions only carry a patch).")
+    return merge3(before, current_story, after, prefer=prefer)
@@ -0,0 +1,191 @@
+# version_store.py
+# Per-story version history as a delta chain: every K-th version is a keyframe
+# (a full story), the versions between store only the JSON Patch from their
+# predecessor. Replaces keeping up to 50 full snapshots per story.
+#
+# Stories are never mutated once stored: each new head is built from the
+# previous one with copy-on-write apply_patch, so a keyframe is the head
+# object itself and shares unchanged fields with the keyframes before it.
+# Appending costs the size of the change; restoring any version applies at
+# most K-1 patches to the nearest keyframe. History past max_versions is
+# pruned automatically.
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from build_suggestion import _diff_dict
+from json_patch import Patch, apply_patch, clone_json
+
+Story = Dict[str, Any]
+
+MAX_VERSIONS = 50       # per-story history cap from the requirements
+KEYFRAME_EVERY = 10     # K: restore cost is bounded by K-1 patch applications
+
+
+@dataclass
+class _Version:
+    number: int
+    created_at: float
+    meta: Optional[Dict[str, Any]]
+    keyframe: Optional[Story] = None    # full story (shared, read-only) ...
+    patch: Optional[Patch] = None       # ... or the patch from the previous version
+
+
+def _strip(patch: Patch) -> Patch:
+    """Forward-only ops with private values ('before' is only needed for previews)."""
+    out = []
+    for op in patch:
+        slim = {k: op[k] for k in ("op", "path", "from") if k in op}
+        if "value" in op:
+            slim["value"] = clone_json(op["value"])
+        out.append(slim)
+    return out
+
+
+class VersionStore:
+    """
+    Version history of one story. append() records a version and returns its
+    number (1, 2, ...); restore(n) rebuilds it. Once more than max_versions
+    are stored, the oldest are dropped. Not thread-safe.
+    """
+
+    def __init__(self, max_versions: int = MAX_VERSIONS, keyframe_every: int = KEYFRAME_EVERY):
+        if max_versions < 1 or keyframe_every < 1:
+            raise ValueError("max_versions and keyframe_every must be >= 1.")
+        self.max_versions = max_versions
+        self.keyframe_every = keyframe_every
+        self._versions: List[_Version] = []
+        self._head: Optional[Story] = None
+        self._since_keyframe = 0
+        self._next = 1
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def __contains__(self, number: int) -> bool:
+        return self._position(number) is not None
+
+    @property
+    def latest(self) -> Optional[int]:
+        return self._versions[-1].number if self._versions else None
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Number, timestamp and meta of each stored version, oldest first."""
+        return [{"version": v.number, "created_at": v.created_at, "meta": v.meta,
+                 "keyframe": v.keyframe is not None} for v in self._versions]
+
+    def append(self, story: Story, *, meta: Optional[Dict[str, Any]] = None) -> int:
+        """Record `story` as the next version (diffed against the latest one)."""
+        if self._head is None:
+            return self._record(clone_json(story), None, meta)
+        return self.append_patch(_diff_dict(self._head, story), meta=meta)
+
+    def append_patch(self, patch: Patch, *, meta: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Record the latest version with `patch` applied, e.g. an accepted
+        suggestion's diff. Skips the diff, so the cost is just the change.
+        """
+        if self._head is None:
+            raise ValueError("append_patch needs an initial version; use append().")
+        patch = _strip(patch)
+        return self._record(apply_patch(self._head, patch), patch, meta)
+
+    def _record(self, head: Story, patch: Optional[Patch], meta: Optional[Dict[str, Any]]) -> int:
+        version = _Version(self._next, time.time(), meta)
+        if patch is None or self._since_keyframe + 1 >= self.keyframe_every:
+            version.keyframe = head
+            self._since_keyframe = 0
+        else:
+            version.patch = patch
+            self._since_keyframe += 1
+        self._versions.append(version)
+        self._head = head
+        self._next += 1
+        self._prune()
+        return version.number
+
+    def _prune(self) -> None:
+        while len(self._versions) > self.max_versions:
+            dropped = self._versions.pop(0)
+            first = self._versions[0]
+            if first.keyframe is None:
+                # The chain's keyframe is gone: the next version becomes one
+                first.keyframe = apply_patch(dropped.keyframe, first.patch)
+                first.patch = None
+
+    def _position(self, number: int) -> Optional[int]:
+        if not self._versions:
+            return None
+        pos = number - self._versions[0].number
+        return pos if 0 <= pos < len(self._versions) else None
+
+    def restore(self, number: Optional[int] = None) -> Story:
+        """A private copy of version `number` (default: the latest)."""
+        if number is None:
+            number = self.latest
+        pos = self._position(number) if number is not None else None
+        if pos is None:
+            raise KeyError(f"Unknown or pruned version: {number!r}")
+        start = pos
+        while self._versions[start].keyframe is None:
+            start -= 1
+        story = self._versions[start].keyframe
+        for version in self._versions[start + 1:pos + 1]:
+            story = apply_patch(story, version.patch)
+        return clone_json(story)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Stored versions as plain dicts, oldest first (for persistence, e.g. story_codec)."""
+        out = []
+        for v in self._versions:
+            rec: Dict[str, Any] = {"version": v.number, "created_at": v.created_at, "meta": v.meta}
+            if v.keyframe is not None:
+                rec["keyframe"] = v.keyframe
+            else:
+                rec["patch"] = v.patch
+            out.append(rec)
+        return out
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]], **kwargs: Any) -> "VersionStore":
+        """Rebuild a store from to_records() output (the first record must be a keyframe)."""
+        store = cls(**kwargs)
+        if not records:
+            return store
+        if "keyframe" not in records[0]:
+            raise ValueError("The oldest version record must be a keyframe.")
+        for rec in records:
+            version = _Version(rec["version"], rec["created_at"], rec.get("meta"))
+            if "keyframe" in rec:
+                version.keyframe = clone_json(rec["keyframe"])
+                store._since_keyframe = 0
+            else:
+                version.patch = _strip(rec["patch"])
+                store._since_keyframe += 1
+            store._versions.append(version)
+        store._next = store._versions[-1].number + 1
+        # Rebuild the head without copying: keyframe plus the patches after it
+        start = max(i for i, v in enumerate(store._versions) if v.keyframe is not None)
+        head = store._versions[start].keyframe
+        for v in store._versions[start + 1:]:
+            head = apply_patch(head, v.patch)
+        store._head = head
+        store._prune()
+        return store
+
+    def clear(self) -> None:
+        self._versions.clear()
+        self._head = None
+        self._since_keyframe = 0
+        self._next = 1
+
+    def stats(self) -> Dict[str, Any]:
+        keyframes = sum(v.keyframe is not None for v in self._versions)
+        return {
+            "versions": len(self._versions),
+            "keyframes": keyframes,
+            "deltas": len(self._versions) - keyframes,
+            "patch_ops": sum(len(v.patch) for v in self._versions if v.patch is not None),
+            "latest": self.latest,
+        }